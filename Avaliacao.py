@@ -1,32 +1,50 @@
 import streamlit as st
 import pandas as pd
 import os
-import plotly.express as px
-from PIL import Image
-import base64
+import shutil
 import time
-import openpyxl
+import votos_db
+from cache_entradas import CacheEntradas
+from instrumentacao import Instrumentacao
+# plotly (gráficos) e catalogo_projetos (que traz o openpyxl) são importados só onde são usados,
+# então a tela de login abre sem carregá-los
 
-# --- FUNÇÃO PARA CODIFICAR IMAGEM (PARA O PLANO DE FUNDO) ---
-@st.cache_data
-def get_base64_of_bin_file(bin_file):
+# --- IMAGENS (PLANO DE FUNDO, BANNER E LOGO) ---
+# Servidas pelo Streamlit como arquivos estáticos (server.enableStaticServing em .streamlit/config.toml):
+# a página leva só a URL da imagem, em vez da imagem inteira em base64 a cada rerun.
+PASTA_IMAGENS = 'assets'
+PASTA_ESTATICA = 'static'
+
+@st.cache_resource
+def _publicar_imagem(nome_arquivo, versao):
+    """Copia assets/<nome_arquivo> para static/ uma vez por versão (data de modificação) da imagem e devolve a URL."""
+    origem = os.path.join(PASTA_IMAGENS, nome_arquivo)
+    destino = os.path.join(PASTA_ESTATICA, nome_arquivo)
+    if not os.path.exists(destino) or os.stat(destino).st_mtime_ns != versao:
+        os.makedirs(PASTA_ESTATICA, exist_ok=True)
+        shutil.copy2(origem, destino)
+    # O Streamlit não manda Cache-Control para os arquivos estáticos: o parâmetro "v" não faz o navegador
+    # guardar a imagem, só dá outra URL quando a imagem muda (para não aparecer uma versão antiga)
+    return f"app/static/{nome_arquivo}?v={versao}"
+
+def url_imagem(nome_arquivo):
+    """URL estática de assets/<nome_arquivo>; None se a imagem não existe."""
     try:
-        with open(bin_file, 'rb') as f:
-            data = f.read()
-        return base64.b64encode(data).decode()
+        versao = os.stat(os.path.join(PASTA_IMAGENS, nome_arquivo)).st_mtime_ns
     except FileNotFoundError:
         return None
+    return _publicar_imagem(nome_arquivo, versao)
 
 def set_png_as_page_bg(png_file):
-    bin_str = get_base64_of_bin_file(png_file)
-    if bin_str is None:
-        st.error(f"Arquivo de imagem de fundo não encontrado em '{png_file}'. Verifique a pasta 'assets'.")
+    url = url_imagem(png_file)
+    if url is None:
+        st.error(f"Arquivo de imagem de fundo não encontrado em '{os.path.join(PASTA_IMAGENS, png_file)}'. Verifique a pasta 'assets'.")
         return
         
     page_bg_img = f'''
     <style>
     .stApp {{
-        background-image: url("data:image/png;base64,{bin_str}");
+        background-image: url("{url}");
         background-size: cover;
         background-repeat: no-repeat;
         background-attachment: scroll;
@@ -37,10 +55,9 @@ def set_png_as_page_bg(png_file):
 
 
 # --- CONFIGURAÇÕES DA PÁGINA ---
-try:
-    page_icon = Image.open("assets/logo_sidebar.png")
-except FileNotFoundError:
-    page_icon = "📊"
+# O Streamlit aceita o caminho do arquivo direto, sem abrir a imagem com o PIL
+CAMINHO_ICONE = os.path.join(PASTA_IMAGENS, "logo_sidebar.png")
+page_icon = CAMINHO_ICONE if os.path.exists(CAMINHO_ICONE) else "📊"
 
 st.set_page_config(
     page_title="AVALIAÇÃO DE FORNECEDORES",
@@ -49,6 +66,8 @@ st.set_page_config(
 )
 
 # --- DADOS E CONSTANTES ---
+ARQUIVO_BANCO = 'votos.db'
+# Arquivo usado pelas versões antigas; é importado para o banco uma única vez
 ARQUIVO_VOTOS = 'votos.csv'
 # Caminho relativo para o arquivo Excel com a lista de projetos.
 # O arquivo BUSCAR_LCP.xlsx deve estar na mesma pasta que este script.
@@ -110,46 +129,86 @@ RUBRICA = {
 
 
 # --- FUNÇÕES DE DADOS ---
-def carregar_votos():
-    if os.path.exists(ARQUIVO_VOTOS):
-        return pd.read_csv(ARQUIVO_VOTOS, dtype={'projeto': str})
-    else:
-        return pd.DataFrame(columns=['user_name', 'projeto', 'empresa', 'categoria', 'pergunta_id', 'pergunta_texto', 'voto'])
-
-@st.cache_data
-def carregar_projetos(caminho_arquivo):
-    """Lê as abas do arquivo Excel, concatena as colunas e retorna uma lista única de projetos LCP."""
-    try:
-        df_capex = pd.read_excel(caminho_arquivo, sheet_name="Capex", header=3)
-        df_ame = pd.read_excel(caminho_arquivo, sheet_name="AME - Quarterly", header=3)
-
-        projetos_capex = []
-        if 'WBS' in df_capex.columns and 'PROJECT NAME' in df_capex.columns:
-            df_capex.dropna(subset=['WBS', 'PROJECT NAME'], inplace=True)
-            projetos_capex = (df_capex['WBS'].astype(str) + " - " + df_capex['PROJECT NAME'].astype(str)).tolist()
+@st.cache_resource
+def obter_repositorio_votos():
+    """Repositório único por processo: importa o votos.csv antigo (só na primeira vez) e mantém os votos em memória."""
+    votos_db.importar_csv(ARQUIVO_BANCO, ARQUIVO_VOTOS)
+    return votos_db.RepositorioVotos(ARQUIVO_BANCO)
 
-        projetos_ame = []
-        if 'WBS' in df_ame.columns and 'PROJECT NAME' in df_ame.columns:
-            df_ame.dropna(subset=['WBS', 'PROJECT NAME'], inplace=True)
-            projetos_ame = (df_ame['WBS'].astype(str) + " - " + df_ame['PROJECT NAME'].astype(str)).tolist()
+def carregar_votos():
+    """Votos ativos (IDs de usuário, projeto, empresa e pergunta); o banco só é relido quando alguém grava ou apaga uma avaliação."""
+    return obter_repositorio_votos().obter()
 
-        todos_projetos = projetos_capex + projetos_ame
+def carregar_dimensoes():
+    """Nomes de usuários, projetos, empresas e perguntas por ID, para exibir os votos."""
+    return obter_repositorio_votos().dimensoes()
 
-        # Filtra a lista para manter apenas os projetos que começam com "LCP"
-        projetos_lcp = [proj for proj in todos_projetos if proj.strip().startswith("LCP")]
-
-        # Remove duplicatas e ordena a lista final
-        projetos_finais = sorted(list(set(projetos_lcp)))
-        
-        return projetos_finais
+@st.cache_resource
+def obter_cache_entradas():
+    """Mesmo cache em disco do app.py: as abas do LCP lidas por um aplicativo servem ao outro."""
+    return CacheEntradas()
 
+def carregar_catalogo_projetos(caminho_arquivo):
+    """Catálogo dos projetos LCP; o arquivo só é relido quando muda (data/tamanho e conteúdo)."""
+    from catalogo_projetos import obter_catalogo
+    try:
+        return obter_catalogo(caminho_arquivo, cache=obter_cache_entradas())
     except FileNotFoundError:
         st.error(f"ERRO: O arquivo de projetos não foi encontrado em '{caminho_arquivo}'. Verifique se ele está na mesma pasta do script.")
-        return ["ERRO: Arquivo de projetos não encontrado"]
+    except Exception as e:
+        st.error(f"Ocorreu um erro ao processar o arquivo de projetos: {e}")
+    return None
+
+def carregar_projetos(caminho_arquivo):
+    """Lista única e ordenada de projetos LCP ("WBS - PROJECT NAME") das abas Capex e AME."""
+    catalogo = carregar_catalogo_projetos(caminho_arquivo)
+    if catalogo is None:
+        return ["ERRO: Arquivo de projetos indisponível"]
+    try:
+        return catalogo.projetos_lcp
     except Exception as e:
         st.error(f"Ocorreu um erro ao processar o arquivo de projetos: {e}")
         return [f"ERRO: {e}"]
 
+# --- FUNÇÕES DE GRÁFICOS ---
+# As figuras ficam em cache pelo conteúdo das médias: reruns sem dados novos não reconstroem nada.
+EMPRESAS_POR_PAGINA = 9
+ALTURA_LINHA_GRAFICO = 320
+
+@st.cache_data
+def grafico_facetado(media_por_categoria):
+    """Uma única figura com um painel por fornecedor (3 por linha)."""
+    import plotly.express as px
+    empresas = media_por_categoria['empresa'].astype(str)
+    n_linhas = -(-empresas.nunique() // 3)
+    fig = px.bar(media_por_categoria.assign(empresa=empresas), x='categoria', y='media_avaliacao', color='categoria', facet_col='empresa', facet_col_wrap=3,
+                 text_auto='.2f', height=ALTURA_LINHA_GRAFICO * n_linhas, facet_row_spacing=min(0.08, 0.5 / n_linhas))
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split('=', 1)[-1], font_size=12))
+    fig.update_yaxes(range=[0, 5], title_text=None)
+    fig.update_xaxes(title_text=None, showticklabels=True)
+    fig.update_layout(showlegend=False)
+    return fig
+
+@st.cache_data
+def grafico_empresa(df_empresa, empresa):
+    import plotly.express as px
+    fig = px.bar(df_empresa, x='categoria', y='media_avaliacao', color='categoria', title=empresa, text_auto='.2f')
+    fig.update_layout(yaxis_range=[0, 5], xaxis_title=None, yaxis_title="Média", showlegend=False, title_font_size=14, title_x=0.5)
+    return fig
+
+@st.cache_resource
+def tabelas_rubrica():
+    """Legenda das notas e a tabela de critérios de cada pergunta, montadas uma vez por processo."""
+    legenda = pd.DataFrame({"Nota": ["1", "2", "3", "4", "5"], "Significado": ["Needs improvement", "Meets partially the expectations", "Meets the expectations", "Exceed partially the expectations", "Exceed the expectations"]}).set_index('Nota')
+    criterios = {(categoria, pid): pd.DataFrame({'Nota': [1, 2, 3, 4, 5], 'Descrição do Critério': descricoes}).set_index('Nota')
+                 for categoria, perguntas in RUBRICA.items() for pid, descricoes in perguntas.items()}
+    return legenda, criterios
+
+def mostrar_desempenho(medicoes):
+    """Painel recolhível na barra lateral com o tempo, as linhas e o pico de RSS (e o pico de memória da fase, se medido) de cada fase deste rerun."""
+    with st.sidebar.expander(f"⏱️ Desempenho ({medicoes.total_segundos:.2f} s)"):
+        st.dataframe(medicoes.tabela(), hide_index=True, use_container_width=True)
+
 # --- GERENCIAMENTO DE ESTADO ---
 if 'user_name' not in st.session_state:
     st.session_state.user_name = None
@@ -158,7 +217,7 @@ if 'user_name' not in st.session_state:
 # --- LÓGICA DE EXIBIÇÃO ---
 
 if not st.session_state.user_name:
-    set_png_as_page_bg('assets/login_fundo.jpg')
+    set_png_as_page_bg('login_fundo.jpg')
     st.markdown("""<style> h1, label { color: black !important; background-color: rgba(255, 255, 255, 0.7); padding: 10px; border-radius: 10px; font-weight: bold !important; } </style>""", unsafe_allow_html=True)
     st.title("Bem-vindo ao Sistema de Avaliação de Fornecedores")
     with st.form("login_form"):
@@ -181,10 +240,13 @@ else:
     with col1:
         st.title("RELATÓRIO DE AVALIAÇÃO DE FORNECEDORES")
     with col2:
-        if os.path.exists("assets/banner_votacao.jpg"):
-            st.image("assets/banner_votacao.jpg", width=250) 
+        url_banner = url_imagem("banner_votacao.jpg")
+        if url_banner:
+            st.markdown(f'<img src="{url_banner}" width="250">', unsafe_allow_html=True)
             
-    st.sidebar.image("assets/logo_sidebar.png")
+    url_logo = url_imagem("logo_sidebar.png")
+    if url_logo:
+        st.sidebar.markdown(f'<img src="{url_logo}" style="width: 100%;">', unsafe_allow_html=True)
     st.sidebar.success(f"Logado como:\n**{st.session_state.user_name}**")
     if st.session_state.is_admin:
         st.sidebar.warning("👑 **Nível de Acesso:** Administrador")
@@ -200,16 +262,25 @@ else:
         "⚙️ DADOS E ADMINISTRAÇÃO",
         "📘 CRITÉRIOS DE AVALIAÇÃO"
     ])
-    df_votos_geral = carregar_votos()
+    medicoes = Instrumentacao('avaliacao')
+    with medicoes.etapa("Carga dos votos") as medicao:
+        df_votos_geral = carregar_votos()
+        medicao.linhas = len(df_votos_geral)
+    # Lidas junto com os votos: cobrem todos os IDs deles. Os filtros e agrupamentos usam os IDs e os nomes entram só na exibição
+    dimensoes = carregar_dimensoes()
     
     with tab_votacao:
         st.header("Registrar Nova Avaliação de Projeto")
         st.info("Selecione o projeto, o fornecedor e responda às perguntas para registrar uma nova avaliação.")
+        # A busca fica fora do formulário para filtrar a lista a cada tecla confirmada
+        termo_busca = st.text_input("Buscar projeto (WBS ou nome):", placeholder="Ex.: LCP-23 ou parte do nome")
+        catalogo = carregar_catalogo_projetos(ARQUIVO_PROJETOS) if termo_busca else None
+        opcoes_projeto = catalogo.buscar(termo_busca) if catalogo is not None else lista_projetos_lcp
         with st.form(key="form_nova_avaliacao", clear_on_submit=True):
             
             projeto = st.selectbox(
                 "Projeto*", 
-                options=lista_projetos_lcp,
+                options=opcoes_projeto,
                 index=None,
                 placeholder="Selecione um projeto LCP da lista..."
             )
@@ -229,14 +300,11 @@ else:
                 if not projeto or not empresa_selecionada:
                     st.error("Por favor, selecione um Projeto e um Fornecedor.")
                 else:
-                    ja_votou = not df_votos_geral[(df_votos_geral['user_name'] == st.session_state.user_name) & (df_votos_geral['empresa'] == empresa_selecionada) & (df_votos_geral['projeto'] == projeto)].empty
-                    if ja_votou:
+                    novos_votos = [(c.split('_')[0], c.split('_')[1], PERGUNTAS[c.split('_')[0]][c.split('_')[1]], v) for c, v in respostas.items()]
+                    # O índice único do banco garante que cada usuário avalie a empresa uma vez por projeto
+                    if not votos_db.registrar_avaliacao(ARQUIVO_BANCO, st.session_state.user_name, projeto, empresa_selecionada, novos_votos):
                         st.error(f"Você já avaliou a empresa '{empresa_selecionada}' para o projeto '{projeto}'.")
                     else:
-                        novos_votos = [{'user_name': st.session_state.user_name, 'projeto': projeto, 'empresa': empresa_selecionada, 'categoria': c.split('_')[0], 'pergunta_id': c.split('_')[1], 'pergunta_texto': PERGUNTAS[c.split('_')[0]][c.split('_')[1]], 'voto': v} for c, v in respostas.items()]
-                        df_novos_votos = pd.DataFrame(novos_votos)
-                        df_votos_atualizado = pd.concat([df_votos_geral, df_novos_votos], ignore_index=True)
-                        df_votos_atualizado.to_csv(ARQUIVO_VOTOS, index=False)
                         st.success(f"Avaliação para o projeto '{projeto}' registrada com sucesso!")
 
     with tab_projetos:
@@ -245,41 +313,59 @@ else:
             st.info("Nenhuma avaliação de projeto foi registrada ainda.")
         else:
             projetos_avaliados = df_votos_geral.groupby('projeto')['empresa'].unique()
-            for nome_projeto, empresas_no_projeto in projetos_avaliados.items():
-                with st.expander(f"**Projeto:** {nome_projeto} ({len(empresas_no_projeto)} empresa(s) avaliada(s))"):
-                    for emp in sorted(empresas_no_projeto):
+            for id_projeto, empresas_no_projeto in sorted(projetos_avaliados.items(), key=lambda item: dimensoes.projetos[item[0]]):
+                with st.expander(f"**Projeto:** {dimensoes.projetos[id_projeto]} ({len(empresas_no_projeto)} empresa(s) avaliada(s))"):
+                    for emp in sorted(dimensoes.empresas[empresas_no_projeto]):
                         st.markdown(f"- {emp}")
 
     with tab_relatorio:
         st.header("Análise de Desempenho dos Fornecedores")
-        if df_votos_geral.empty:
+        # As médias vêm dos agregados mantidos pelo banco (soma e quantidade de notas), não dos votos individuais.
+        # Os nomes vêm das dimensões lidas junto com os agregados: uma avaliação gravada por outra sessão depois
+        # da carga dos votos pode ter trazido um projeto, empresa ou pergunta novos
+        with medicoes.etapa("Leitura dos agregados") as medicao:
+            df_agregados, dimensoes_agregados = obter_repositorio_votos().obter_agregados()
+            medicao.linhas = len(df_agregados)
+        if df_agregados.empty:
             st.info("Ainda não há votos registrados.")
         else:
-            lista_projetos_filtro = ["Todos os Projetos"] + sorted(df_votos_geral['projeto'].unique().tolist())
-            projeto_filtrado = st.selectbox("Filtrar por Projeto:", lista_projetos_filtro)
+            lista_projetos_filtro = [None] + sorted(df_agregados['projeto'].unique().tolist(), key=lambda id_projeto: dimensoes_agregados.projetos[id_projeto])
+            id_projeto_filtrado = st.selectbox("Filtrar por Projeto:", lista_projetos_filtro, format_func=lambda id_projeto: "Todos os Projetos" if id_projeto is None else dimensoes_agregados.projetos[id_projeto])
+            projeto_filtrado = "Todos os Projetos" if id_projeto_filtrado is None else dimensoes_agregados.projetos[id_projeto_filtrado]
             
-            df_filtrado = df_votos_geral if projeto_filtrado == "Todos os Projetos" else df_votos_geral[df_votos_geral['projeto'] == projeto_filtrado]
-            df_calculo = df_filtrado[df_filtrado['voto'] != 'N/A'].copy()
-            df_calculo['voto'] = pd.to_numeric(df_calculo['voto'])
-            media_por_categoria = df_calculo.groupby(['empresa', 'categoria'])['voto'].mean().reset_index()
-            media_por_categoria.rename(columns={'voto': 'media_avaliacao'}, inplace=True)
-            st.subheader("Gráficos Individuais por Fornecedor")
+            with medicoes.etapa("Médias por categoria") as medicao:
+                media_por_categoria = votos_db.medias_por_categoria(df_agregados, dimensoes_agregados, id_projeto_filtrado)
+                medicao.linhas = len(media_por_categoria)
+            st.subheader("Gráficos por Fornecedor")
             empresas_avaliadas = media_por_categoria['empresa'].unique()
-            if not empresas_avaliadas.any():
+            if len(empresas_avaliadas) == 0:
                 st.warning(f"Nenhuma avaliação encontrada para o projeto '{projeto_filtrado}'.")
             else:
-                cols = st.columns(3)
-                for i, empresa in enumerate(empresas_avaliadas):
-                    df_empresa = media_por_categoria[media_por_categoria['empresa'] == empresa]
-                    fig = px.bar(df_empresa, x='categoria', y='media_avaliacao', color='categoria', title=empresa, text_auto='.2f')
-                    fig.update_layout(yaxis_range=[0, 5], xaxis_title=None, yaxis_title="Média", showlegend=False, title_font_size=14, title_x=0.5)
-                    with cols[i % 3]:
-                        st.plotly_chart(fig, use_container_width=True)
+                modo_graficos = st.radio("Exibição:", ["Gráfico único (todos os fornecedores)", "Gráficos individuais (por página)"], horizontal=True)
+                with medicoes.etapa("Gráficos") as medicao:
+                    if modo_graficos.startswith("Gráfico único"):
+                        st.plotly_chart(grafico_facetado(media_por_categoria), use_container_width=True)
+                        medicao.linhas = len(empresas_avaliadas)
+                    else:
+                        # Só os fornecedores da página atual são desenhados e enviados ao navegador
+                        total_paginas = -(-len(empresas_avaliadas) // EMPRESAS_POR_PAGINA)
+                        pagina = st.number_input(f"Página (de {total_paginas}):", min_value=1, max_value=total_paginas, value=1, step=1) if total_paginas > 1 else 1
+                        inicio = (pagina - 1) * EMPRESAS_POR_PAGINA
+                        cols = st.columns(3)
+                        medicao.linhas = min(EMPRESAS_POR_PAGINA, len(empresas_avaliadas) - inicio)
+                        for i, empresa in enumerate(empresas_avaliadas[inicio:inicio + EMPRESAS_POR_PAGINA]):
+                            df_empresa = media_por_categoria[media_por_categoria['empresa'] == empresa]
+                            with cols[i % 3]:
+                                st.plotly_chart(grafico_empresa(df_empresa, empresa), use_container_width=True)
                 st.markdown("---")
                 st.subheader("Tabela Geral de Médias")
-                tabela_pivot = media_por_categoria.pivot_table(index='empresa', columns='categoria', values='media_avaliacao').round(2)
+                tabela_pivot = media_por_categoria.pivot_table(index='empresa', columns='categoria', values='media_avaliacao', observed=True).round(2)
                 st.dataframe(tabela_pivot, use_container_width=True)
 
+    # Mostrado antes da aba de administração, que interrompe a página para quem não é administrador
+    # Só o painel: cada rerun da página não é uma execução do processo e não vai para o desempenho.jsonl
+    mostrar_desempenho(medicoes)
+
     with tab_dados:
         st.header("Painel de Administração e Dados")
         if not st.session_state.is_admin:
@@ -289,52 +375,53 @@ else:
         if df_votos_geral.empty:
             st.info("Nenhuma participação registrada ainda.")
         else:
-            for user_name, user_df in df_votos_geral.groupby('user_name'):
-                with st.expander(f"**Usuário:** {user_name}"):
+            avaliacoes = df_votos_geral[['usuario', 'projeto', 'empresa']].drop_duplicates()
+            for id_usuario, user_df in sorted(avaliacoes.groupby('usuario'), key=lambda item: dimensoes.usuarios[item[0]]):
+                with st.expander(f"**Usuário:** {dimensoes.usuarios[id_usuario]}"):
                     projetos_do_usuario = user_df.groupby('projeto')['empresa'].unique()
                     for proj, emps in projetos_do_usuario.items():
-                        st.markdown(f"   - **Projeto:** {proj} | **Empresas:** {', '.join(sorted(emps))}")
+                        st.markdown(f"   - **Projeto:** {dimensoes.projetos[proj]} | **Empresas:** {', '.join(sorted(dimensoes.empresas[emps]))}")
         st.markdown("---")
         st.subheader("Administração de Avaliações")
         if not df_votos_geral.empty:
-            usuarios_com_voto = sorted(df_votos_geral['user_name'].unique())
+            usuarios_com_voto = sorted(dimensoes.usuarios[df_votos_geral['usuario'].unique()])
             user_selecionado_admin = st.selectbox("1. Selecione o usuário:", usuarios_com_voto, index=None)
             if user_selecionado_admin:
-                avaliacoes_do_usuario = df_votos_geral[df_votos_geral['user_name'] == user_selecionado_admin][['projeto', 'empresa']].drop_duplicates().to_records(index=False)
-                avaliacao_para_apagar = st.selectbox("2. Selecione a avaliação para apagar:", [f"Projeto: {p} | Empresa: {e}" for p, e in avaliacoes_do_usuario], index=None)
+                id_usuario = dimensoes.usuarios.index[dimensoes.usuarios == user_selecionado_admin][0]
+                avaliacoes_do_usuario = df_votos_geral.loc[df_votos_geral['usuario'] == id_usuario, ['projeto', 'empresa']].drop_duplicates().to_records(index=False)
+                avaliacao_para_apagar = st.selectbox("2. Selecione a avaliação para apagar:", [(p, e) for p, e in avaliacoes_do_usuario], index=None,
+                                                     format_func=lambda avaliacao: f"Projeto: {dimensoes.projetos[avaliacao[0]]} | Empresa: {dimensoes.empresas[avaliacao[1]]}")
                 if avaliacao_para_apagar:
-                    projeto_apagar = avaliacao_para_apagar.split(' | ')[0].replace('Projeto: ', '')
-                    empresa_apagar = avaliacao_para_apagar.split(' | ')[1].replace('Empresa: ', '')
+                    projeto_apagar = dimensoes.projetos[avaliacao_para_apagar[0]]
+                    empresa_apagar = dimensoes.empresas[avaliacao_para_apagar[1]]
                     st.warning(f"Você está prestes a apagar a avaliação do projeto '{projeto_apagar}' para a empresa '{empresa_apagar}'.")
                     if st.button("Confirmar Exclusão da Avaliação", type="primary"):
-                        df_final = df_votos_geral[~((df_votos_geral['user_name'] == user_selecionado_admin) & (df_votos_geral['projeto'] == projeto_apagar) & (df_votos_geral['empresa'] == empresa_apagar))]
-                        df_final.to_csv(ARQUIVO_VOTOS, index=False)
+                        votos_db.apagar_avaliacao(ARQUIVO_BANCO, user_selecionado_admin, projeto_apagar, empresa_apagar)
                         st.success("Avaliação apagada com sucesso.")
                         st.rerun()
         st.markdown("---")
         st.subheader("Visualizar Todos os Votos Registrados")
-        st.dataframe(df_votos_geral, use_container_width=True)
+        st.dataframe(votos_db.rotular(df_votos_geral, dimensoes), use_container_width=True)
         st.markdown("---")
         st.subheader("Zona de Perigo: Apagar Todo o Histórico")
         st.warning("🚨 CUIDADO: Esta ação apagará **TODAS AS AVALIAÇÕES** permanentemente.")
         if st.checkbox("Eu entendo e quero apagar todos os dados."):
             if st.button("APAGAR TUDO", type="primary"):
-                if os.path.exists(ARQUIVO_VOTOS):
-                    os.remove(ARQUIVO_VOTOS)
-                    st.success("Todo o histórico de votos foi apagado.")
-                    st.rerun()
+                votos_db.apagar_todas(ARQUIVO_BANCO)
+                st.success("Todo o histórico de votos foi apagado.")
+                st.rerun()
 
     with tab_criterios:
         st.header("📘 Guia de Critérios para Avaliação")
         st.info("Use esta guia para consultar o que cada nota significa para cada pergunta específica.")
-        legenda_geral = {"Nota": ["1", "2", "3", "4", "5"], "Significado": ["Needs improvement", "Meets partially the expectations", "Meets the expectations", "Exceed partially the expectations", "Exceed the expectations"]}
-        st.table(pd.DataFrame(legenda_geral).set_index('Nota'))
+        legenda_geral, criterios = tabelas_rubrica()
+        st.table(legenda_geral)
         st.markdown("---")
         for categoria, perguntas in PERGUNTAS.items():
             with st.expander(f"Critérios para a Categoria: **{categoria}**"):
                 for pid, ptexto in perguntas.items():
                     st.markdown(f"##### Pergunta {pid}: {ptexto}")
-                    if categoria in RUBRICA and pid in RUBRICA[categoria]:
-                        st.table(pd.DataFrame({'Nota': [1, 2, 3, 4, 5], 'Descrição do Critério': RUBRICA[categoria][pid]}).set_index('Nota'))
+                    if (categoria, pid) in criterios:
+                        st.table(criterios[(categoria, pid)])
                     else:
                         st.warning("Critérios para esta pergunta não definidos.")
\ No newline at end of file
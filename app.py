@@ -1,8 +1,15 @@
+import os
+import tempfile
+import time
+
 import streamlit as st
 import pandas as pd
-import io
-from openpyxl import load_workbook
-from openpyxl.styles import Border, Side, Alignment, Font, PatternFill
+from cache_entradas import CacheEntradas
+from delta_sc import assinatura_planilha, caminho_snapshot_por_hash, gravar_snapshot, ler_snapshot, limitar_snapshots
+from leitura_paralela import criar_executor, executor_quebrado
+from distribuicao import PlanilhaEquipe, compactar_resultados, executar_distribuicao, nome_saida
+from motor_sc import COLUNAS_GERENCIADAS, fases_previstas
+from tarefas import ERRO, NA_FILA, ArquivoCopiado, FilaTarefas, chave_tarefa
 
 # --- 1. CONFIGURAÇÃO DA PÁGINA ---
 st.set_page_config(
@@ -11,173 +18,164 @@ st.set_page_config(
     layout="wide"
 )
 
-# --- 2. SUAS FUNÇÕES ORIGINAIS (COM MÍNIMAS ADAPTAÇÕES DE I/O) ---
-
-def executar_planilhas_py(arquivo_cji5, arquivo_srm):
-    """Contém a lógica EXATA do seu Planilhas.py."""
-    st.write("▶️ Etapa 1: Processando `Planilhas.py`...")
-    
-    df_cji5 = pd.read_excel(arquivo_cji5)
-    df_srm = pd.read_excel(arquivo_srm)
-    
-    df_cji5['Nº doc.de referência'] = df_cji5['Nº doc.de referência'].astype(str)
-    df_cji5 = df_cji5[df_cji5['Nº doc.de referência'].str.startswith('S', na=False)].copy()
-    if df_cji5.empty: 
-        st.warning("Etapa 1: Nenhuma SC encontrada no arquivo Cji5. O processo será interrompido.")
-        return pd.DataFrame()
-        
-    df_cji5['SC_ID_Key'] = df_cji5['Nº doc.de referência'].str.replace('S', '', n=1, regex=False).str.strip()
-    df_cji5['SC_ID_Key'] = pd.to_numeric(df_cji5['SC_ID_Key'], errors='coerce')
-    df_cji5.dropna(subset=['SC_ID_Key'], inplace=True)
-    df_cji5['SC_ID_Key'] = df_cji5['SC_ID_Key'].astype(int).astype(str)
-    
-    coluna_valor_correta = 'Valor/moed.transação'
-    df_cji5[coluna_valor_correta] = pd.to_numeric(df_cji5[coluna_valor_correta], errors='coerce').fillna(0)
-    
-    agg_funcs = {
-        'Material': lambda x: ';\n'.join(x.unique()),
-        'Denominação': lambda x: ';\n'.join(x.unique()),
-        'Quantidade total': lambda x: ';\n'.join(x.astype(str)), # CORRIGIDO
-        coluna_valor_correta: 'sum',
-        'Nº doc.de referência': 'first'
-    }
-    df_agrupado = df_cji5.groupby(['Definição do projeto', 'SC_ID_Key']).agg(agg_funcs).reset_index()
-    
-    if 'SC ID' not in df_srm.columns:
-        st.error("ERRO CRÍTICO: A coluna 'SC ID' não foi encontrada no arquivo DADOS_SRM.xlsx!")
-        return None
-    df_srm['SC_ID_Key'] = pd.to_numeric(df_srm['SC ID'], errors='coerce')
-    df_srm.dropna(subset=['SC_ID_Key'], inplace=True)
-    df_srm['SC_ID_Key'] = df_srm['SC_ID_Key'].astype(int).astype(str)
-    df_srm = df_srm.drop_duplicates(subset=['SC_ID_Key'], keep='first')
-    
-    df_final = pd.merge(df_agrupado,df_srm,on='SC_ID_Key',how='inner')
-    
-    if 'Definição do projeto' in df_final.columns: df_final.rename(columns={'Definição do projeto': 'atuação do projeto'}, inplace=True)
-    if coluna_valor_correta in df_final.columns: df_final.rename(columns={coluna_valor_correta: 'Valor Total'}, inplace=True)
-    
-    colunas_finais = ['atuação do projeto', 'SC ID', 'Material', 'Denominação', 'Quantidade total','Valor Total', 'Nº doc.de referência', 'Created On', 'SC Name','Next Approver', 'SC Approval status', 'Received on', 'Requester']
-    colunas_presentes = [col for col in colunas_finais if col in df_final.columns]
-    df_final = df_final[colunas_presentes]
-    
-    st.success("✅ `Planilhas.py` executado!")
-    return df_final
-
-
-def executar_lancamento_fim_py(df_lancamento, arquivo_lcp, arquivo_resumo):
-    """Contém a lógica EXATA do seu LançamentoFIM.py."""
-    st.write("▶️ Etapa 2: Processando `LançamentoFIM.py`...")
-    df_lcp = pd.read_excel(arquivo_lcp, sheet_name='Capex', header=3, dtype={'WBS': str})
-    
-    df_lcp.columns = df_lcp.columns.str.strip()
-    if 'columns' in df_lcp and df_lcp.columns.has_duplicates: df_lcp = df_lcp.loc[:, ~df_lcp.columns.duplicated()]
-    if not df_lancamento.empty:
-        df_lancamento.dropna(subset=['SC ID', 'atuação do projeto'], inplace=True)
-        df_lancamento['SC ID'] = df_lancamento['SC ID'].astype(str).str.strip()
-        df_lancamento['atuação do projeto'] = df_lancamento['atuação do projeto'].str.strip()
-        df_lancamento = df_lancamento[df_lancamento['SC ID'] != '']
-    
-    if 'WBS' in df_lcp.columns: df_lcp['WBS'] = df_lcp['WBS'].str.strip()
-    df_lcp_essencial = df_lcp[['WBS', 'PROJECT NAME']].drop_duplicates(subset=['WBS'])
-    df_lancamento_enriquecido = pd.merge(df_lancamento, df_lcp_essencial, left_on='atuação do projeto', right_on='WBS', how='left')
-    
-    if not df_lancamento_enriquecido.empty:
-        chaves_de_agrupamento = ['SC ID', 'atuação do projeto']
-        df_agrupado = df_lancamento_enriquecido.groupby(chaves_de_agrupamento).agg({'Denominação': lambda x: '\n'.join(x.dropna().astype(str).unique()),'SC Name': 'first', 'Created On': 'first', 'Requester': 'first', 'Valor Total': 'first', 'Next Approver': 'first', 'Received on': 'first','PROJECT NAME': 'first'}).reset_index()
+# --- 2. PONTE ENTRE O MOTOR E A TELA ---
+# A lógica das etapas fica em `motor_sc.py`; aqui só traduzimos as notificações para o Streamlit.
+
+NOTIFICADORES_STREAMLIT = {'info': st.write, 'sucesso': st.success, 'aviso': st.warning, 'erro': st.error}
+
+def notificar_streamlit(nivel, mensagem):
+    NOTIFICADORES_STREAMLIT.get(nivel, st.write)(mensagem)
+
+def mostrar_desempenho(medicoes):
+    """Painel recolhível com o tempo, as linhas e o pico de RSS (e o pico de memória da fase, se medido) de cada fase."""
+    with st.expander(f"⏱️ Desempenho ({medicoes.total_segundos:.2f} s)"):
+        st.dataframe(medicoes.tabela(), hide_index=True, use_container_width=True)
+
+@st.cache_resource
+def obter_cache_entradas():
+    """Um único cache de entradas por servidor, compartilhado entre as sessões."""
+    return CacheEntradas()
+
+def _executor_valido(executor):
+    """Um pool quebrado (um processo dele morreu) é encerrado e o `obter_executor_leituras` cria outro."""
+    if executor_quebrado(executor):
+        executor.shutdown(wait=False, cancel_futures=True)
+        return False
+    return True
+
+@st.cache_resource(validate=_executor_valido)
+def obter_executor_leituras():
+    """Pool de processos que lê as planilhas de entrada em paralelo, criado uma vez por servidor (e de novo se quebrar)."""
+    return criar_executor()
+
+@st.cache_resource
+def obter_fila_tarefas():
+    """Fila das execuções em segundo plano, compartilhada entre as sessões (e sobrevive aos reruns)."""
+    return FilaTarefas()
+
+
+# --- 3. EXECUÇÃO EM SEGUNDO PLANO ---
+# O botão só envia a tarefa; a página acompanha o progresso relendo a tarefa a cada INTERVALO_ATUALIZACAO segundos.
+
+INTERVALO_ATUALIZACAO = 1.0
+
+def separar_valores(texto):
+    return [valor.strip() for valor in texto.split(',') if valor.strip()]
+
+def processar_automacao(tarefa, arquivos, planilhas, cache_entradas, executor, modo_streaming, modo_delta):
+    """Corpo da tarefa (roda numa thread da fila, sem acesso à página): as duas etapas em todas as
+    planilhas de Gestão e os snapshots do modo delta.
+
+    Retorna (resultados, zip com todas as planilhas ou None se for uma só), ou None se a primeira etapa não gerou dados.
+    """
+    for planilha in planilhas:
+        # Uploads não têm pasta: o snapshot de cada planilha gerada fica no cache, com a assinatura das colunas gerenciadas
+        # dela no nome (editar STATUS ou comentários não muda a assinatura; editar as colunas gerenciadas, sim)
+        planilha.snapshot = ler_snapshot(caminho_snapshot_por_hash(assinatura_planilha(planilha.arquivo, COLUNAS_GERENCIADAS))) if modo_delta else None
+        if modo_streaming:
+            descritor, planilha.destino = tempfile.mkstemp(suffix='.xlsx')
+            os.close(descritor)
+            tarefa.arquivos_temporarios.append(planilha.destino)
+    try:
+        resultados = executar_distribuicao(arquivos['cji5'], arquivos['srm'], arquivos['lcp'], planilhas, tarefa.notificar, cache=cache_entradas,
+                                           medicoes=tarefa.medicoes, modo_delta=modo_delta, executor=executor)
+        if resultados is None:
+            return None
+        if modo_delta:
+            for resultado in resultados:
+                assinatura = assinatura_planilha(resultado.dados, COLUNAS_GERENCIADAS)
+                gravar_snapshot(resultado.relatorio.snapshot, caminho_snapshot_por_hash(assinatura), assinatura)
+            limitar_snapshots()
+        return resultados, compactar_resultados(resultados) if len(resultados) > 1 else None
+    finally:
+        tarefa.medicoes.gravar_log(streaming=modo_streaming, planilhas=len(planilhas))
+
+def mostrar_resultado(tarefa):
+    resultados, dados_zip = tarefa.resultado
+    st.success("🎉 Processo Concluído com Sucesso!")
+    if st.session_state.get('baloes') != tarefa.id:
+        st.session_state['baloes'] = tarefa.id
+        st.balloons()
+
+    if dados_zip is None:
+        mostrar_relatorio(resultados[0].relatorio)
+        baixar_planilha(resultados[0].dados, "Gestão_de_SC_em_aberto_ATUALIZADA.xlsx")
+        return
+    st.download_button(f"🗜️ Baixar as {len(resultados)} planilhas atualizadas (zip)", data=dados_zip, file_name="Gestões_de_SC_em_aberto_ATUALIZADAS.zip", mime="application/zip")
+    for indice, resultado in enumerate(resultados):
+        st.subheader(f"📄 {resultado.planilha.nome}")
+        st.caption(resultado.relatorio.resumo())
+        mostrar_relatorio(resultado.relatorio)
+        baixar_planilha(resultado.dados, nome_saida(resultado.planilha), indice)
+
+def mostrar_relatorio(relatorio):
+    if relatorio.mudancas is not None:
+        with st.expander(f"🔁 O que mudou desde o último processamento ({len(relatorio.mudancas.novas)} nova(s), {len(relatorio.mudancas.alteradas)} alterada(s), {len(relatorio.mudancas.desaparecidas)} saíram)"):
+            tabela_mudancas = relatorio.mudancas.tabela()
+            st.dataframe(tabela_mudancas, hide_index=True, use_container_width=True)
+            st.download_button("📥 Baixar lista de mudanças (CSV)", data=tabela_mudancas.to_csv(index=False).encode('utf-8-sig'), file_name="mudancas_desde_ultimo_processamento.csv", mime="text/csv", key=f"mudancas-{id(relatorio)}")
+
+    if relatorio.celulas_alteradas:
+        with st.expander(f"Alterações na planilha ({len(relatorio.celulas_alteradas)} célula(s))"):
+            st.dataframe(
+                pd.DataFrame(relatorio.celulas_alteradas, columns=['Linha', 'Coluna', 'Valor anterior', 'Valor novo']).astype({'Valor anterior': str, 'Valor novo': str}),
+                use_container_width=True
+            )
+
+def baixar_planilha(dados_finais_para_download, nome_arquivo, indice=0):
+    # No modo streaming a saída é um arquivo temporário, apagado quando a tarefa é descartada da fila.
+    # O st.download_button lê o arquivo inteiro para a memória do servidor: o streaming limita a memória
+    # na montagem da planilha, mas o download ainda ocupa o tamanho do arquivo gerado (já compactado).
+    arquivo_saida = open(dados_finais_para_download, 'rb') if isinstance(dados_finais_para_download, str) else None
+    try:
+        st.download_button(
+            label="📥 Baixar Planilha de Gestão FINAL",
+            data=arquivo_saida or dados_finais_para_download,
+            file_name=nome_arquivo,
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            key=f"planilha-{indice}"
+        )
+    finally:
+        if arquivo_saida is not None:
+            arquivo_saida.close()
+
+def mostrar_tarefa(tarefa):
+    """Mensagens do motor, progresso enquanto a tarefa roda e o resultado quando ela termina."""
+    st.header("3. Resultado")
+    for nivel, mensagem in list(tarefa.mensagens):
+        notificar_streamlit(nivel, mensagem)
+    if not tarefa.terminada:
+        texto = "Na fila, aguardando outra execução terminar..." if tarefa.situacao == NA_FILA else f"⏳ {tarefa.fase_atual or 'Iniciando...'}"
+        st.progress(tarefa.progresso, text=texto)
+        st.caption(f"Execução `{tarefa.id}`: o processamento continua no servidor mesmo se a página for recarregada.")
+        time.sleep(INTERVALO_ATUALIZACAO)
+        st.rerun()
+
+    if tarefa.situacao == ERRO:
+        st.error(f"❌ A automação falhou: {tarefa.erro}")
+    elif tarefa.resultado is None:
+        st.warning("A primeira etapa não gerou dados para lançamento. Verifique os arquivos de entrada.")
     else:
-        df_agrupado = pd.DataFrame()
-        
-    mapa_colunas = {'SC ID': 'SC', 'atuação do projeto': 'WBS', 'SC Name': 'DESCRIÇÃO','Denominação': 'CONTEÚDO', 'Created On': 'DATA CRIAÇÃO', 'Requester': 'REQUISITANTE','Valor Total': 'VALOR', 'Next Approver': 'PENDENTE COM','Received on': 'RECEBIDA EM', 'PROJECT NAME': 'PROJETO'}
-    df_atualizacao = df_agrupado.rename(columns=mapa_colunas)
-    
-    if not df_atualizacao.empty:
-        # Garante que as colunas de data sejam do tipo datetime
-        for col_data in ['DATA CRIAÇÃO', 'RECEBIDA EM']:
-            if col_data in df_atualizacao.columns:
-                df_atualizacao[col_data] = pd.to_datetime(df_atualizacao[col_data], errors='coerce')
-
-        df_atualizacao['SC'] = pd.to_numeric(df_atualizacao['SC'], errors='coerce').astype('Int64').astype(str)
-        df_atualizacao = df_atualizacao[df_atualizacao['SC'] != '<NA>']
-        
-    workbook = load_workbook(arquivo_resumo)
-    sheet = workbook.active
-    headers = [cell.value for cell in sheet[1]]
-    col_map = {name: i+1 for i, name in enumerate(headers)}
-    sc_col_num = col_map.get('SC'); wbs_col_num = col_map.get('WBS')
-    if not sc_col_num or not wbs_col_num: raise ValueError("Colunas 'SC' e 'WBS' devem existir.")
-    key_row_map = {}
-    for i in range(2, sheet.max_row + 1):
-        sc_val = str(sheet.cell(row=i, column=sc_col_num).value or '').replace('.0', '').strip()
-        wbs_val = str(sheet.cell(row=i, column=wbs_col_num).value or '').strip()
-        if sc_val and wbs_val: key_row_map[(sc_val, wbs_val)] = i
-        
-    colunas_gerenciadas = list(mapa_colunas.values())
-    for _, row_data in df_atualizacao.iterrows():
-        sc_id = str(row_data.get('SC')); wbs_id = str(row_data.get('WBS'))
-        chave_unica = (sc_id, wbs_id)
-        if chave_unica in key_row_map:
-            target_row = key_row_map[chave_unica]
-            for col_name in colunas_gerenciadas:
-                if col_name in col_map and col_name in row_data.index:
-                    target_col = col_map[col_name]
-                    sheet.cell(row=target_row, column=target_col).value = row_data[col_name]
-        else:
-            new_row_values = [row_data.get(header_name) for header_name in headers]
-            sheet.append(new_row_values)
-            
-    # Formatação final
-    header_font = Font(bold=True, color="FFFFFF"); header_fill = PatternFill(start_color="002D62", end_color="002D62", fill_type="solid"); borda_fina = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin')); alinhamento_central_sem_quebra = Alignment(horizontal='center', vertical='center'); alinhamento_central_com_quebra = Alignment(horizontal='center', vertical='center', wrap_text=True)
-    colunas_com_quebra = ['DESCRIÇÃO', 'CONTEÚDO']
-    sheet.row_dimensions[1].height = 25
-    for cell in sheet[1]: cell.font = header_font; cell.fill = header_fill; cell.border = borda_fina; cell.alignment = alinhamento_central_sem_quebra
-    last_data_row = sheet.max_row
-    for row in sheet.iter_rows(min_row=2, max_row=last_data_row):
-        for cell in row:
-            cell.border = borda_fina; header_da_celula = sheet.cell(row=1, column=cell.column).value
-            if header_da_celula in colunas_com_quebra: cell.alignment = alinhamento_central_com_quebra
-            else: cell.alignment = alinhamento_central_sem_quebra
-            
-    # Formatação de moeda
-    if 'VALOR' in col_map:
-        letra_col_valor = chr(ord('A') + col_map['VALOR'] - 1)
-        for cell in sheet[letra_col_valor][1:]:
-            if isinstance(cell.value, (int, float)): cell.number_format = 'R$ #,##0.00'
-            
-    # *** NOVA SEÇÃO - FORMATAÇÃO DE DATA ***
-    formato_data = 'DD/MM/YYYY'
-    colunas_data = ['DATA CRIAÇÃO', 'RECEBIDA EM']
-    for nome_coluna in colunas_data:
-        if nome_coluna in col_map:
-            letra_col_data = chr(ord('A') + col_map[nome_coluna] - 1)
-            # Itera pelas células da coluna, a partir da segunda linha
-            for cell in sheet[letra_col_data][1:]:
-                # Aplica o formato de data desejado
-                if cell.value: # Apenas se a célula não estiver vazia
-                    cell.number_format = formato_data
-
-    # Ajuste de largura das colunas
-    larguras = {'SC': 15, 'WBS': 25, 'PROJETO': 45, 'DESCRIÇÃO': 45, 'CONTEÚDO': 50, 'VALOR': 18, 'DATA CRIAÇÃO': 18, 'REQUISITANTE': 25, 'RECEBIDA EM': 18, 'PENDENTE COM': 25, 'STATUS': 15, 'OK': 10, 'COMENTARIO': 50, 'Complemento dos materiais': 50}
-    for col_name, width in larguras.items():
-        if col_name in col_map:
-            letra_col = chr(ord('A') + col_map[col_name] - 1)
-            sheet.column_dimensions[letra_col].width = width
-            
-    virtual_workbook = io.BytesIO()
-    workbook.save(virtual_workbook)
-    st.success("✅ `LançamentoFIM.py` executado!")
-    return virtual_workbook.getvalue()
-
-
-# --- 3. INTERFACE DO APLICATIVO ---
+        mostrar_resultado(tarefa)
+
+    cache_entradas = obter_cache_entradas()
+    if cache_entradas.ativo:
+        st.caption(f"♻️ {cache_entradas.resumo()}")
+    else:
+        st.caption("♻️ Cache de entradas desligado: o pacote `pyarrow` não está instalado (veja o requirements.txt).")
+    mostrar_desempenho(tarefa.medicoes)
+
+
+# --- 4. INTERFACE DO APLICATIVO ---
 st.title("🤖 Ferramenta de Automação de Lançamentos - FollowUP GY")
 st.markdown("---")
 
 st.header("1. Carregue TODOS os arquivos necessários")
-st.write("Por favor, forneça a planilha de Gestão que será atualizada e os 3 arquivos de dados do dia.")
+st.write("Por favor, forneça a planilha de Gestão que será atualizada (ou as de várias equipes) e os 3 arquivos de dados do dia.")
 
 col1, col2 = st.columns(2)
 with col1:
-    upload_gestao = st.file_uploader("1. Planilha de Gestão (a ser atualizada)", type="xlsx")
+    upload_gestao = st.file_uploader("1. Planilha(s) de Gestão (a ser atualizada)", type="xlsx", accept_multiple_files=True, help="Com várias planilhas (uma por equipe), os arquivos do dia são lidos uma vez só e todas são atualizadas juntas.")
     upload_cji5 = st.file_uploader("2. `resultado_cji5.xlsx`", type="xlsx")
 with col2:
     upload_srm = st.file_uploader("3. `DADOS_SRM.xlsx`", type="xlsx")
@@ -187,24 +185,37 @@ st.markdown("---")
 
 if upload_gestao and upload_cji5 and upload_srm and upload_lcp:
     st.header("2. Execute a Automação Completa")
+    modo_streaming = st.checkbox("Modo de baixo consumo de memória (para planilhas de Gestão muito grandes)", help="Reescreve a planilha em streaming, direto para um arquivo temporário. Valores, estilos, larguras, filtro e painéis congelados são mantidos; células mescladas e validações não são copiadas.")
+    modo_delta = st.checkbox("Aplicar só as SCs que mudaram desde o último processamento (modo delta)", help="Funciona quando as colunas preenchidas pelo processo (SC, WBS, descrição, valor...) estão como foram baixadas daqui no último processamento; edições em STATUS e comentários não atrapalham. Caso contrário todas as SCs são aplicadas.")
+    rotas = {}
+    if len(upload_gestao) > 1:
+        with st.expander("Regras de distribuição (opcional)"):
+            st.caption("Sem regra, a planilha recebe todas as SCs. Separe os valores por vírgula; com as duas regras, a SC precisa atender às duas.")
+            for upload in upload_gestao:
+                col_wbs, col_requisitantes = st.columns(2)
+                prefixos_wbs = col_wbs.text_input(f"Prefixos de WBS — {upload.name}", key=f"wbs-{upload.file_id}", placeholder="LCP-23, LCP-24")
+                requisitantes = col_requisitantes.text_input(f"Requisitantes — {upload.name}", key=f"requisitantes-{upload.file_id}")
+                rotas[upload.file_id] = (separar_valores(prefixos_wbs), separar_valores(requisitantes))
     if st.button("🚀 Gerar Relatório Final Atualizado"):
-        with st.spinner("Etapa 1: Executando lógica de `Planilhas.py`..."):
-            df_intermediario = executar_planilhas_py(upload_cji5, upload_srm)
-        
-        if not df_intermediario.empty:
-            with st.spinner("Etapa 2: Executando lógica de `LançamentoFIM.py`..."):
-                dados_finais_para_download = executar_lancamento_fim_py(df_intermediario, upload_lcp, upload_gestao)
-                
-                st.success("🎉 Processo Concluído com Sucesso!")
-                st.balloons()
-                
-                st.download_button(
-                    label="📥 Baixar Planilha de Gestão FINAL",
-                    data=dados_finais_para_download,
-                    file_name="Gestão_de_SC_em_aberto_ATUALIZADA.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-        else:
-            st.warning("A primeira etapa não gerou dados para lançamento. Verifique os arquivos de entrada.")
+        cache_entradas = obter_cache_entradas()
+        uploads = {'cji5': upload_cji5, 'srm': upload_srm, 'lcp': upload_lcp}
+        chave = chave_tarefa(*(cache_entradas.hash_arquivo(upload) for upload in [*uploads.values(), *upload_gestao]), [rotas.get(upload.file_id) for upload in upload_gestao], modo_streaming, modo_delta)
+        arquivos = {nome: ArquivoCopiado(upload) for nome, upload in uploads.items()}
+        planilhas = [PlanilhaEquipe(upload.name, ArquivoCopiado(upload), *rotas.get(upload.file_id, ([], []))) for upload in upload_gestao]
+        tarefa, nova = obter_fila_tarefas().enviar(chave, processar_automacao, arquivos, planilhas, cache_entradas, obter_executor_leituras(), modo_streaming, modo_delta,
+                                                   processo='app', fases_previstas=fases_previstas(modo_streaming, modo_delta, len(planilhas)))
+        if not nova:
+            st.toast("Já há uma execução com estes mesmos arquivos em andamento; acompanhando o progresso dela.")
+        st.query_params['tarefa'] = tarefa.id
 else:
-    st.info("Por favor, carregue todos os 4 arquivos para habilitar o botão de processamento.")
\ No newline at end of file
+    st.info("Por favor, carregue todos os 4 arquivos para habilitar o botão de processamento.")
+
+# O ID da tarefa fica na URL: recarregar a página ou reconectar volta a acompanhar a mesma execução
+id_tarefa = st.query_params.get('tarefa')
+if id_tarefa:
+    tarefa = obter_fila_tarefas().obter(id_tarefa)
+    if tarefa is None:
+        st.info("O resultado da execução anterior não está mais disponível. Gere o relatório novamente.")
+        del st.query_params['tarefa']
+    else:
+        mostrar_tarefa(tarefa)
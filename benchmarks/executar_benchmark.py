@@ -0,0 +1,170 @@
+"""Benchmark repetível do FollowUP-GY e da Avaliação de Fornecedores com dados sintéticos.
+
+Para cada escala gera (ou reaproveita) os dados de `gerar_dados.py` e mede, em
+várias repetições, as duas etapas do motor, o catálogo de projetos (a lista do
+seletor "Projeto*", que substituiu o `carregar_projetos` com leitura completa),
+a carga dos votos, a agregação do relatório e a partida do `Avaliacao.py`
+(o script rodado até o fim na tela de login e na página completa, cada um num
+interpretador novo, como num servidor recém-iniciado). Cada medição vem da
+`Instrumentacao`, então as fases internas das etapas também aparecem. O
+resultado é uma tabela com a mediana do tempo, a vazão (linhas/s) e o pico de
+memória, e as medições brutas são acrescentadas num arquivo JSON lines para
+comparar execuções.
+
+    python benchmarks/executar_benchmark.py --linhas 1000 10000 100000 --repeticoes 3
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+import votos_db
+from catalogo_projetos import descartar_catalogos, obter_catalogo
+from gerar_dados import ARQUIVOS, gerar_tudo
+from instrumentacao import Instrumentacao
+from leitura import MOTOR_PADRAO, MOTORES_LEITURA
+from motor_sc import executar_lancamento_fim_py, executar_planilhas_py
+
+
+ARQUIVO_RESULTADOS = Path('benchmarks/resultados.jsonl')
+# Primeira execução do Avaliacao.py num interpretador novo, com o AppTest do Streamlit (sem servidor nem navegador):
+# argv[1] é o script e argv[2] o session_state em JSON; termina com erro se o script levantar exceção
+CODIGO_PRIMEIRA_TELA = (
+    "import json, sys\n"
+    "from streamlit.testing.v1 import AppTest\n"
+    "app = AppTest.from_file(sys.argv[1], default_timeout=600)\n"
+    "for chave, valor in json.loads(sys.argv[2]).items():\n"
+    "    app.session_state[chave] = valor\n"
+    "app.run()\n"
+    "sys.exit(1 if app.exception else 0)\n"
+)
+
+
+def _sem_notificacao(nivel, mensagem):
+    pass
+
+
+def _pasta_da_escala(pasta_dados, linhas, avaliacoes):
+    """Gera os dados da escala só se a pasta ainda não tiver todos os arquivos."""
+    pasta = Path(pasta_dados) / f"{linhas}"
+    caminhos = {nome: pasta / arquivo for nome, arquivo in ARQUIVOS.items()}
+    if not all(caminho.exists() for caminho in caminhos.values()):
+        print(f"Gerando dados sintéticos com {linhas} linha(s) em '{pasta}'...")
+        caminhos = gerar_tudo(pasta, linhas, avaliacoes)
+    return caminhos
+
+
+def _renderizar_em_processo_novo(pasta, sessao):
+    """Roda o Avaliacao.py uma vez num interpretador novo, em `pasta`, com `sessao` no session_state."""
+    ambiente = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [str(RAIZ), os.environ.get('PYTHONPATH')]))}
+    subprocess.run([sys.executable, '-c', CODIGO_PRIMEIRA_TELA, str(RAIZ / 'Avaliacao.py'), json.dumps(sessao)], cwd=pasta, env=ambiente, check=True)
+
+
+def medir_partida_avaliacao(medicoes, caminhos):
+    """Tempo de partida do Avaliacao.py até a tela de login e até a página completa de um administrador.
+
+    O script roda numa pasta temporária com cópias do banco de votos e do BUSCAR_LCP sintéticos (os caminhos
+    dele são relativos), e o tempo inclui subir o interpretador, os imports e a execução do script até o fim.
+    """
+    if importlib.util.find_spec('streamlit') is None:
+        print("O streamlit não está instalado: a partida do Avaliacao.py não foi medida.")
+        return
+    with tempfile.TemporaryDirectory() as pasta_temporaria:
+        pasta = Path(pasta_temporaria)
+        shutil.copy(caminhos['votos_db'], pasta / 'votos.db')
+        shutil.copy(caminhos['lcp'], pasta / 'BUSCAR_LCP.xlsx')
+        if (RAIZ / 'assets').is_dir():
+            shutil.copytree(RAIZ / 'assets', pasta / 'assets')
+        with medicoes.etapa("Partida do Avaliacao.py: tela de login"):
+            _renderizar_em_processo_novo(pasta, {})
+        with medicoes.etapa("Partida do Avaliacao.py: página completa"):
+            _renderizar_em_processo_novo(pasta, {'user_name': 'BENCHMARK', 'is_admin': True})
+
+
+def medir_escala(caminhos, motor_leitura=None, streaming=False, medir_memoria=True):
+    """Uma repetição de todas as fases; devolve a `Instrumentacao` com as medições."""
+    medicoes = Instrumentacao('benchmark', medir_memoria=medir_memoria)
+    medir_partida_avaliacao(medicoes, caminhos)
+
+    df_intermediario = executar_planilhas_py(caminhos['cji5'], caminhos['srm'], _sem_notificacao, motor_leitura=motor_leitura, medicoes=medicoes)
+    descartar_catalogos()
+    executar_lancamento_fim_py(df_intermediario.copy(), caminhos['lcp'], caminhos['gestao'], _sem_notificacao, motor_leitura=motor_leitura, medicoes=medicoes)
+    if streaming:
+        with tempfile.TemporaryDirectory() as pasta_temporaria:
+            with medicoes.etapa("Etapa 2 (streaming)"):
+                executar_lancamento_fim_py(df_intermediario.copy(), caminhos['lcp'], caminhos['gestao'], _sem_notificacao, motor_leitura=motor_leitura, destino=Path(pasta_temporaria) / 'saida.xlsx', medicoes=medicoes)
+
+    descartar_catalogos()
+    with medicoes.etapa("Catálogo de projetos (carregar_projetos)") as medicao:
+        medicao.linhas = len(obter_catalogo(caminhos['lcp'], motor_leitura).projetos_lcp)
+
+    # Cópia do banco para que o WAL e os caches de uma repetição não favoreçam a seguinte
+    with tempfile.TemporaryDirectory() as pasta_temporaria:
+        caminho_banco = Path(pasta_temporaria) / 'votos.db'
+        shutil.copy(caminhos['votos_db'], caminho_banco)
+        repositorio = votos_db.RepositorioVotos(caminho_banco)
+        with medicoes.etapa("Carga dos votos") as medicao:
+            medicao.linhas = len(repositorio.obter())
+        with medicoes.etapa("Agregação do relatório") as medicao:
+            df_agregados, dimensoes = repositorio.obter_agregados()
+            media = votos_db.medias_por_categoria(df_agregados, dimensoes)
+            medicao.linhas = int(df_agregados['linhas'].sum())
+        with medicoes.etapa("Agregação do relatório (um projeto)") as medicao:
+            projeto = df_agregados['projeto'].iloc[0] if not df_agregados.empty else None
+            media = votos_db.medias_por_categoria(df_agregados, dimensoes, projeto)
+            medicao.linhas = len(media)
+    return medicoes
+
+
+def resumir(registros):
+    """Mediana do tempo e maiores picos de RSS e de memória por (escala, fase), com a vazão em linhas/s."""
+    df = pd.DataFrame(registros)
+    resumo = df.groupby(['escala', 'ordem', 'nome'], sort=True).agg(linhas=('linhas', 'max'), segundos=('segundos', 'median'), pico_rss_mb=('pico_rss_mb', 'max'), pico_memoria_mb=('pico_memoria_mb', 'max')).reset_index()
+    resumo['linhas_por_segundo'] = (resumo['linhas'] / resumo['segundos'].where(resumo['segundos'] > 0)).round(0)
+    return resumo.drop(columns='ordem')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o desempenho das etapas com dados sintéticos.")
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1000, 10000], help="Escalas (linhas do Cji5) a medir, ex.: 1000 10000 100000 1000000")
+    parser.add_argument('--avaliacoes', type=int, help="Avaliações de fornecedores por escala (padrão: linhas / 20)")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--dados', default='benchmarks/dados', help="Pasta dos dados sintéticos (reaproveitados entre execuções)")
+    parser.add_argument('--saida', default=str(ARQUIVO_RESULTADOS), help="Arquivo JSON lines onde as medições brutas são acrescentadas")
+    parser.add_argument('--motor-leitura', choices=MOTORES_LEITURA, help="Motor de leitura dos xlsx (padrão: calamine se instalado, senão openpyxl)")
+    parser.add_argument('--streaming', action='store_true', help="Também mede a Etapa 2 com exportação em streaming")
+    parser.add_argument('--sem-memoria', action='store_true', help="Não mede memória (o tracemalloc deixa as fases mais lentas)")
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    Path(args.saida).parent.mkdir(parents=True, exist_ok=True)
+    contexto = {'python': platform.python_version(), 'pandas': pd.__version__, 'motor_leitura': args.motor_leitura or MOTOR_PADRAO, 'medir_memoria': not args.sem_memoria}
+    registros = []
+    for linhas in args.linhas:
+        caminhos = _pasta_da_escala(args.dados, linhas, args.avaliacoes)
+        for repeticao in range(1, args.repeticoes + 1):
+            medicoes = medir_escala(caminhos, args.motor_leitura, args.streaming, not args.sem_memoria)
+            medicoes.gravar_log(args.saida, escala=linhas, repeticao=repeticao, **contexto)
+            registros += [{'escala': linhas, 'ordem': ordem, 'nome': '    ' * medicao.nivel + medicao.nome, 'segundos': medicao.segundos, 'linhas': medicao.linhas, 'pico_rss_mb': medicao.pico_rss_mb, 'pico_memoria_mb': medicao.pico_memoria_mb}
+                          for ordem, medicao in enumerate(medicoes.medicoes)]
+            print(f"Escala {linhas}: repetição {repeticao}/{args.repeticoes} em {medicoes.total_segundos:.2f} s")
+
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(resumir(registros).to_string(index=False))
+    print(f"Medições acrescentadas em '{args.saida}'.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
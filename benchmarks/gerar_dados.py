@@ -0,0 +1,158 @@
+"""Gera dados sintéticos para medir o desempenho sem as exportações reais do SAP.
+
+Cria, numa pasta, as quatro planilhas do FollowUP-GY (resultado_cji5, DADOS_SRM,
+BUSCAR_LCP com as abas Capex e AME com o cabeçalho na 4ª linha, e a planilha de
+Gestão) e um histórico de votos da Avaliação de Fornecedores (votos.csv no
+formato antigo e o votos.db importado dele). As proporções imitam os arquivos
+reais: cerca de 4 linhas do Cji5 por SC, parte das SCs já lançadas na Gestão
+(algumas com valores desatualizados) e SCs na Gestão que sumiram do SRM.
+
+    python benchmarks/gerar_dados.py --linhas 100000 --destino benchmarks/dados/100k
+"""
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import Workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import votos_db
+
+
+ARQUIVOS = {'cji5': 'resultado_cji5.xlsx', 'srm': 'DADOS_SRM.xlsx', 'lcp': 'BUSCAR_LCP.xlsx', 'gestao': 'Gestao.xlsx', 'votos_csv': 'votos.csv', 'votos_db': 'votos.db'}
+
+COLUNAS_GESTAO = ['SC', 'ÁREA DE COMPRAS', 'WBS', 'PROJETO', 'DESCRIÇÃO', 'CONTEÚDO', 'DATA CRIAÇÃO', 'DIAS EM ABERTO', 'DEP.', 'REQUISITANTE', 'VALOR', 'COMPRADOR', 'PENDENTE COM', 'RECEBIDA EM', 'COMENTÁRIOS', 'COMENTÁRIOS ADICIONAIS']
+MATERIAIS = [f"MT{10000000 + i}" for i in range(200)]
+DENOMINACOES = ['CABO FLEXIVEL 2,5MM', 'PARAFUSO SEXTAVADO M8', 'SERVICO DE MONTAGEM ELETRICA', 'PAINEL ELETRICO', 'INVERSOR DE FREQUENCIA', 'ENGENHARIA, AGRONOMIA, CONGENERES', 'LOCACAO DE GUINDASTE', 'TUBO ACO CARBONO 2"']
+PESSOAS = ['LUCAS PEREIRA', 'MAICON SILVA', 'ANA SOUZA', 'CARLOS LIMA', 'FERNANDA ROCHA', 'JOAO MARTINS', 'PATRICIA ALVES', 'RAFAEL COSTA']
+STATUS_SRM = ['Awaiting Approval', 'Approved', 'In Process']
+PERGUNTAS_SINTETICAS = {'SAFETY': ['1.1', '1.2', '1.3', '1.4', '1.5'], 'QUALITY': ['2.1', '2.2', '2.3', '2.4', '2.5'], 'PEOPLE': ['3.1', '3.2', '3.3'], 'DOCUMENTATION': ['4.1', '4.2', '4.3']}
+OPCOES_VOTO = ['1', '2', '3', '4', '5', 'N/A']
+
+
+def _gravar_planilha(caminho, abas):
+    """Grava em modo write-only: `abas` é uma lista de (título, linhas)."""
+    workbook = Workbook(write_only=True)
+    for titulo, linhas in abas:
+        sheet = workbook.create_sheet(titulo)
+        for linha in linhas:
+            sheet.append(linha)
+    workbook.save(caminho)
+
+
+def _data(rng, inicio=datetime(2023, 1, 1), dias=900):
+    return inicio + timedelta(days=rng.randrange(dias), seconds=rng.randrange(86400))
+
+
+def gerar_entradas(destino, linhas, semente=42):
+    """Gera as quatro planilhas com `linhas` linhas no Cji5 e retorna o dicionário de caminhos."""
+    rng = random.Random(semente)
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    caminhos = {nome: destino / arquivo for nome, arquivo in ARQUIVOS.items()}
+
+    n_scs = max(linhas // 4, 10)
+    n_wbs = max(linhas // 500, 20)
+    scs = [130000000 + i * 7 for i in range(n_scs)]
+    lista_wbs = [f"LCP-{230000 + i}" for i in range(n_wbs)]
+    wbs_da_sc = {sc: rng.choice(lista_wbs) for sc in scs}
+
+    # Cji5: linhas de SC ("S...") misturadas com pedidos ("P...") e colunas que o processo ignora
+    def linhas_cji5():
+        yield ['Definição do projeto', 'Objeto', 'Nº doc.de referência', 'Material', 'Denominação', 'Quantidade total', 'Valor/moed.transação', 'Centro de custo', 'Data de lançamento']
+        for _ in range(linhas):
+            sc = rng.choice(scs)
+            referencia = f"S{sc}" if rng.random() < 0.85 else f"P{sc + 1}"
+            yield [wbs_da_sc[sc], f"PR {wbs_da_sc[sc]}", referencia, rng.choice(MATERIAIS), rng.choice(DENOMINACOES), rng.choice([1, 2, 5, 10, 0.5]), round(rng.uniform(10, 50000), 2), '5999000000', _data(rng)]
+    _gravar_planilha(caminhos['cji5'], [('Sheet1', linhas_cji5())])
+
+    # SRM: ~90% das SCs do Cji5, algumas em duplicidade
+    def linhas_srm():
+        yield ['SC ID', 'Created On', 'SC Name', 'Next Approver', 'SC Approval status', 'Received on', 'Requester', 'Company Code', 'Currency']
+        for sc in scs:
+            if rng.random() < 0.9:
+                linha = [sc, _data(rng).strftime('%d.%m.%Y'), f"{wbs_da_sc[sc]} - SC {sc}", rng.choice(PESSOAS), rng.choice(STATUS_SRM), _data(rng).strftime('%d.%m.%Y %H:%M:%S'), rng.choice(PESSOAS), 'BR01', 'BRL']
+                yield linha
+                if rng.random() < 0.02:
+                    yield linha
+    _gravar_planilha(caminhos['srm'], [('Sheet1', linhas_srm())])
+
+    # BUSCAR_LCP: três linhas de título antes do cabeçalho; WBS com espaço no fim, como no arquivo real
+    def linhas_lcp(prefixo, fracao):
+        for _ in range(3):
+            yield ['BUSCAR LCP - relatório gerado automaticamente']
+        yield ['ID', 'WBS', 'PROJECT NAME', 'Budget', 'Owner']
+        for i, wbs in enumerate(lista_wbs):
+            if rng.random() < fracao:
+                yield [i, wbs + ' ', f"{prefixo} {wbs}", rng.randrange(10000, 5000000), rng.choice(PESSOAS)]
+        for i in range(n_wbs // 10):
+            yield [n_wbs + i, f"ZZZ-{i}", f"Projeto fora do LCP {i}", 0, None]
+    _gravar_planilha(caminhos['lcp'], [('Capex', linhas_lcp('Projeto', 1.0)), ('AME - Quarterly', linhas_lcp('AME', 0.3))])
+
+    # Gestão: metade das SCs já lançadas (10% delas com valor/pendência antigos) e SCs que já saíram do SRM
+    def linhas_gestao():
+        yield COLUNAS_GESTAO
+        linha_planilha = 2
+        lancadas = rng.sample(scs, n_scs // 2) + [sc + 3 for sc in rng.sample(scs, max(n_scs // 20, 1))]
+        for sc in lancadas:
+            wbs = wbs_da_sc.get(sc, rng.choice(lista_wbs))
+            desatualizada = rng.random() < 0.1
+            yield [str(sc), 'AMERICANA', wbs, f"Projeto {wbs}", f"{wbs} - SC {sc}", rng.choice(DENOMINACOES), _data(rng), f'=IF(M{linha_planilha}<>"OK",TODAY()-G{linha_planilha},"OK")',
+                   'Engenharia', rng.choice(PESSOAS), 0 if desatualizada else round(rng.uniform(10, 50000), 2), 'WADSON SIMOES', 'OK' if desatualizada else rng.choice(PESSOAS),
+                   _data(rng).strftime('%d.%m.%Y %H:%M:%S'), f"{_data(rng):%d/%m} - Aguardando retorno do fornecedor", None]
+            linha_planilha += 1
+    _gravar_planilha(caminhos['gestao'], [('Compras', linhas_gestao()), ('SC deletadas', iter([COLUNAS_GESTAO]))])
+    return caminhos
+
+
+def gerar_votos(destino, avaliacoes, semente=42):
+    """Gera `avaliacoes` avaliações (16 votos cada) em votos.csv e importa para um votos.db novo."""
+    rng = random.Random(semente)
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    caminho_csv, caminho_banco = destino / ARQUIVOS['votos_csv'], destino / ARQUIVOS['votos_db']
+
+    usuarios = [f"USUARIO {i}" for i in range(max(avaliacoes // 20, 5))]
+    projetos = [f"LCP-{230000 + i} - Projeto LCP-{230000 + i}" for i in range(max(avaliacoes // 10, 10))]
+    empresas = [f"FORNECEDOR {i} LTDA" for i in range(43)]
+    vistos, linhas = set(), []
+    while len(vistos) < min(avaliacoes, len(usuarios) * len(projetos) * len(empresas)):
+        chave = (rng.choice(usuarios), rng.choice(projetos), rng.choice(empresas))
+        if chave in vistos:
+            continue
+        vistos.add(chave)
+        for categoria, perguntas in PERGUNTAS_SINTETICAS.items():
+            for pid in perguntas:
+                linhas.append((*chave, categoria, pid, f"Pergunta {pid}", rng.choices(OPCOES_VOTO, weights=[1, 2, 4, 4, 2, 1])[0]))
+    pd.DataFrame(linhas, columns=votos_db.COLUNAS_VOTOS).to_csv(caminho_csv, index=False)
+
+    for sufixo in ('', '-wal', '-shm'):
+        Path(f"{caminho_banco}{sufixo}").unlink(missing_ok=True)
+    votos_db.importar_csv(caminho_banco, caminho_csv)
+    return {'votos_csv': caminho_csv, 'votos_db': caminho_banco}
+
+
+def gerar_tudo(destino, linhas, avaliacoes=None, semente=42):
+    """Planilhas e votos numa pasta; por padrão uma avaliação para cada 20 linhas do Cji5."""
+    caminhos = gerar_entradas(destino, linhas, semente)
+    caminhos.update(gerar_votos(destino, avaliacoes if avaliacoes is not None else max(linhas // 20, 50), semente))
+    return caminhos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera planilhas e votos sintéticos para os benchmarks.")
+    parser.add_argument('--linhas', type=int, default=10000, help="Linhas do resultado_cji5.xlsx (as outras planilhas crescem na mesma proporção)")
+    parser.add_argument('--avaliacoes', type=int, help="Avaliações de fornecedores (padrão: linhas / 20)")
+    parser.add_argument('--destino', default='benchmarks/dados', help="Pasta onde os arquivos são gravados")
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args(argv)
+    for nome, caminho in gerar_tudo(args.destino, args.linhas, args.avaliacoes, args.semente).items():
+        print(f"{nome}: {caminho}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Cache local, endereçado por conteúdo, das planilhas de entrada já processadas.
+
+Cada arquivo é identificado pelo hash SHA-256 dos seus bytes: reenviar o mesmo
+resultado_cji5.xlsx, DADOS_SRM.xlsx ou BUSCAR_LCP.xlsx carrega o DataFrame já
+pronto em vez de reprocessar o xlsx. Os DataFrames são gravados em Parquet
+(requer `pyarrow`, listado no requirements.txt; sem ele o cache fica
+desligado e o app avisa); quando uma coluna mistura tipos que o Parquet não
+aceita, o DataFrame é gravado em pickle para não mudar o resultado. O diretório tem um
+limite de tamanho e os arquivos menos usados recentemente são apagados primeiro.
+"""
+import hashlib
+import importlib.util
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+
+DIRETORIO_CACHE = Path('.cache_followup')
+LIMITE_CACHE_BYTES = 512 * 1024 * 1024
+# Mude a versão quando a leitura ou a agregação mudarem, para invalidar o que já está gravado
+VERSAO_CACHE = 2
+
+PYARROW_DISPONIVEL = importlib.util.find_spec('pyarrow') is not None
+# Hashes de uploads memorizados (os mais antigos são esquecidos)
+LIMITE_HASHES = 128
+
+
+def hash_conteudo(arquivo):
+    """SHA-256 dos bytes de um caminho, de um arquivo enviado (objeto com `getvalue`/`read`) ou dos próprios bytes."""
+    if isinstance(arquivo, bytes):
+        dados = arquivo
+    elif hasattr(arquivo, 'getvalue'):
+        dados = arquivo.getvalue()
+    elif hasattr(arquivo, 'read'):
+        arquivo.seek(0)
+        dados = arquivo.read()
+        arquivo.seek(0)
+    else:
+        dados = Path(arquivo).read_bytes()
+    return hashlib.sha256(dados).hexdigest()
+
+
+class CacheEntradas:
+    """Guarda DataFrames em disco por chave, com contadores de acertos e faltas e remoção LRU."""
+
+    def __init__(self, diretorio=DIRETORIO_CACHE, limite_bytes=LIMITE_CACHE_BYTES):
+        self.diretorio = Path(diretorio)
+        self.limite_bytes = limite_bytes
+        self.ativo = PYARROW_DISPONIVEL
+        self.acertos = 0
+        self.faltas = 0
+        self._hashes = OrderedDict()
+        self._lock_hashes = threading.Lock()
+        # O mesmo cache é usado pelas threads da fila de tarefas e pelas sessões do Streamlit
+        self._lock_contadores = threading.Lock()
+
+    def chave(self, *partes):
+        """Monta uma chave a partir de textos e/ou arquivos (arquivos entram pelo hash do conteúdo)."""
+        textos = [f"v{VERSAO_CACHE}"]
+        for parte in partes:
+            textos.append(parte if isinstance(parte, str) or parte is None else self.hash_arquivo(parte))
+        return hashlib.sha256('|'.join(str(texto) for texto in textos).encode()).hexdigest()
+
+    def hash_arquivo(self, arquivo):
+        # Uploads do Streamlit não mudam de conteúdo para o mesmo file_id, então o hash é memorizado
+        file_id = getattr(arquivo, 'file_id', None)
+        if file_id is None:
+            return hash_conteudo(arquivo)
+        chave = (file_id, getattr(arquivo, 'size', None))
+        with self._lock_hashes:
+            if chave in self._hashes:
+                self._hashes.move_to_end(chave)
+                return self._hashes[chave]
+        hash_arquivo = hash_conteudo(arquivo)
+        with self._lock_hashes:
+            self._hashes[chave] = hash_arquivo
+            while len(self._hashes) > LIMITE_HASHES:
+                self._hashes.popitem(last=False)
+        return hash_arquivo
+
+    def _caminhos(self, chave):
+        return self.diretorio / f"{chave}.parquet", self.diretorio / f"{chave}.pkl"
+
+    def contem(self, chave):
+        """Se há um DataFrame gravado para `chave` (sem lê-lo nem contar acerto ou falta)."""
+        return self.ativo and any(caminho.exists() for caminho in self._caminhos(chave))
+
+    def obter(self, chave):
+        """DataFrame gravado para `chave` ou None; conta um acerto ou uma falta."""
+        if self.ativo:
+            for caminho in self._caminhos(chave):
+                try:
+                    df = pd.read_parquet(caminho) if caminho.suffix == '.parquet' else pd.read_pickle(caminho)
+                    os.utime(caminho)
+                except FileNotFoundError:
+                    # Não gravado ou apagado agora mesmo pela limpeza de outra thread: conta como falta
+                    continue
+                self._contar(acerto=True)
+                return df
+        self._contar(acerto=False)
+        return None
+
+    def _contar(self, acerto):
+        with self._lock_contadores:
+            if acerto:
+                self.acertos += 1
+            else:
+                self.faltas += 1
+
+    def gravar(self, chave, df):
+        if not self.ativo:
+            return
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        caminho_parquet, caminho_pickle = self._caminhos(chave)
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+        os.close(descritor)
+        try:
+            try:
+                df.to_parquet(temporario, index=False)
+                destino = caminho_parquet
+            except (TypeError, ValueError):
+                # Colunas com tipos misturados (ex.: textos e datas) não cabem num schema Arrow
+                df.to_pickle(temporario)
+                destino = caminho_pickle
+            os.replace(temporario, destino)
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+        self._limitar_tamanho()
+
+    def carregar(self, chave, ler):
+        """Devolve o DataFrame de `chave`; se não estiver gravado, chama `ler()` e grava o resultado."""
+        df = self.obter(chave)
+        if df is None:
+            df = ler()
+            if df is not None:
+                self.gravar(chave, df)
+        return df
+
+    def _limitar_tamanho(self):
+        arquivos = []
+        for caminho in self.diretorio.glob('*'):
+            if caminho.suffix not in ('.parquet', '.pkl'):
+                continue
+            try:
+                estado = caminho.stat()
+            except FileNotFoundError:
+                # Apagado por outra limpeza entre o glob e o stat
+                continue
+            arquivos.append((estado.st_mtime, estado.st_size, caminho))
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in sorted(arquivos, key=lambda item: item[0]):
+            if total <= self.limite_bytes:
+                break
+            caminho.unlink(missing_ok=True)
+            total -= tamanho
+
+    def resumo(self):
+        return f"Cache de entradas: {self.acertos} acerto(s), {self.faltas} falta(s)"
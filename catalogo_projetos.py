@@ -0,0 +1,192 @@
+"""Catálogo de projetos do BUSCAR_LCP.xlsx, compartilhado pelos dois aplicativos.
+
+Só as colunas WBS e PROJECT NAME são lidas (via `leitura.ler_lcp`), e cada aba
+é lida no máximo uma vez por versão do arquivo. Para um caminho em disco a
+versão é conferida pela data de modificação e pelo tamanho; se eles mudarem, o
+hash do conteúdo decide se o arquivo mudou de fato. O catálogo também serve a
+tabela WBS → PROJECT NAME da Etapa 2 e a busca do seletor "Projeto*".
+"""
+import bisect
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+from cache_entradas import hash_conteudo
+from leitura import MOTOR_PADRAO, ler_lcp
+
+
+ABA_CAPEX = 'Capex'
+ABAS_PROJETOS = ('Capex', 'AME - Quarterly')
+PREFIXO_PROJETOS = 'LCP'
+SEPARADOR_PROJETO = ' - '
+# Quantas versões de arquivo ficam em memória ao mesmo tempo
+LIMITE_CATALOGOS = 8
+
+
+class CatalogoProjetos:
+    """Projetos de uma versão do BUSCAR_LCP.xlsx; as abas são lidas sob demanda.
+
+    Com `referencia_fraca`, um arquivo enviado não é mantido vivo pelo catálogo: ele só pode ler
+    as abas enquanto quem o enviou ainda tem o arquivo (ver `vincular`).
+    """
+
+    def __init__(self, arquivo, hash_arquivo, motor=None, cache=None, referencia_fraca=False):
+        self._arquivo = None
+        self.vincular(arquivo, referencia_fraca)
+        self.hash_arquivo = hash_arquivo
+        self.motor = motor or MOTOR_PADRAO
+        self.cache = cache
+        self._abas = {}
+        self._lock = threading.Lock()
+        self._projetos = None
+        self._indice = None
+
+    def vincular(self, arquivo, referencia_fraca=False):
+        """Passa a ler as abas de `arquivo` (outro upload com o mesmo conteúdo, por exemplo)."""
+        self._arquivo = weakref.ref(arquivo) if referencia_fraca and not isinstance(arquivo, (str, Path)) else arquivo
+
+    @property
+    def arquivo(self):
+        if isinstance(self._arquivo, weakref.ref):
+            arquivo = self._arquivo()
+            if arquivo is None:
+                raise RuntimeError("O arquivo enviado deste catálogo não existe mais; chame `obter_catalogo` com o arquivo atual.")
+            return arquivo
+        return self._arquivo
+
+    def _chave_cache(self, nome):
+        return self.cache.chave(f'lcp-{nome}', self.motor, self.hash_arquivo)
+
+    def precisa_ler(self, nome):
+        """Se a aba ainda não está em memória nem no cache em disco (ou seja, se `aba` vai ler o xlsx)."""
+        return nome not in self._abas and (self.cache is None or not self.cache.contem(self._chave_cache(nome)))
+
+    def aba(self, nome, ler=None):
+        """WBS e PROJECT NAME de uma aba (colunas sem espaços nas pontas e sem duplicatas).
+
+        `ler` substitui a leitura do xlsx quando a aba já está sendo lida em outro lugar (ex.: em paralelo).
+        """
+        with self._lock:
+            if nome not in self._abas:
+                ler = ler or (lambda: ler_lcp(self.arquivo, nome, self.motor))
+                if self.cache is None:
+                    df = ler()
+                else:
+                    df = self.cache.carregar(self._chave_cache(nome), ler)
+                df.columns = df.columns.str.strip()
+                if df.columns.has_duplicates: df = df.loc[:, ~df.columns.duplicated()]
+                self._abas[nome] = df
+            return self._abas[nome]
+
+    def nomes_por_wbs(self, aba=ABA_CAPEX, ler=None):
+        """Tabela WBS → PROJECT NAME usada para enriquecer a Etapa 2 (primeira ocorrência de cada WBS)."""
+        df = self.aba(aba, ler).copy()
+        if 'WBS' in df.columns: df['WBS'] = df['WBS'].str.strip()
+        return df[['WBS', 'PROJECT NAME']].drop_duplicates(subset=['WBS'])
+
+    @property
+    def projetos_lcp(self):
+        """Lista ordenada e sem repetição de "WBS - PROJECT NAME" dos projetos LCP das duas abas."""
+        if self._projetos is None:
+            projetos = []
+            for nome in ABAS_PROJETOS:
+                df = self.aba(nome)
+                if 'WBS' in df.columns and 'PROJECT NAME' in df.columns:
+                    df = df.dropna(subset=['WBS', 'PROJECT NAME'])
+                    projetos += (df['WBS'].astype(str) + SEPARADOR_PROJETO + df['PROJECT NAME'].astype(str)).tolist()
+            self._projetos = sorted(set(proj for proj in projetos if proj.strip().startswith(PREFIXO_PROJETOS)))
+        return self._projetos
+
+    def _montar_indice(self):
+        minusculas = [proj.lower() for proj in self.projetos_lcp]
+        ordem_prefixo = sorted(range(len(minusculas)), key=minusculas.__getitem__)
+        inicios, posicao = [], 0
+        for texto in minusculas:
+            inicios.append(posicao)
+            posicao += len(texto) + 1
+        # Prefixo: busca binária nas chaves ordenadas; trecho: uma única varredura do texto concatenado
+        self._indice = ([minusculas[i] for i in ordem_prefixo], ordem_prefixo, inicios, '\n'.join(minusculas))
+
+    def buscar(self, termo, limite=None):
+        """Projetos que contêm `termo` (sem diferenciar maiúsculas): os que começam com ele vêm primeiro."""
+        termo = (termo or '').strip().lower()
+        if not termo:
+            return self.projetos_lcp[:limite]
+        if self._indice is None:
+            self._montar_indice()
+        chaves, ordem_prefixo, inicios, texto = self._indice
+
+        primeiro = bisect.bisect_left(chaves, termo)
+        ultimo = bisect.bisect_left(chaves, termo + '\uffff', lo=primeiro)
+        encontrados = sorted(ordem_prefixo[primeiro:ultimo])
+        ja_incluidos = set(encontrados)
+        for ocorrencia in re.finditer(re.escape(termo), texto):
+            indice = bisect.bisect_right(inicios, ocorrencia.start()) - 1
+            if indice not in ja_incluidos:
+                ja_incluidos.add(indice)
+                encontrados.append(indice)
+            if limite is not None and len(encontrados) >= limite:
+                break
+        return [self.projetos_lcp[i] for i in encontrados[:limite]]
+
+
+# --- CATÁLOGOS EM MEMÓRIA ---
+# Chave: caminho do arquivo (ou hash do conteúdo, para uploads) e motor de leitura. Os uploads ficam só com
+# referência fraca: o catálogo guardado não segura o buffer do arquivo enviado.
+_catalogos = OrderedDict()
+_lock_catalogos = threading.Lock()
+
+
+def descartar_catalogos():
+    """Esquece os catálogos em memória (a próxima chamada relê o arquivo ou o cache em disco)."""
+    with _lock_catalogos:
+        _catalogos.clear()
+
+
+def _assinatura(caminho):
+    estado = Path(caminho).stat()
+    return estado.st_mtime_ns, estado.st_size
+
+
+def obter_catalogo(arquivo, motor=None, cache=None):
+    """Catálogo da versão atual de `arquivo` (caminho ou arquivo enviado).
+
+    Para caminhos, o arquivo só é relido quando data/tamanho mudam e o hash do
+    conteúdo também; uploads são identificados pelo hash. `cache` (um
+    `CacheEntradas`) permite reaproveitar as abas já lidas entre processos.
+    Levanta FileNotFoundError se o caminho não existir.
+    """
+    motor = motor or MOTOR_PADRAO
+    eh_caminho = isinstance(arquivo, (str, Path))
+    with _lock_catalogos:
+        if eh_caminho:
+            assinatura = _assinatura(arquivo)
+            chave = (str(Path(arquivo).resolve()), motor)
+            registro = _catalogos.get(chave)
+            if registro is not None and registro[0] == assinatura:
+                _catalogos.move_to_end(chave)
+                return registro[1]
+            hash_arquivo = hash_conteudo(arquivo)
+            if registro is not None and registro[1].hash_arquivo == hash_arquivo:
+                # Arquivo só "tocado" (copiado/salvo sem mudanças): mantém o que já foi lido
+                catalogo = registro[1]
+            else:
+                catalogo = CatalogoProjetos(arquivo, hash_arquivo, motor, cache)
+        else:
+            hash_arquivo = cache.hash_arquivo(arquivo) if cache is not None else hash_conteudo(arquivo)
+            assinatura = None
+            chave = (hash_arquivo, motor)
+            registro = _catalogos.get(chave)
+            if registro is not None:
+                catalogo = registro[1]
+                catalogo.vincular(arquivo, referencia_fraca=True)
+            else:
+                catalogo = CatalogoProjetos(arquivo, hash_arquivo, motor, cache, referencia_fraca=True)
+
+        _catalogos[chave] = (assinatura, catalogo)
+        _catalogos.move_to_end(chave)
+        while len(_catalogos) > LIMITE_CATALOGOS:
+            _catalogos.popitem(last=False)
+        return catalogo
@@ -0,0 +1,34 @@
+"""Chaves SC e WBS normalizadas uma vez só, em tipos compactos.
+
+SC vira inteiro (`Int64` enquanto pode haver valores inválidos, `int64` depois
+de descartá-los) e WBS vira texto categórico sem espaços nas pontas. As junções,
+os agrupamentos e a busca das linhas na planilha de Gestão usam essas chaves;
+o SC só volta a ser texto na hora de ser escrito na planilha (`sc_como_texto`).
+
+Aceita o que aparece nos arquivos: números (inclusive float, como o Excel
+devolve '130000000.0'), texto com espaços e, no Cji5, o prefixo 'S' do Nº doc.
+de referência. O que não for um número inteiro vira <NA>.
+"""
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+
+def normalizar_sc(serie, prefixo=None):
+    """SC IDs como `Int64`; `prefixo` (ex.: 'S' no Cji5) é removido do começo do texto."""
+    if not is_numeric_dtype(serie):
+        texto = serie.astype(str).str.strip()
+        if prefixo:
+            texto = texto.str.removeprefix(prefixo).str.strip()
+        serie = texto
+    numeros = pd.to_numeric(serie, errors='coerce')
+    return numeros.where(numeros % 1 == 0).astype('Int64')
+
+
+def normalizar_wbs(serie):
+    """Códigos WBS como categoria, sem espaços nas pontas (valores vazios continuam vazios)."""
+    return serie.astype(str).where(serie.notna()).str.strip().astype('category')
+
+
+def sc_como_texto(serie):
+    """SC no formato gravado na coluna SC da planilha de Gestão (texto, sem '.0')."""
+    return serie.astype('Int64').astype(str).where(serie.notna())
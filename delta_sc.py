@@ -0,0 +1,236 @@
+"""Modo delta: só as SCs que mudaram desde o último processamento vão para a planilha.
+
+A cada execução é guardado um snapshot compacto do resultado: para cada par
+(SC, WBS), um hash dos campos que o processo escreve na Gestão (agregados do
+Cji5, aprovação do SRM e nome do projeto). Na execução seguinte, os hashes
+novos são comparados com os do snapshot e só as SCs novas ou alteradas são
+aplicadas; as que sumiram das entradas entram apenas no resumo "o que mudou".
+
+O snapshot registra a assinatura da planilha de Gestão gerada junto com ele:
+um hash das chaves (SC, WBS) e das colunas gerenciadas, lidas da própria
+planilha (`assinatura_planilha`). Edições nas outras colunas (STATUS,
+comentários, formatação) não mudam a assinatura e o snapshot continua valendo;
+se alguém mexer nas colunas gerenciadas ou nas linhas, o snapshot é ignorado,
+com um aviso, e todas as SCs são processadas.
+"""
+import gzip
+import hashlib
+import io
+import json
+import numbers
+import os
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from cache_entradas import DIRETORIO_CACHE
+from chaves import normalizar_sc, sc_como_texto
+from leitura import ler_planilha
+
+
+# Mude a versão quando os campos ou a forma do hash mudarem (2: SC como inteiro, ver chaves.py;
+# 3: vinculado às colunas gerenciadas da planilha em vez dos bytes do arquivo; 4: SC, WBS e números normalizados antes do hash)
+VERSAO_SNAPSHOT = 4
+SUFIXO_SNAPSHOT = '.snapshot.json.gz'
+# Sufixo das planilhas geradas ('Gestão.xlsx' -> 'Gestão_ATUALIZADA.xlsx'), ignorado no nome do snapshot
+SUFIXO_ATUALIZADA = '_ATUALIZADA'
+# Uploads do Streamlit não têm pasta: os snapshots ficam no cache, com a assinatura da planilha no nome
+DIRETORIO_SNAPSHOTS = DIRETORIO_CACHE / 'snapshots'
+LIMITE_SNAPSHOTS = 30
+AVISO_PLANILHA_ALTERADA = "⚠️ Modo delta desativado: as colunas gerenciadas da planilha foram alteradas desde o último processamento; todas as SCs serão aplicadas."
+
+
+@dataclass
+class Snapshot:
+    """Hashes por (SC, WBS) de um processamento; `chaves` tem as colunas SC (int64), WBS e hash.
+
+    `hash_planilha` é a `assinatura_planilha` da planilha gerada com ele.
+    """
+    colunas: list
+    chaves: pd.DataFrame
+    hash_planilha: str = None
+    gerado_em: str = None
+
+
+@dataclass
+class RelatorioDelta:
+    """Pares (SC, WBS) novos, alterados e que sumiram em relação ao snapshot anterior."""
+    desde: str = None
+    novas: list = field(default_factory=list)
+    alteradas: list = field(default_factory=list)
+    desaparecidas: list = field(default_factory=list)
+    inalteradas: int = 0
+
+    def resumo(self):
+        return (f"Desde o último processamento ({self.desde}): {len(self.novas)} SC(s) nova(s), {len(self.alteradas)} alterada(s), "
+                f"{len(self.desaparecidas)} saíram das entradas e {self.inalteradas} sem mudança.")
+
+    def tabela(self):
+        """DataFrame (Situação, SC, WBS) para exibir ou gravar junto com a planilha."""
+        linhas = [('Nova', *chave) for chave in self.novas] + [('Alterada', *chave) for chave in self.alteradas] + [('Saiu das entradas', *chave) for chave in self.desaparecidas]
+        return pd.DataFrame(linhas, columns=['Situação', 'SC', 'WBS'])
+
+
+def _normalizar_para_hash(df):
+    """Cópia de `df` com tipos estáveis para o hash: SC como texto normalizado, WBS como texto e números como float.
+
+    O `hash_pandas_object` depende do dtype (300 e '300', ou 3 e 3.0, dariam hashes diferentes).
+    """
+    df = df.copy()
+    for coluna in df.columns:
+        if coluna == 'SC':
+            df[coluna] = sc_como_texto(normalizar_sc(df[coluna]))
+        elif coluna == 'WBS':
+            df[coluna] = df[coluna].astype(str).str.strip()
+        elif pd.api.types.is_numeric_dtype(df[coluna]) and not pd.api.types.is_bool_dtype(df[coluna]):
+            df[coluna] = df[coluna].astype('float64')
+    return df
+
+
+def criar_snapshot(df_atualizacao, colunas_gerenciadas):
+    """Snapshot do resultado do dia (ainda sem o hash da planilha, definido ao gravar)."""
+    colunas = [col for col in colunas_gerenciadas if col in df_atualizacao.columns]
+    if df_atualizacao.empty or 'SC' not in colunas or 'WBS' not in colunas:
+        return Snapshot(colunas, pd.DataFrame({'SC': pd.Series(dtype='int64'), 'WBS': pd.Series(dtype=str), 'hash': pd.Series(dtype='uint64')}))
+    normalizado = _normalizar_para_hash(df_atualizacao[colunas])
+    chaves = pd.DataFrame({
+        'SC': normalizar_sc(df_atualizacao['SC']).to_numpy(dtype='int64'),
+        'WBS': normalizado['WBS'].to_numpy(),
+        'hash': pd.util.hash_pandas_object(normalizado, index=False).to_numpy(),
+    })
+    # Mesma regra da atualização: em pares repetidos vale a última linha
+    return Snapshot(colunas, chaves.drop_duplicates(subset=['SC', 'WBS'], keep='last').reset_index(drop=True))
+
+
+def calcular_delta(df_atualizacao, snapshot_novo, snapshot_anterior):
+    """Linhas de `df_atualizacao` que precisam ser aplicadas e o `RelatorioDelta`.
+
+    Retorna (df_atualizacao, None) se os snapshots não forem comparáveis (outras colunas).
+    """
+    if snapshot_anterior is None or snapshot_anterior.colunas != snapshot_novo.colunas:
+        return df_atualizacao, None
+    comparacao = snapshot_novo.chaves.merge(snapshot_anterior.chaves, on=['SC', 'WBS'], how='outer', suffixes=('', '_anterior'), indicator=True)
+    novas = comparacao[comparacao['_merge'] == 'left_only']
+    ambas = comparacao[comparacao['_merge'] == 'both']
+    alteradas = ambas[ambas['hash'] != ambas['hash_anterior']]
+    desaparecidas = comparacao[comparacao['_merge'] == 'right_only']
+    relatorio = RelatorioDelta(
+        desde=snapshot_anterior.gerado_em,
+        novas=list(novas[['SC', 'WBS']].itertuples(index=False, name=None)),
+        alteradas=list(alteradas[['SC', 'WBS']].itertuples(index=False, name=None)),
+        desaparecidas=list(desaparecidas[['SC', 'WBS']].itertuples(index=False, name=None)),
+        inalteradas=len(ambas) - len(alteradas),
+    )
+    if df_atualizacao.empty:
+        return df_atualizacao, relatorio
+    aplicar = pd.MultiIndex.from_frame(pd.concat([novas, alteradas])[['SC', 'WBS']])
+    chaves_linhas = pd.MultiIndex.from_arrays([normalizar_sc(df_atualizacao['SC']).to_numpy(dtype='int64'), df_atualizacao['WBS'].astype(str).str.strip()])
+    return df_atualizacao[chaves_linhas.isin(aplicar)], relatorio
+
+
+# --- GRAVAÇÃO E LEITURA ---
+
+def _texto_celula(valor):
+    """Valor lido da planilha como texto estável: números com 15 dígitos (o que o Excel preserva ao salvar) e vazios como ''."""
+    if valor is None or (isinstance(valor, float) and pd.isna(valor)) or valor is pd.NaT:
+        return ''
+    if isinstance(valor, numbers.Real) and not isinstance(valor, bool):
+        return format(float(valor), '.15g')
+    return str(valor)
+
+
+def assinatura_planilha(arquivo, colunas):
+    """Hash das `colunas` (as gerenciadas, com SC e WBS) da primeira aba da planilha de Gestão.
+
+    Aceita caminho, arquivo enviado ou os bytes da planilha gerada.
+    """
+    if isinstance(arquivo, bytes):
+        arquivo = io.BytesIO(arquivo)
+    df = ler_planilha(arquivo, colunas)
+    if hasattr(arquivo, 'seek'):
+        arquivo.seek(0)
+    df = df[[coluna for coluna in colunas if coluna in df.columns]]
+    if 'SC' in df.columns:
+        # '300', 300 e 300.0 são a mesma SC
+        df = df.assign(SC=sc_como_texto(normalizar_sc(df['SC'])))
+    resumo = hashlib.sha256('\x1f'.join(df.columns).encode('utf-8'))
+    for linha in df.itertuples(index=False, name=None):
+        resumo.update(('\x1e' + '\x1f'.join(map(_texto_celula, linha))).encode('utf-8'))
+    return resumo.hexdigest()
+
+
+def caminho_snapshot(caminho_planilha):
+    """Arquivo do snapshot ao lado da planilha, sem os sufixos '_ATUALIZADA' do nome.
+
+    'Gestão.xlsx', 'Gestão_ATUALIZADA.xlsx' e 'Gestão_ATUALIZADA_ATUALIZADA.xlsx' usam todas
+    'Gestão.xlsx.snapshot.json.gz': a execução lê e grava o mesmo snapshot, e as execuções
+    encadeadas sobre a planilha gerada na anterior o encontram.
+    """
+    caminho_planilha = Path(caminho_planilha)
+    nome = caminho_planilha.stem
+    while nome.endswith(SUFIXO_ATUALIZADA) and nome != SUFIXO_ATUALIZADA:
+        nome = nome.removesuffix(SUFIXO_ATUALIZADA)
+    return caminho_planilha.with_name(nome + caminho_planilha.suffix + SUFIXO_SNAPSHOT)
+
+
+def caminho_snapshot_por_hash(hash_planilha, diretorio=DIRETORIO_SNAPSHOTS):
+    return Path(diretorio) / f"{hash_planilha}{SUFIXO_SNAPSHOT}"
+
+
+def gravar_snapshot(snapshot, caminho, hash_planilha):
+    """Grava o snapshot (JSON compactado) vinculado à planilha gerada com ele (`hash_planilha` é a assinatura dela)."""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    snapshot.hash_planilha = hash_planilha
+    snapshot.gerado_em = datetime.now().isoformat(timespec='seconds')
+    dados = {
+        'versao': VERSAO_SNAPSHOT, 'hash_planilha': hash_planilha, 'gerado_em': snapshot.gerado_em, 'colunas': snapshot.colunas,
+        'sc': snapshot.chaves['SC'].tolist(), 'wbs': snapshot.chaves['WBS'].tolist(), 'hash': snapshot.chaves['hash'].tolist(),
+    }
+    descritor, temporario = tempfile.mkstemp(dir=caminho.parent, suffix='.tmp')
+    os.close(descritor)
+    try:
+        with gzip.open(temporario, 'wt', encoding='utf-8') as arquivo:
+            json.dump(dados, arquivo, ensure_ascii=False)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def ler_snapshot(caminho):
+    """Snapshot gravado em `caminho`, ou None se não existir, for de outra versão ou estiver corrompido."""
+    try:
+        with gzip.open(caminho, 'rt', encoding='utf-8') as arquivo:
+            dados = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    if dados.get('versao') != VERSAO_SNAPSHOT:
+        return None
+    chaves = pd.DataFrame({'SC': pd.Series(dados['sc'], dtype='int64'), 'WBS': pd.Series(dados['wbs'], dtype=object), 'hash': pd.Series(dados['hash'], dtype='uint64')})
+    return Snapshot(dados['colunas'], chaves, dados['hash_planilha'], dados['gerado_em'])
+
+
+def carregar_snapshot(caminho, arquivo_planilha, colunas, notificar=None):
+    """Snapshot de `caminho` se as colunas gerenciadas desta planilha são as que foram geradas com ele; senão None.
+
+    Quando o snapshot existe mas a planilha mudou nessas colunas, `notificar` recebe o aviso.
+    """
+    snapshot = ler_snapshot(caminho)
+    if snapshot is None:
+        return None
+    if snapshot.hash_planilha != assinatura_planilha(arquivo_planilha, colunas):
+        if notificar is not None:
+            notificar('aviso', AVISO_PLANILHA_ALTERADA)
+        return None
+    return snapshot
+
+
+def limitar_snapshots(diretorio=DIRETORIO_SNAPSHOTS, limite=LIMITE_SNAPSHOTS):
+    """Apaga os snapshots mais antigos do diretório do cache, mantendo os `limite` mais recentes."""
+    arquivos = sorted(Path(diretorio).glob(f"*{SUFIXO_SNAPSHOT}"), key=lambda caminho: caminho.stat().st_mtime, reverse=True)
+    for caminho in arquivos[limite:]:
+        caminho.unlink(missing_ok=True)
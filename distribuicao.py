@@ -0,0 +1,140 @@
+"""Distribuição: várias planilhas de Gestão atualizadas com uma única leitura das entradas.
+
+Cada equipe da Engenharia mantém a sua "Gestão de SC em aberto". Em vez de
+cada uma rodar a automação com os mesmos Cji5, SRM e LCP do dia, o Cji5 e o
+SRM são lidos e cruzados uma vez, o LCP é cruzado e as SCs agrupadas uma vez,
+e só então as linhas são encaminhadas para cada planilha:
+
+- sem regra, a planilha recebe todas as SCs (como numa execução normal);
+- com `prefixos_wbs`, só as SCs cuja WBS começa com um dos prefixos;
+- com `requisitantes`, só as SCs desses requisitantes (sem diferenciar maiúsculas).
+
+Com as duas regras, a SC precisa atender às duas. O resultado de cada
+planilha é o mesmo de uma execução separada com as linhas encaminhadas para
+ela, e todos podem ser baixados juntos num zip (`compactar_resultados`).
+"""
+import io
+import json
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from instrumentacao import SEM_MEDICAO
+from leitura_paralela import LeiturasParalelas
+from motor_sc import agendar_leituras, atualizar_gestao, executar_planilhas_py, notificar_console, preparar_atualizacao
+
+
+@dataclass
+class PlanilhaEquipe:
+    """Uma planilha de Gestão da distribuição e a regra das SCs que ela recebe."""
+    nome: str
+    arquivo: object
+    prefixos_wbs: list = field(default_factory=list)
+    requisitantes: list = field(default_factory=list)
+    # Modo delta: snapshot do último processamento desta planilha
+    snapshot: object = None
+    # Streaming: caminho onde a planilha atualizada é gravada
+    destino: object = None
+
+    @property
+    def tem_regra(self):
+        return bool(self.prefixos_wbs or self.requisitantes)
+
+    def filtrar(self, df_atualizacao):
+        """Linhas de `df_atualizacao` que vão para esta planilha."""
+        selecao = pd.Series(True, index=df_atualizacao.index)
+        if self.prefixos_wbs and 'WBS' in df_atualizacao.columns:
+            selecao &= df_atualizacao['WBS'].astype(str).str.startswith(tuple(prefixo.strip() for prefixo in self.prefixos_wbs))
+        if self.requisitantes and 'REQUISITANTE' in df_atualizacao.columns:
+            requisitantes = {requisitante.strip().upper() for requisitante in self.requisitantes}
+            selecao &= df_atualizacao['REQUISITANTE'].astype(str).str.strip().str.upper().isin(requisitantes)
+        return df_atualizacao[selecao]
+
+
+@dataclass
+class ResultadoPlanilha:
+    planilha: PlanilhaEquipe
+    # Bytes da planilha atualizada ou, no streaming, o `destino` onde ela foi gravada
+    dados: object
+    relatorio: object
+
+
+def ler_rotas(caminho):
+    """Regras de um JSON {"arquivo.xlsx": {"wbs": [...], "requisitantes": [...]}} por nome de arquivo."""
+    with open(caminho, encoding='utf-8') as arquivo:
+        rotas = json.load(arquivo)
+    return {nome: (regra.get('wbs', []), regra.get('requisitantes', [])) for nome, regra in rotas.items()}
+
+
+def executar_distribuicao(arquivo_cji5, arquivo_srm, arquivo_lcp, planilhas, notificar=notificar_console, modo_agregacao='vetorizado', motor_leitura=None, cache=None, formatar_tudo=False, medicoes=SEM_MEDICAO, modo_delta=False, executor=None):
+    """Etapa 1 e a preparação da Etapa 2 uma vez, e a atualização de cada uma das `planilhas`.
+
+    Retorna a lista de `ResultadoPlanilha` (na ordem de `planilhas`) ou None se a primeira etapa não gerou dados.
+    """
+    with LeiturasParalelas(executor) as leituras:
+        agendar_leituras(leituras, arquivo_cji5, arquivo_srm, arquivo_lcp, None, modo_agregacao, motor_leitura, cache)
+        _agendar_gestao(leituras, planilhas, 0)
+
+        df_intermediario = executar_planilhas_py(arquivo_cji5, arquivo_srm, notificar, modo_agregacao, motor_leitura, cache, medicoes, leituras)
+        if df_intermediario is None or df_intermediario.empty:
+            return None
+
+        notificar('info', f"▶️ Etapa 2: Processando `LançamentoFIM.py` para {len(planilhas)} planilha(s) de Gestão...")
+        with medicoes.etapa("Etapa 2") as medicao_etapa:
+            df_atualizacao, colunas_gerenciadas = preparar_atualizacao(df_intermediario, arquivo_lcp, modo_agregacao, motor_leitura, cache, medicoes, leituras)
+            medicao_etapa.linhas = len(df_atualizacao)
+
+        if planilhas and all(planilha.tem_regra for planilha in planilhas):
+            encaminhadas = pd.concat([planilha.filtrar(df_atualizacao) for planilha in planilhas])
+            sem_destino = len(df_atualizacao) - len(df_atualizacao.index.intersection(encaminhadas.index))
+            if sem_destino:
+                notificar('aviso', f"⚠️ {sem_destino} SC(s) não atendem à regra de nenhuma planilha e não foram lançadas.")
+
+        resultados = []
+        for indice, planilha in enumerate(planilhas):
+            # A próxima planilha abre enquanto esta é atualizada (no máximo dois workbooks em memória)
+            _agendar_gestao(leituras, planilhas, indice + 1)
+            df_planilha = planilha.filtrar(df_atualizacao)
+            notificar('info', f"📄 {planilha.nome}: {len(df_planilha)} SC(s) encaminhada(s).")
+            with medicoes.etapa(f"Planilha: {planilha.nome}") as medicao:
+                dados, relatorio = atualizar_gestao(df_planilha, colunas_gerenciadas, planilha.arquivo, notificar, formatar_tudo, planilha.destino, medicoes,
+                                                    modo_delta, planilha.snapshot, leituras, leitura_gestao=f'gestao-{indice}')
+                medicao.linhas = len(df_planilha)
+            resultados.append(ResultadoPlanilha(planilha, dados, relatorio))
+    notificar('sucesso', f"✅ `LançamentoFIM.py` executado para {len(resultados)} planilha(s)!")
+    return resultados
+
+
+def _agendar_gestao(leituras, planilhas, indice):
+    if indice < len(planilhas) and planilhas[indice].destino is None:
+        leituras.agendar_local(f'gestao-{indice}', load_workbook, planilhas[indice].arquivo)
+
+
+def nome_saida(planilha):
+    """'Gestão Elétrica.xlsx' -> 'Gestão Elétrica_ATUALIZADA.xlsx'."""
+    return f"{Path(planilha.nome).stem}_ATUALIZADA.xlsx"
+
+
+def compactar_resultados(resultados):
+    """Zip com as planilhas atualizadas e, no modo delta, a lista do que mudou em cada uma."""
+    buffer = io.BytesIO()
+    nomes_usados = set()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as arquivo_zip:
+        for resultado in resultados:
+            nome = nome_saida(resultado.planilha)
+            # Equipes diferentes podem enviar planilhas com o mesmo nome
+            for numero in range(2, len(resultados) + 2):
+                if nome not in nomes_usados:
+                    break
+                nome = f"{Path(nome_saida(resultado.planilha)).stem} ({numero}).xlsx"
+            nomes_usados.add(nome)
+            if isinstance(resultado.dados, bytes):
+                arquivo_zip.writestr(nome, resultado.dados)
+            else:
+                arquivo_zip.write(resultado.dados, nome)
+            if resultado.relatorio.mudancas is not None:
+                arquivo_zip.writestr(f"{Path(nome).stem}_MUDANCAS.csv", resultado.relatorio.mudancas.tabela().to_csv(index=False).encode('utf-8-sig'))
+    return buffer.getvalue()
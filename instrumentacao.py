@@ -0,0 +1,173 @@
+"""Medição das fases do processo: tempo, linhas e pico de memória.
+
+Cada fase é medida com `with medicoes.etapa('nome') as m:` e pode informar
+quantas linhas produziu em `m.linhas`. Fases podem ser aninhadas (ex.: a
+leitura do Cji5 dentro da Etapa 1). Por padrão, além do tempo e das linhas,
+cada fase registra o pico de RSS do processo ao terminar (`ru_maxrss`, quase
+sem custo): é o maior uso de memória desde o início do processo, então só
+cresce e mostra em que fase ele foi alcançado. O pico de memória da própria
+fase vem do `tracemalloc`, que deixa as fases bem mais lentas, então só é
+medido quando pedido (`medir_memoria=True` ou a variável
+FOLLOWUP_MEDIR_MEMORIA=1). Os dois são globais ao processo e não enxergam os
+processos de leitura paralela: com várias execuções ao mesmo tempo os valores
+são aproximados. As medições podem ser mostradas numa tabela e gravadas em JSON
+lines para acompanhar o desempenho entre as execuções diárias; o arquivo é
+rotacionado ao passar de LIMITE_LOG_BYTES.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+ARQUIVO_LOG = Path('desempenho.jsonl')
+# Ao passar deste tamanho o log vira '<arquivo>.1' (substituindo o anterior) e recomeça vazio
+LIMITE_LOG_BYTES = 5 * 2 ** 20
+# Medição de memória ligada para todas as instrumentações que não disserem o contrário
+MEDIR_MEMORIA = bool(int(os.environ.get('FOLLOWUP_MEDIR_MEMORIA', 0)))
+
+_lock_tracemalloc = threading.Lock()
+_usuarios_tracemalloc = 0
+_lock_log = threading.Lock()
+
+
+def pico_rss_mb():
+    """Maior RSS do processo até agora, em MB (None onde o módulo `resource` não existe)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return round(pico / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+
+
+def _ligar_tracemalloc():
+    global _usuarios_tracemalloc
+    with _lock_tracemalloc:
+        if _usuarios_tracemalloc == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _usuarios_tracemalloc += 1
+
+
+def _desligar_tracemalloc():
+    global _usuarios_tracemalloc
+    with _lock_tracemalloc:
+        _usuarios_tracemalloc -= 1
+        if _usuarios_tracemalloc == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+@dataclass
+class Medicao:
+    nome: str
+    nivel: int = 0
+    segundos: float = 0.0
+    linhas: int = None
+    pico_rss_mb: float = None
+    pico_memoria_mb: float = None
+
+
+class Instrumentacao:
+    """Medições de uma execução (ex.: um clique em "Iniciar Automação" ou um rerun da página)."""
+
+    def __init__(self, processo, medir_memoria=None, ativa=True):
+        self.processo = processo
+        self.ativa = ativa
+        self.medir_memoria = (MEDIR_MEMORIA if medir_memoria is None else medir_memoria) and ativa
+        self.inicio = datetime.now()
+        self.medicoes = []
+        # Pilha das fases abertas: [medicao, memória no início, maior pico visto]
+        self._abertas = []
+
+    @contextmanager
+    def etapa(self, nome, linhas=None):
+        medicao = Medicao(nome, len(self._abertas), linhas=linhas)
+        if not self.ativa:
+            yield medicao
+            return
+        self.medicoes.append(medicao)
+        memoria_inicial = self._abrir_memoria()
+        self._abertas.append([medicao, memoria_inicial, 0])
+        inicio = time.perf_counter()
+        try:
+            yield medicao
+        finally:
+            medicao.segundos = round(time.perf_counter() - inicio, 4)
+            medicao.pico_rss_mb = pico_rss_mb()
+            _, memoria_inicial, pico = self._abertas.pop()
+            if self.medir_memoria:
+                pico = max(pico, tracemalloc.get_traced_memory()[1])
+                medicao.pico_memoria_mb = round(max(pico - memoria_inicial, 0) / 2 ** 20, 2)
+                if self._abertas:
+                    self._abertas[-1][2] = max(self._abertas[-1][2], pico)
+                else:
+                    _desligar_tracemalloc()
+
+    def _abrir_memoria(self):
+        if not self.medir_memoria:
+            return 0
+        if not self._abertas:
+            _ligar_tracemalloc()
+        else:
+            # Guarda o pico da fase de fora antes de zerá-lo para a fase de dentro
+            self._abertas[-1][2] = max(self._abertas[-1][2], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    @property
+    def fases_abertas(self):
+        """Nomes das fases em andamento, da mais externa para a mais interna (para acompanhar de outra thread)."""
+        return [medicao.nome for medicao, _, _ in list(self._abertas)]
+
+    @property
+    def total_segundos(self):
+        return round(sum(medicao.segundos for medicao in self.medicoes if medicao.nivel == 0), 4)
+
+    def tabela(self):
+        """DataFrame para exibição, com as fases internas recuadas sob a fase que as contém."""
+        tabela = pd.DataFrame({
+            'Fase': ['    ' * medicao.nivel + medicao.nome for medicao in self.medicoes],
+            'Tempo (s)': [medicao.segundos for medicao in self.medicoes],
+            'Linhas': pd.array([medicao.linhas for medicao in self.medicoes], dtype='Int64'),
+        })
+        if resource is not None:
+            tabela['Pico RSS do processo (MB)'] = [medicao.pico_rss_mb for medicao in self.medicoes]
+        if self.medir_memoria:
+            tabela['Pico de memória (MB)'] = [medicao.pico_memoria_mb for medicao in self.medicoes]
+        return tabela
+
+    def gravar_log(self, arquivo=ARQUIVO_LOG, limite_bytes=LIMITE_LOG_BYTES, **contexto):
+        """Acrescenta uma linha JSON por fase em `arquivo`; `contexto` entra em todas as linhas.
+
+        Chame uma vez por execução. Se o arquivo já passou de `limite_bytes`, ele é rotacionado antes.
+        Retorna False se o log não pôde ser gravado (a medição nunca interrompe o processo).
+        """
+        if not self.medicoes:
+            return True
+        execucao = self.inicio.isoformat(timespec='seconds')
+        linhas = [json.dumps({'execucao': execucao, 'processo': self.processo, **contexto, **asdict(medicao)}, ensure_ascii=False, default=str) for medicao in self.medicoes]
+        try:
+            with _lock_log:
+                if os.path.exists(arquivo) and os.path.getsize(arquivo) >= limite_bytes:
+                    os.replace(arquivo, f"{arquivo}.1")
+                with open(arquivo, 'a', encoding='utf-8') as log:
+                    log.write('\n'.join(linhas) + '\n')
+        except OSError:
+            return False
+        return True
+
+
+# Usada quando quem chamou não quer medir nada
+SEM_MEDICAO = Instrumentacao('nenhum', ativa=False)
@@ -0,0 +1,132 @@
+"""Leitura enxuta das planilhas de entrada (CJI5, SRM e BUSCAR_LCP).
+
+Cada etapa declara as colunas de que precisa e só elas são carregadas. Com o
+motor 'openpyxl' as linhas são lidas em modo streaming (read-only) e as linhas
+que não interessam (ex.: documentos do Cji5 que não são SC) são descartadas
+antes de virar DataFrame. Se o pacote `python-calamine` estiver instalado, o
+motor 'calamine' (bem mais rápido) é usado por padrão; ele lê a aba inteira de
+uma vez, então nesse caso as linhas são filtradas logo depois da leitura.
+"""
+import importlib.util
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas.io.parsers import TextParser
+
+
+# --- 1. COLUNAS USADAS POR CADA ETAPA ---
+COLUNA_REFERENCIA_CJI5 = 'Nº doc.de referência'
+COLUNAS_CJI5 = ['Definição do projeto', COLUNA_REFERENCIA_CJI5, 'Material', 'Denominação', 'Quantidade total', 'Valor/moed.transação']
+COLUNAS_SRM = ['SC ID', 'Created On', 'SC Name', 'Next Approver', 'SC Approval status', 'Received on', 'Requester']
+COLUNAS_LCP = ['WBS', 'PROJECT NAME']
+
+MOTORES_LEITURA = ('openpyxl', 'calamine')
+MOTOR_PADRAO = 'calamine' if importlib.util.find_spec('python_calamine') else 'openpyxl'
+
+
+def eh_documento_sc(valor):
+    """Filtro do Cji5: mantém só as linhas cujo documento de referência começa com 'S'."""
+    return isinstance(valor, str) and valor.startswith('S')
+
+
+# --- 2. LEITURA GENÉRICA ---
+
+def _converter_celula(cell):
+    """Converte a célula do mesmo jeito que o `pd.read_excel` faz com o openpyxl."""
+    if cell.value is None:
+        return ''
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        inteiro = int(cell.value)
+        return inteiro if inteiro == cell.value else float(cell.value)
+    return cell.value
+
+
+def _ler_streaming(arquivo, colunas, sheet_name, header, filtro, dtype):
+    workbook = load_workbook(arquivo, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[sheet_name] if isinstance(sheet_name, int) else workbook[sheet_name]
+        sheet.reset_dimensions()
+        linhas = sheet.iter_rows()
+        for _ in range(header):
+            next(linhas, None)
+
+        # Nomes sem espaços nas pontas, para casar com `colunas` e com as chaves de `dtype`
+        cabecalho = [str(_converter_celula(cell)).strip() for cell in next(linhas, ())]
+        indices = {}
+        for i, nome in enumerate(cabecalho):
+            if nome in colunas and nome not in indices:
+                indices[nome] = i
+        if not indices:
+            # Mesmo formato do motor calamine: nenhuma linha e colunas (vazias) de texto
+            return pd.DataFrame(columns=pd.Index([], dtype=object))
+        posicoes = sorted(indices.values())
+        ultima_coluna = posicoes[-1] + 1
+        posicao_filtro = indices.get(filtro[0]) if filtro else None
+
+        dados = [[cabecalho[i] for i in posicoes]]
+        for linha in linhas:
+            linha = linha[:ultima_coluna]
+            if posicao_filtro is not None:
+                if posicao_filtro >= len(linha) or not filtro[1](_converter_celula(linha[posicao_filtro])):
+                    continue
+            valores = [_converter_celula(linha[i]) if i < len(linha) else '' for i in posicoes]
+            dados.append(valores)
+    finally:
+        workbook.close()
+
+    # Remove linhas vazias no fim da aba, como o pandas faz
+    while len(dados) > 1 and all(valor == '' for valor in dados[-1]):
+        dados.pop()
+    return TextParser(dados, header=0, dtype=dtype, skip_blank_lines=False).read()
+
+
+def _ler_calamine(arquivo, colunas, sheet_name, header, filtro, dtype):
+    # O calamine lê a aba inteira de uma vez (em Rust), então o filtro só pode ser aplicado depois
+    with pd.ExcelFile(arquivo, engine='calamine') as planilha:
+        if dtype:
+            # As chaves de `dtype` vêm sem espaços; o cabeçalho da aba pode tê-los (' WBS ')
+            nomes = planilha.parse(sheet_name, header=header, nrows=0).columns
+            dtype = {nome: dtype[str(nome).strip()] for nome in nomes if str(nome).strip() in dtype}
+        df = planilha.parse(sheet_name, header=header, dtype=dtype, usecols=lambda nome: str(nome).strip() in colunas)
+    df.columns = [str(nome).strip() for nome in df.columns]
+    if filtro and filtro[0] in df.columns:
+        df = df[df[filtro[0]].map(filtro[1]).astype(bool)]
+    return df
+
+
+def ler_planilha(arquivo, colunas, sheet_name=0, header=0, filtro=None, dtype=None, motor=None):
+    """Lê somente `colunas` de uma aba (comparadas sem espaços nas pontas).
+
+    `filtro` é um par (coluna, função) aplicado ao valor de cada linha; linhas em que a
+    função retorna False são descartadas durante a leitura. Colunas ausentes simplesmente
+    não aparecem no resultado, para que quem chamou decida como tratar o erro.
+    """
+    motor = motor or MOTOR_PADRAO
+    if motor not in MOTORES_LEITURA:
+        raise ValueError(f"Motor de leitura desconhecido: '{motor}'. Use um de {MOTORES_LEITURA}.")
+    if hasattr(arquivo, 'seek'):
+        arquivo.seek(0)
+    if motor == 'calamine':
+        return _ler_calamine(arquivo, colunas, sheet_name, header, filtro, dtype)
+    return _ler_streaming(arquivo, colunas, sheet_name, header, filtro, dtype)
+
+
+# --- 3. LEITURA POR ARQUIVO ---
+
+def ler_cji5(arquivo, motor=None):
+    """Linhas de SC do resultado_cji5.xlsx, só com as colunas usadas na Etapa 1."""
+    return ler_planilha(arquivo, COLUNAS_CJI5, filtro=(COLUNA_REFERENCIA_CJI5, eh_documento_sc), motor=motor)
+
+
+def ler_srm(arquivo, motor=None):
+    """Colunas de aprovação do DADOS_SRM.xlsx usadas na Etapa 1."""
+    return ler_planilha(arquivo, COLUNAS_SRM, motor=motor)
+
+
+def ler_lcp(arquivo, sheet_name='Capex', motor=None):
+    """WBS e PROJECT NAME de uma aba do BUSCAR_LCP.xlsx (cabeçalho na 4ª linha)."""
+    return ler_planilha(arquivo, COLUNAS_LCP, sheet_name=sheet_name, header=3, dtype={'WBS': str}, motor=motor)
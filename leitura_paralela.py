@@ -0,0 +1,119 @@
+"""Leitura das planilhas de entrada em paralelo, em processos separados.
+
+Ler xlsx ocupa a CPU, então Cji5, SRM e a aba Capex do LCP são lidos cada um
+num processo de um `ProcessPoolExecutor`, enquanto o processo principal abre a
+planilha de Gestão (que precisa ficar nele, porque o workbook do openpyxl é
+alterado e salvo ali). Cada processo devolve só o DataFrame já podado pelas
+funções de `leitura.py`, e o resultado é usado direto pelas etapas, sem
+passar pelo disco. Assim o tempo total tende ao do arquivo mais lento, e não à
+soma de todos.
+
+Os processos são criados com 'forkserver' (ou 'spawn'), porque o Streamlit
+roda várias threads e um `fork` do processo dele não é seguro. Se um processo
+do pool morrer (falta de memória, por exemplo), o pool fica quebrado: as
+leituras daquela execução voltam a ser feitas no processo principal e
+`executor_quebrado` avisa quem guarda o pool que é hora de recriá-lo.
+"""
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+# Um processo para cada planilha lida fora (Cji5, SRM e LCP), limitado pelos núcleos disponíveis
+TRABALHADORES_PADRAO = int(os.environ.get('FOLLOWUP_TRABALHADORES', min(3, os.cpu_count() or 1)))
+
+
+def criar_executor(trabalhadores=None):
+    """Pool de processos para as leituras; com 1 trabalhador ou menos retorna None (leitura sequencial)."""
+    trabalhadores = TRABALHADORES_PADRAO if trabalhadores is None else trabalhadores
+    if trabalhadores <= 1:
+        return None
+    metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=trabalhadores, mp_context=multiprocessing.get_context(metodo))
+
+
+def executor_quebrado(executor):
+    """Se um processo do pool morreu: ele não aceita mais leituras e precisa ser recriado."""
+    return executor is not None and bool(getattr(executor, '_broken', False))
+
+
+def _conteudo(arquivo):
+    """O que vai para o outro processo: o caminho (sem copiar nada) ou os bytes do arquivo enviado."""
+    if isinstance(arquivo, (str, os.PathLike)):
+        return os.fspath(arquivo)
+    if hasattr(arquivo, 'getvalue'):
+        return arquivo.getvalue()
+    arquivo.seek(0)
+    dados = arquivo.read()
+    arquivo.seek(0)
+    return dados
+
+
+def _ler_no_processo(funcao, conteudo, argumentos):
+    return funcao(io.BytesIO(conteudo) if isinstance(conteudo, bytes) else conteudo, *argumentos)
+
+
+class LeiturasParalelas:
+    """Leituras disparadas antes das etapas; cada etapa busca a sua com `obter(nome, ler)`.
+
+    Sem executor (ou para nomes não agendados) `obter` simplesmente chama `ler()`, então as
+    etapas funcionam igual com ou sem paralelismo. O mesmo vale quando o pool quebra: a
+    leitura é refeita com `ler()` e `quebrado` fica verdadeiro.
+    """
+
+    def __init__(self, executor=None):
+        self.executor = executor
+        self.quebrado = False
+        self._futuros = {}
+        self._local = None
+
+    def agendar(self, nome, funcao, arquivo, *argumentos):
+        """Lê `arquivo` com `funcao(arquivo, *argumentos)` num processo do pool (função de módulo, não lambda)."""
+        if self.executor is None or self.quebrado:
+            return
+        try:
+            self._futuros[nome] = self.executor.submit(_ler_no_processo, funcao, _conteudo(arquivo), argumentos)
+        except BrokenProcessPool:
+            self.quebrado = True
+
+    def agendar_local(self, nome, funcao, *argumentos):
+        """Executa `funcao` numa thread deste processo (para objetos que não podem sair dele, como o workbook)."""
+        if self.executor is None:
+            return
+        if self._local is None:
+            self._local = ThreadPoolExecutor(max_workers=1)
+        self._futuros[nome] = self._local.submit(funcao, *argumentos)
+
+    def agendado(self, nome):
+        return nome in self._futuros
+
+    def obter(self, nome, ler):
+        """Resultado da leitura `nome` (espera o processo terminar) ou `ler()` se ela não foi agendada."""
+        futuro = self._futuros.pop(nome, None)
+        if futuro is None:
+            return ler()
+        try:
+            return futuro.result()
+        except BrokenProcessPool:
+            self.quebrado = True
+            return ler()
+
+    def fechar(self):
+        """Descarta as leituras que ninguém buscou (o pool é de quem o criou e continua aberto)."""
+        for futuro in self._futuros.values():
+            futuro.cancel()
+        self._futuros.clear()
+        if self._local is not None:
+            self._local.shutdown(wait=True)
+            self._local = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+
+SEM_LEITURAS = LeiturasParalelas()
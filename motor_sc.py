@@ -0,0 +1,463 @@
+"""Motor da automação FollowUP-GY, independente do Streamlit.
+
+Contém as duas etapas do processo (Planilhas.py e LançamentoFIM.py) e um
+ponto de entrada de linha de comando para rodar a atualização sem navegador:
+
+    python motor_sc.py --cji5 resultado_cji5.xlsx --srm DADOS_SRM.xlsx \\
+        --lcp BUSCAR_LCP.xlsx --gestao "Gestão de SC em aberto.xlsx"
+"""
+import argparse
+import io
+import sys
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from cache_entradas import DIRETORIO_CACHE, CacheEntradas
+from catalogo_projetos import ABA_CAPEX, obter_catalogo
+from chaves import normalizar_sc, normalizar_wbs
+from delta_sc import assinatura_planilha, calcular_delta, caminho_snapshot, carregar_snapshot, criar_snapshot, gravar_snapshot
+from instrumentacao import ARQUIVO_LOG, SEM_MEDICAO, Instrumentacao
+from leitura import MOTOR_PADRAO, MOTORES_LEITURA, ler_cji5, ler_lcp, ler_srm
+from leitura_paralela import SEM_LEITURAS, TRABALHADORES_PADRAO, LeiturasParalelas, criar_executor
+from planilha_gestao import aplicar_atualizacao, exportar_streaming, formatar_planilha
+
+
+# --- 1. NOTIFICAÇÕES ---
+# O motor não escreve na tela: ele avisa quem chamou através de `notificar(nivel, mensagem)`.
+# Níveis usados: 'info', 'sucesso', 'aviso' e 'erro'.
+
+def notificar_console(nivel, mensagem):
+    """Notificador padrão: escreve as mensagens no terminal (erros e avisos vão para o stderr)."""
+    destino = sys.stderr if nivel in ('aviso', 'erro') else sys.stdout
+    print(f"[{nivel.upper()}] {mensagem}", file=destino)
+
+
+# --- 2. AGREGAÇÃO ---
+# 'vetorizado' remove duplicatas de uma vez só e faz um único join agrupado por coluna;
+# 'legado' mantém as lambdas originais por grupo, útil para conferir que o texto gerado é o mesmo.
+MODOS_AGREGACAO = ('vetorizado', 'legado')
+
+# Colunas da Etapa 2 -> colunas da planilha de Gestão; as de destino são as que o processo escreve (gerenciadas)
+MAPA_COLUNAS = {'SC ID': 'SC', 'atuação do projeto': 'WBS', 'SC Name': 'DESCRIÇÃO','Denominação': 'CONTEÚDO', 'Created On': 'DATA CRIAÇÃO', 'Requester': 'REQUISITANTE','Valor Total': 'VALOR', 'Next Approver': 'PENDENTE COM','Received on': 'RECEBIDA EM', 'PROJECT NAME': 'PROJETO'}
+COLUNAS_GERENCIADAS = list(MAPA_COLUNAS.values())
+
+def juntar_por_grupo(df, chaves, coluna, separador, remover_duplicados=True):
+    """Concatena os valores de `coluna` por grupo, na ordem em que aparecem.
+
+    Com `remover_duplicados` equivale a `separador.join(x.unique())` em cada grupo.
+    """
+    base = df[chaves + [coluna]]
+    if remover_duplicados:
+        base = base.drop_duplicates()
+    return base.groupby(chaves, observed=True)[coluna].agg(separador.join)
+
+
+# --- 3. ETAPAS DO PROCESSO ---
+
+def executar_planilhas_py(arquivo_cji5, arquivo_srm, notificar=notificar_console, modo_agregacao='vetorizado', motor_leitura=None, cache=None, medicoes=SEM_MEDICAO, leituras=SEM_LEITURAS):
+    """Contém a lógica EXATA do seu Planilhas.py.
+
+    Retorna o DataFrame intermediário, um DataFrame vazio se o Cji5 não tiver SCs
+    ou None se o arquivo do SRM não tiver a coluna 'SC ID'. Com um `CacheEntradas`,
+    as leituras e o próprio resultado são reaproveitados quando os arquivos não mudaram.
+    `medicoes` (uma `Instrumentacao`) recebe o tempo e as linhas (e a memória, se medida) de cada fase e
+    `leituras` traz as planilhas que já estão sendo lidas em paralelo (ver `agendar_leituras`).
+    """
+    notificar('info', "▶️ Etapa 1: Processando `Planilhas.py`...")
+    with medicoes.etapa("Etapa 1") as medicao_etapa:
+        df_final = _executar_etapa1(arquivo_cji5, arquivo_srm, notificar, modo_agregacao, motor_leitura, cache, medicoes, leituras)
+        medicao_etapa.linhas = None if df_final is None else len(df_final)
+
+    if df_final is not None and not df_final.empty:
+        notificar('sucesso', "✅ `Planilhas.py` executado!")
+    return df_final
+
+
+def _ler_medindo(medicoes, nome, ler):
+    with medicoes.etapa(nome) as medicao:
+        df = ler()
+        medicao.linhas = len(df)
+    return df
+
+
+def _chaves_etapa1(cache, arquivo_cji5, arquivo_srm, motor_leitura, modo_agregacao):
+    chave_cji5 = cache.chave('cji5', motor_leitura or MOTOR_PADRAO, arquivo_cji5)
+    chave_srm = cache.chave('srm', motor_leitura or MOTOR_PADRAO, arquivo_srm)
+    return chave_cji5, chave_srm, cache.chave('etapa1', chave_cji5, chave_srm, modo_agregacao)
+
+
+def _executar_etapa1(arquivo_cji5, arquivo_srm, notificar, modo_agregacao, motor_leitura, cache, medicoes, leituras):
+    ler_cji5_agora = lambda: leituras.obter('cji5', lambda: ler_cji5(arquivo_cji5, motor_leitura))
+    ler_srm_agora = lambda: leituras.obter('srm', lambda: ler_srm(arquivo_srm, motor_leitura))
+    if cache is None:
+        df_cji5 = _ler_medindo(medicoes, "Leitura Cji5", ler_cji5_agora)
+        df_srm = _ler_medindo(medicoes, "Leitura SRM", ler_srm_agora)
+        df_final = cruzar_cji5_srm(df_cji5, df_srm, notificar, modo_agregacao, medicoes)
+    else:
+        chave_cji5, chave_srm, chave_resultado = _chaves_etapa1(cache, arquivo_cji5, arquivo_srm, motor_leitura, modo_agregacao)
+        df_final = cache.obter(chave_resultado)
+        if df_final is not None:
+            notificar('info', "♻️ Etapa 1: mesmos arquivos de entrada, resultado reaproveitado do cache.")
+        else:
+            df_cji5 = _ler_medindo(medicoes, "Leitura Cji5", lambda: cache.carregar(chave_cji5, ler_cji5_agora))
+            df_srm = _ler_medindo(medicoes, "Leitura SRM", lambda: cache.carregar(chave_srm, ler_srm_agora))
+            df_final = cruzar_cji5_srm(df_cji5, df_srm, notificar, modo_agregacao, medicoes)
+            if df_final is not None and not df_final.empty:
+                cache.gravar(chave_resultado, df_final)
+    return df_final
+
+
+def cruzar_cji5_srm(df_cji5, df_srm, notificar=notificar_console, modo_agregacao='vetorizado', medicoes=SEM_MEDICAO):
+    """Agrupa as linhas de SC do Cji5 e cruza com as aprovações do SRM (miolo da Etapa 1)."""
+    with medicoes.etapa("Filtro de SCs (Cji5)") as medicao:
+        df_cji5['Nº doc.de referência'] = df_cji5['Nº doc.de referência'].astype(str)
+        df_cji5 = df_cji5[df_cji5['Nº doc.de referência'].str.startswith('S', na=False)].copy()
+        medicao.linhas = len(df_cji5)
+        if df_cji5.empty:
+            notificar('aviso', "Etapa 1: Nenhuma SC encontrada no arquivo Cji5. O processo será interrompido.")
+            return pd.DataFrame()
+
+        df_cji5['SC_ID_Key'] = normalizar_sc(df_cji5['Nº doc.de referência'], prefixo='S')
+        df_cji5.dropna(subset=['SC_ID_Key'], inplace=True)
+        df_cji5['SC_ID_Key'] = df_cji5['SC_ID_Key'].astype('int64')
+
+        coluna_valor_correta = 'Valor/moed.transação'
+        df_cji5[coluna_valor_correta] = pd.to_numeric(df_cji5[coluna_valor_correta], errors='coerce').fillna(0)
+
+    with medicoes.etapa("Agrupamento (Cji5)") as medicao:
+        df_agrupado = _agrupar_cji5(df_cji5, coluna_valor_correta, modo_agregacao)
+        medicao.linhas = len(df_agrupado)
+
+    if 'SC ID' not in df_srm.columns:
+        notificar('erro', "ERRO CRÍTICO: A coluna 'SC ID' não foi encontrada no arquivo DADOS_SRM.xlsx!")
+        return None
+    with medicoes.etapa("Cruzamento com SRM") as medicao:
+        df_final = _cruzar_srm(df_agrupado, df_srm, coluna_valor_correta)
+        medicao.linhas = len(df_final)
+    return df_final
+
+
+def _agrupar_cji5(df_cji5, coluna_valor_correta, modo_agregacao):
+    chaves_cji5 = ['Definição do projeto', 'SC_ID_Key']
+    if modo_agregacao == 'legado':
+        agg_funcs = {
+            'Material': lambda x: ';\n'.join(x.unique()),
+            'Denominação': lambda x: ';\n'.join(x.unique()),
+            'Quantidade total': lambda x: ';\n'.join(x.astype(str)), # CORRIGIDO
+            coluna_valor_correta: 'sum',
+            'Nº doc.de referência': 'first'
+        }
+        df_agrupado = df_cji5.groupby(chaves_cji5).agg(agg_funcs).reset_index()
+    else:
+        df_cji5['Quantidade total'] = df_cji5['Quantidade total'].astype(str)
+        df_agrupado = df_cji5.groupby(chaves_cji5).agg({coluna_valor_correta: 'sum', 'Nº doc.de referência': 'first'})
+        df_agrupado.insert(0, 'Material', juntar_por_grupo(df_cji5, chaves_cji5, 'Material', ';\n'))
+        df_agrupado.insert(1, 'Denominação', juntar_por_grupo(df_cji5, chaves_cji5, 'Denominação', ';\n'))
+        df_agrupado.insert(2, 'Quantidade total', juntar_por_grupo(df_cji5, chaves_cji5, 'Quantidade total', ';\n', remover_duplicados=False))
+        df_agrupado = df_agrupado.reset_index()
+    return df_agrupado
+
+
+def _cruzar_srm(df_agrupado, df_srm, coluna_valor_correta):
+    df_srm['SC_ID_Key'] = normalizar_sc(df_srm['SC ID'])
+    df_srm.dropna(subset=['SC_ID_Key'], inplace=True)
+    df_srm['SC_ID_Key'] = df_srm['SC_ID_Key'].astype('int64')
+    df_srm = df_srm.drop_duplicates(subset=['SC_ID_Key'], keep='first')
+
+    df_final = pd.merge(df_agrupado,df_srm,on='SC_ID_Key',how='inner')
+
+    if 'Definição do projeto' in df_final.columns: df_final.rename(columns={'Definição do projeto': 'atuação do projeto'}, inplace=True)
+    if coluna_valor_correta in df_final.columns: df_final.rename(columns={coluna_valor_correta: 'Valor Total'}, inplace=True)
+
+    colunas_finais = ['atuação do projeto', 'SC ID', 'Material', 'Denominação', 'Quantidade total','Valor Total', 'Nº doc.de referência', 'Created On', 'SC Name','Next Approver', 'SC Approval status', 'Received on', 'Requester']
+    colunas_presentes = [col for col in colunas_finais if col in df_final.columns]
+    return df_final[colunas_presentes]
+
+
+def executar_lancamento_fim_py(df_lancamento, arquivo_lcp, arquivo_resumo, notificar=notificar_console, modo_agregacao='vetorizado', motor_leitura=None, cache=None, formatar_tudo=False, destino=None, medicoes=SEM_MEDICAO, modo_delta=False, snapshot=None, leituras=SEM_LEITURAS):
+    """Contém a lógica EXATA do seu LançamentoFIM.py.
+
+    Retorna os bytes da planilha de Gestão atualizada e o `RelatorioAtualizacao` com o que mudou.
+    Com `destino` (caminho ou arquivo binário), a planilha é exportada em streaming direto para
+    lá, sem carregar o workbook inteiro em memória, e o retorno é (destino, relatório).
+    Com `modo_delta`, o relatório traz o snapshot do resultado (`relatorio.snapshot`) e, se
+    `snapshot` for o do último processamento desta planilha, só as SCs novas ou alteradas
+    desde então são aplicadas e `relatorio.mudancas` diz o que mudou.
+    """
+    notificar('info', "▶️ Etapa 2: Processando `LançamentoFIM.py`...")
+    with medicoes.etapa("Etapa 2") as medicao_etapa:
+        resultado = _executar_etapa2(df_lancamento, arquivo_lcp, arquivo_resumo, notificar, modo_agregacao, motor_leitura, cache, formatar_tudo, destino, medicoes, modo_delta, snapshot, leituras)
+        medicao_etapa.linhas = len(df_lancamento)
+    notificar('sucesso', "✅ `LançamentoFIM.py` executado!")
+    return resultado
+
+
+def _executar_etapa2(df_lancamento, arquivo_lcp, arquivo_resumo, notificar, modo_agregacao, motor_leitura, cache, formatar_tudo, destino, medicoes, modo_delta, snapshot, leituras):
+    df_atualizacao, colunas_gerenciadas = preparar_atualizacao(df_lancamento, arquivo_lcp, modo_agregacao, motor_leitura, cache, medicoes, leituras)
+    return atualizar_gestao(df_atualizacao, colunas_gerenciadas, arquivo_resumo, notificar, formatar_tudo, destino, medicoes, modo_delta, snapshot, leituras)
+
+
+def preparar_atualizacao(df_lancamento, arquivo_lcp, modo_agregacao='vetorizado', motor_leitura=None, cache=None, medicoes=SEM_MEDICAO, leituras=SEM_LEITURAS):
+    """Parte da Etapa 2 que não depende da planilha de Gestão: nome do projeto pelo LCP e uma linha por (SC, WBS).
+
+    Retorna (df_atualizacao, colunas_gerenciadas), que podem ser aplicados em várias planilhas com `atualizar_gestao`.
+    """
+    # O mesmo catálogo atende o seletor de projetos do Avaliacao.py: cada versão do LCP é lida uma vez
+    with medicoes.etapa("Leitura LCP") as medicao:
+        df_lcp_essencial = obter_catalogo(arquivo_lcp, motor_leitura, cache).nomes_por_wbs(ler=lambda: leituras.obter('lcp', lambda: ler_lcp(arquivo_lcp, ABA_CAPEX, motor_leitura)))
+        medicao.linhas = len(df_lcp_essencial)
+    if not df_lancamento.empty:
+        # Chaves tipadas daqui até a planilha: SC inteiro e WBS categórico
+        df_lancamento['SC ID'] = normalizar_sc(df_lancamento['SC ID'])
+        df_lancamento['atuação do projeto'] = normalizar_wbs(df_lancamento['atuação do projeto'])
+        df_lancamento = df_lancamento.dropna(subset=['SC ID', 'atuação do projeto'])
+        df_lancamento = df_lancamento.assign(**{'SC ID': df_lancamento['SC ID'].astype('int64')})
+
+    with medicoes.etapa("Cruzamento com LCP") as medicao:
+        df_lancamento_enriquecido = pd.merge(df_lancamento, df_lcp_essencial, left_on='atuação do projeto', right_on='WBS', how='left')
+        medicao.linhas = len(df_lancamento_enriquecido)
+
+    with medicoes.etapa("Agrupamento por SC") as medicao:
+        df_atualizacao, colunas_gerenciadas = _agrupar_lancamento(df_lancamento_enriquecido, modo_agregacao)
+        medicao.linhas = len(df_atualizacao)
+    return df_atualizacao, colunas_gerenciadas
+
+
+def atualizar_gestao(df_atualizacao, colunas_gerenciadas, arquivo_resumo, notificar=notificar_console, formatar_tudo=False, destino=None, medicoes=SEM_MEDICAO, modo_delta=False, snapshot=None, leituras=SEM_LEITURAS, leitura_gestao='gestao'):
+    """Aplica o resultado de `preparar_atualizacao` numa planilha de Gestão (mesmo retorno de `executar_lancamento_fim_py`).
+
+    `leitura_gestao` é o nome com que a abertura desta planilha foi agendada em `leituras`, se foi.
+    """
+    snapshot_novo, mudancas = None, None
+    if modo_delta:
+        with medicoes.etapa("Comparação com o último processamento") as medicao:
+            snapshot_novo = criar_snapshot(df_atualizacao, colunas_gerenciadas)
+            df_atualizacao, mudancas = calcular_delta(df_atualizacao, snapshot_novo, snapshot)
+            medicao.linhas = len(df_atualizacao)
+        if mudancas is None:
+            notificar('info', "🔁 Modo delta: não há snapshot do último processamento com estas colunas gerenciadas (planilha nova ou editada nelas); todas as SCs serão aplicadas.")
+        else:
+            notificar('info', f"🔁 {mudancas.resumo()}")
+
+    if destino is not None:
+        with medicoes.etapa("Exportação em streaming") as medicao:
+            relatorio = exportar_streaming(arquivo_resumo, df_atualizacao, colunas_gerenciadas, destino)
+            medicao.linhas = relatorio.inseridas + relatorio.atualizadas
+        relatorio.mudancas, relatorio.snapshot = mudancas, snapshot_novo
+        notificar('info', f"📝 {relatorio.resumo()}")
+        return destino, relatorio
+
+    with medicoes.etapa("Abertura da planilha de Gestão") as medicao:
+        workbook = leituras.obter(leitura_gestao, lambda: load_workbook(arquivo_resumo))
+        sheet = workbook.active
+        medicao.linhas = sheet.max_row
+    with medicoes.etapa("Atualização (upsert)") as medicao:
+        relatorio = aplicar_atualizacao(sheet, df_atualizacao, colunas_gerenciadas)
+        medicao.linhas = relatorio.inseridas + relatorio.atualizadas
+    relatorio.mudancas, relatorio.snapshot = mudancas, snapshot_novo
+    notificar('info', f"📝 {relatorio.resumo()}")
+
+    # Formatação final: só o cabeçalho e as linhas inseridas/alteradas, a não ser que `formatar_tudo` seja pedido
+    with medicoes.etapa("Formatação") as medicao:
+        linhas = range(2, sheet.max_row + 1) if formatar_tudo else relatorio.linhas_atualizadas
+        formatar_planilha(workbook, sheet, linhas, relatorio.linhas_inseridas)
+        medicao.linhas = len(set(linhas) | set(relatorio.linhas_inseridas))
+
+    with medicoes.etapa("Gravação da planilha"):
+        virtual_workbook = io.BytesIO()
+        workbook.save(virtual_workbook)
+    return virtual_workbook.getvalue(), relatorio
+
+
+def _agrupar_lancamento(df_lancamento_enriquecido, modo_agregacao):
+    """Uma linha por (SC, WBS) com os nomes de coluna da planilha de Gestão."""
+    if not df_lancamento_enriquecido.empty and modo_agregacao == 'legado':
+        chaves_de_agrupamento = ['SC ID', 'atuação do projeto']
+        df_agrupado = df_lancamento_enriquecido.groupby(chaves_de_agrupamento, observed=True).agg({'Denominação': lambda x: '\n'.join(x.dropna().astype(str).unique()),'SC Name': 'first', 'Created On': 'first', 'Requester': 'first', 'Valor Total': 'first', 'Next Approver': 'first', 'Received on': 'first','PROJECT NAME': 'first'}).reset_index()
+    elif not df_lancamento_enriquecido.empty:
+        chaves_de_agrupamento = ['SC ID', 'atuação do projeto']
+        df_agrupado = df_lancamento_enriquecido.groupby(chaves_de_agrupamento, observed=True).agg({'SC Name': 'first', 'Created On': 'first', 'Requester': 'first', 'Valor Total': 'first', 'Next Approver': 'first', 'Received on': 'first','PROJECT NAME': 'first'})
+        # Grupos sem nenhuma denominação ficam com texto vazio, como no join original
+        df_denominacoes = df_lancamento_enriquecido.dropna(subset=['Denominação'])
+        df_denominacoes = df_denominacoes.assign(**{'Denominação': df_denominacoes['Denominação'].astype(str)})
+        conteudo = juntar_por_grupo(df_denominacoes, chaves_de_agrupamento, 'Denominação', '\n')
+        df_agrupado.insert(0, 'Denominação', conteudo.reindex(df_agrupado.index, fill_value=''))
+        df_agrupado = df_agrupado.reset_index()
+    else:
+        df_agrupado = pd.DataFrame()
+
+    df_atualizacao = df_agrupado.rename(columns=MAPA_COLUNAS)
+
+    if not df_atualizacao.empty:
+        # Garante que as colunas de data sejam do tipo datetime
+        for col_data in ['DATA CRIAÇÃO', 'RECEBIDA EM']:
+            if col_data in df_atualizacao.columns:
+                df_atualizacao[col_data] = pd.to_datetime(df_atualizacao[col_data], errors='coerce')
+    return df_atualizacao, list(COLUNAS_GERENCIADAS)
+
+
+def executar_automacao(arquivo_cji5, arquivo_srm, arquivo_lcp, arquivo_resumo, notificar=notificar_console, modo_agregacao='vetorizado', motor_leitura=None, cache=None, formatar_tudo=False, destino=None, medicoes=SEM_MEDICAO, modo_delta=False, snapshot=None, executor=None):
+    """Roda as duas etapas em sequência.
+
+    Com um `executor` (ver `leitura_paralela.criar_executor`) as planilhas de entrada são lidas em
+    paralelo logo no início, em vez de uma depois da outra.
+    Retorna (bytes da planilha de Gestão atualizada ou `destino`, RelatorioAtualizacao) ou None se a primeira etapa não gerou dados.
+    """
+    with LeiturasParalelas(executor) as leituras:
+        agendar_leituras(leituras, arquivo_cji5, arquivo_srm, arquivo_lcp, arquivo_resumo, modo_agregacao, motor_leitura, cache, streaming=destino is not None)
+        df_intermediario = executar_planilhas_py(arquivo_cji5, arquivo_srm, notificar, modo_agregacao, motor_leitura, cache, medicoes, leituras)
+        if df_intermediario is None or df_intermediario.empty:
+            return None
+        return executar_lancamento_fim_py(df_intermediario, arquivo_lcp, arquivo_resumo, notificar, modo_agregacao, motor_leitura, cache, formatar_tudo, destino, medicoes, modo_delta, snapshot, leituras)
+
+
+def fases_previstas(streaming=False, modo_delta=False, planilhas=None):
+    """Quantas fases a `Instrumentacao` registra numa execução completa (para mostrar o progresso).
+
+    Com `planilhas` (distribuição em várias planilhas de Gestão), cada uma tem mais uma fase que agrupa as suas.
+    """
+    # Etapa 1 + 5 fases internas, Etapa 2 + 3 fases internas, e a gravação (1 em streaming, 4 com openpyxl)
+    por_planilha = (1 if modo_delta else 0) + (1 if streaming else 4)
+    if planilhas is None:
+        return 6 + 4 + por_planilha
+    return 6 + 4 + planilhas * (1 + por_planilha)
+
+
+def agendar_leituras(leituras, arquivo_cji5, arquivo_srm, arquivo_lcp, arquivo_resumo, modo_agregacao='vetorizado', motor_leitura=None, cache=None, streaming=False):
+    """Dispara em paralelo as leituras que as etapas vão precisar (as que o cache já tem ficam de fora).
+
+    Cji5, SRM e a aba Capex do LCP vão para os processos do pool; a planilha de Gestão é aberta
+    numa thread deste processo, porque o workbook é alterado e salvo aqui (no streaming ela é
+    lida pela própria exportação).
+    """
+    if leituras.executor is None:
+        return
+    if cache is None:
+        leituras.agendar('cji5', ler_cji5, arquivo_cji5, motor_leitura)
+        leituras.agendar('srm', ler_srm, arquivo_srm, motor_leitura)
+    else:
+        chave_cji5, chave_srm, chave_resultado = _chaves_etapa1(cache, arquivo_cji5, arquivo_srm, motor_leitura, modo_agregacao)
+        if not cache.contem(chave_resultado):
+            if not cache.contem(chave_cji5):
+                leituras.agendar('cji5', ler_cji5, arquivo_cji5, motor_leitura)
+            if not cache.contem(chave_srm):
+                leituras.agendar('srm', ler_srm, arquivo_srm, motor_leitura)
+    if obter_catalogo(arquivo_lcp, motor_leitura, cache).precisa_ler(ABA_CAPEX):
+        leituras.agendar('lcp', ler_lcp, arquivo_lcp, ABA_CAPEX, motor_leitura)
+    if arquivo_resumo is not None and not streaming:
+        leituras.agendar_local('gestao', load_workbook, arquivo_resumo)
+
+
+# --- 4. LINHA DE COMANDO ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Atualiza a planilha de Gestão de SC em aberto a partir dos arquivos do dia.")
+    parser.add_argument('--cji5', required=True, help="Caminho do resultado_cji5.xlsx")
+    parser.add_argument('--srm', required=True, help="Caminho do DADOS_SRM.xlsx")
+    parser.add_argument('--lcp', required=True, help="Caminho do BUSCAR_LCP.xlsx")
+    parser.add_argument('--gestao', required=True, nargs='+', help="Planilha de Gestão a ser atualizada (várias: cada uma é atualizada com uma única leitura das entradas)")
+    parser.add_argument('-o', '--saida', help="Arquivo de saída (padrão: '<gestao>_ATUALIZADA.xlsx' na mesma pasta)")
+    parser.add_argument('--agregacao', choices=MODOS_AGREGACAO, default='vetorizado', help="Caminho de agregação ('legado' usa as lambdas originais, para comparação)")
+    parser.add_argument('--motor-leitura', choices=MOTORES_LEITURA, help="Motor usado para ler os xlsx de entrada (padrão: calamine se instalado, senão openpyxl)")
+    parser.add_argument('--diretorio-cache', default=str(DIRETORIO_CACHE), help="Pasta do cache das planilhas de entrada já processadas")
+    parser.add_argument('--sem-cache', action='store_true', help="Reprocessa todos os arquivos, sem consultar nem gravar o cache")
+    parser.add_argument('--formatar-tudo', action='store_true', help="Reaplica a formatação em todas as linhas (por padrão só nas inseridas/alteradas)")
+    parser.add_argument('--streaming', action='store_true', help="Grava a saída em streaming (write-only), com memória quase constante para planilhas muito grandes")
+    parser.add_argument('--log-desempenho', default=str(ARQUIVO_LOG), help="Arquivo JSON lines onde o tempo, as linhas e o pico de RSS (e a memória da fase, com --medir-memoria) de cada fase são acrescentados")
+    parser.add_argument('--delta', action='store_true', help="Aplica só as SCs que mudaram desde o último processamento (snapshot '<gestao>.snapshot.json.gz' ao lado da planilha, o mesmo para '<gestao>_ATUALIZADA.xlsx') e grava o resumo do que mudou")
+    parser.add_argument('--sem-desempenho', action='store_true', help="Não mede as fases nem grava o log de desempenho")
+    parser.add_argument('--medir-memoria', action='store_true', help="Também mede o pico de memória da própria fase com o tracemalloc (bem mais lento; padrão: variável FOLLOWUP_MEDIR_MEMORIA)")
+    parser.add_argument('--rotas', help="JSON com a regra de cada planilha de Gestão: {\"arquivo.xlsx\": {\"wbs\": [prefixos], \"requisitantes\": [nomes]}}; planilhas sem regra recebem todas as SCs")
+    parser.add_argument('--zip', help="Também grava as planilhas atualizadas (e as listas de mudanças) neste arquivo zip")
+    parser.add_argument('--trabalhadores', type=int, default=TRABALHADORES_PADRAO, help="Processos que leem as planilhas de entrada em paralelo (1 = leitura sequencial; padrão: variável FOLLOWUP_TRABALHADORES ou até 3)")
+    args = parser.parse_args(argv)
+    if len(args.gestao) > 1 or args.rotas or args.zip:
+        if args.saida:
+            parser.error("-o/--saida vale para uma planilha só; na distribuição cada planilha é salva como '<gestao>_ATUALIZADA.xlsx' ao lado dela.")
+        return _main_distribuicao(args)
+
+    caminho_gestao = Path(args.gestao[0])
+    caminho_saida = Path(args.saida) if args.saida else caminho_gestao.with_name(f"{caminho_gestao.stem}_ATUALIZADA.xlsx")
+
+    cache = None if args.sem_cache else CacheEntradas(args.diretorio_cache)
+    medicoes = SEM_MEDICAO if args.sem_desempenho else Instrumentacao('motor_sc', medir_memoria=args.medir_memoria or None)
+    snapshot = carregar_snapshot(caminho_snapshot(caminho_gestao), caminho_gestao, COLUNAS_GERENCIADAS, notificar_console) if args.delta else None
+    executor = criar_executor(args.trabalhadores)
+    try:
+        resultado = executar_automacao(args.cji5, args.srm, args.lcp, caminho_gestao, modo_agregacao=args.agregacao, motor_leitura=args.motor_leitura, cache=cache, formatar_tudo=args.formatar_tudo, destino=caminho_saida if args.streaming else None, medicoes=medicoes, modo_delta=args.delta, snapshot=snapshot, executor=executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if cache is not None:
+        notificar_console('info', cache.resumo())
+    if medicoes.ativa:
+        notificar_console('info', f"⏱️ Desempenho ({medicoes.total_segundos:.2f} s):\n{medicoes.tabela().to_string(index=False)}")
+        medicoes.gravar_log(args.log_desempenho, motor_leitura=args.motor_leitura or MOTOR_PADRAO, streaming=args.streaming, trabalhadores=args.trabalhadores)
+    if resultado is None:
+        notificar_console('aviso', "A primeira etapa não gerou dados para lançamento. Verifique os arquivos de entrada.")
+        return 1
+
+    dados_finais, relatorio = resultado
+    if not args.streaming:
+        caminho_saida.write_bytes(dados_finais)
+    if args.delta:
+        # Grava no mesmo snapshot que foi lido, vinculado às colunas gerenciadas da planilha gerada: vale na próxima
+        # execução sobre ela (ou sobre a original, se ela for substituída pela gerada)
+        gravar_snapshot(relatorio.snapshot, caminho_snapshot(caminho_gestao), assinatura_planilha(caminho_saida, COLUNAS_GERENCIADAS))
+        if relatorio.mudancas is not None:
+            caminho_mudancas = caminho_saida.with_name(f"{caminho_saida.stem}_MUDANCAS.csv")
+            relatorio.mudancas.tabela().to_csv(caminho_mudancas, index=False, encoding='utf-8-sig')
+            notificar_console('info', f"🔁 Lista do que mudou salva em '{caminho_mudancas}'.")
+    notificar_console('sucesso', f"🎉 Planilha atualizada salva em '{caminho_saida}'.")
+    return 0
+
+
+def _main_distribuicao(args):
+    # Importado aqui porque `distribuicao` usa as funções deste módulo
+    from distribuicao import PlanilhaEquipe, compactar_resultados, executar_distribuicao, ler_rotas, nome_saida
+
+    rotas = ler_rotas(args.rotas) if args.rotas else {}
+    planilhas = []
+    for caminho in map(Path, args.gestao):
+        prefixos_wbs, requisitantes = rotas.get(caminho.name, ([], []))
+        planilha = PlanilhaEquipe(caminho.name, caminho, prefixos_wbs, requisitantes)
+        planilha.snapshot = carregar_snapshot(caminho_snapshot(caminho), caminho, COLUNAS_GERENCIADAS, notificar_console) if args.delta else None
+        planilha.destino = caminho.with_name(nome_saida(planilha)) if args.streaming else None
+        planilhas.append(planilha)
+
+    cache = None if args.sem_cache else CacheEntradas(args.diretorio_cache)
+    medicoes = SEM_MEDICAO if args.sem_desempenho else Instrumentacao('motor_sc', medir_memoria=args.medir_memoria or None)
+    executor = criar_executor(args.trabalhadores)
+    try:
+        resultados = executar_distribuicao(args.cji5, args.srm, args.lcp, planilhas, modo_agregacao=args.agregacao, motor_leitura=args.motor_leitura, cache=cache, formatar_tudo=args.formatar_tudo, medicoes=medicoes, modo_delta=args.delta, executor=executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if cache is not None:
+        notificar_console('info', cache.resumo())
+    if medicoes.ativa:
+        notificar_console('info', f"⏱️ Desempenho ({medicoes.total_segundos:.2f} s):\n{medicoes.tabela().to_string(index=False)}")
+        medicoes.gravar_log(args.log_desempenho, motor_leitura=args.motor_leitura or MOTOR_PADRAO, streaming=args.streaming, trabalhadores=args.trabalhadores, planilhas=len(planilhas))
+    if resultados is None:
+        notificar_console('aviso', "A primeira etapa não gerou dados para lançamento. Verifique os arquivos de entrada.")
+        return 1
+
+    for resultado in resultados:
+        caminho_saida = resultado.planilha.arquivo.with_name(nome_saida(resultado.planilha))
+        if not args.streaming:
+            caminho_saida.write_bytes(resultado.dados)
+        if args.delta:
+            gravar_snapshot(resultado.relatorio.snapshot, caminho_snapshot(resultado.planilha.arquivo), assinatura_planilha(caminho_saida, COLUNAS_GERENCIADAS))
+            if resultado.relatorio.mudancas is not None:
+                resultado.relatorio.mudancas.tabela().to_csv(caminho_saida.with_name(f"{caminho_saida.stem}_MUDANCAS.csv"), index=False, encoding='utf-8-sig')
+        notificar_console('sucesso', f"🎉 Planilha atualizada salva em '{caminho_saida}'.")
+    if args.zip:
+        Path(args.zip).write_bytes(compactar_resultados(resultados))
+        notificar_console('info', f"🗜️ Zip com as {len(resultados)} planilha(s) salvo em '{args.zip}'.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,429 @@
+"""Operações na planilha de Gestão de SC em aberto (aba ativa do workbook do openpyxl).
+
+A atualização é feita em bloco: a aba é lida uma única vez para um DataFrame
+indexado por (SC, WBS), cruzada com os dados novos e só as células cujo valor
+realmente mudou são escritas. As SCs novas são acrescentadas no fim da aba.
+
+A formatação só é aplicada ao cabeçalho e às linhas inseridas ou alteradas.
+As linhas novas recebem estilos nomeados compartilhados (registrados uma vez no
+workbook); nas linhas que já existiam só a borda, o alinhamento e o formato de
+VALOR e das datas são definidos, para não apagar o preenchimento, a fonte e os
+formatos que os usuários aplicaram à mão.
+
+Para planilhas muito grandes há também a exportação em streaming
+(`exportar_streaming`), que lê a planilha em modo read-only e reescreve o
+workbook em modo write-only, sem manter as células em memória.
+"""
+import math
+import posixpath
+import zipfile
+from xml.etree import ElementTree
+from dataclasses import dataclass, field
+from numbers import Real
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Border, Side, Alignment, Font, PatternFill, NamedStyle
+from openpyxl.utils import get_column_letter
+
+from chaves import normalizar_sc, sc_como_texto
+
+
+PREFIXO_ANTERIOR = '__anterior__ '
+# O xlsx guarda números com 15 dígitos significativos, então o valor lido de volta pode diferir no último dígito
+TOLERANCIA_NUMERICA = 1e-14
+
+
+def _mesmo_numero(novo, anterior):
+    numeros = isinstance(novo, Real) and isinstance(anterior, Real) and not isinstance(novo, bool) and not isinstance(anterior, bool)
+    return numeros and math.isclose(novo, anterior, rel_tol=TOLERANCIA_NUMERICA)
+
+
+@dataclass
+class RelatorioAtualizacao:
+    """O que a atualização fez na aba: contagens por linha e a lista de células alteradas."""
+    inseridas: int = 0
+    atualizadas: int = 0
+    inalteradas: int = 0
+    linhas_inseridas: list = field(default_factory=list)
+    linhas_atualizadas: list = field(default_factory=list)
+    # Tuplas (linha, coluna, valor anterior, valor novo), com o nome da coluna como no cabeçalho
+    celulas_alteradas: list = field(default_factory=list)
+    # Só no modo delta: o que mudou desde o último processamento (delta_sc.RelatorioDelta) e o snapshot novo (delta_sc.Snapshot)
+    mudancas: object = None
+    snapshot: object = None
+
+    def resumo(self):
+        return f"{self.inseridas} SC(s) nova(s), {self.atualizadas} atualizada(s) e {self.inalteradas} sem alteração ({len(self.celulas_alteradas)} célula(s) alterada(s))."
+
+
+def mapear_colunas(sheet):
+    """Cabeçalhos da primeira linha e o mapa nome -> número da coluna (1-based)."""
+    headers = list(next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), ()))
+    return headers, {name: i+1 for i, name in enumerate(headers)}
+
+
+def ler_linhas_existentes(linhas_valores, col_map, colunas):
+    """Lê as linhas de dados (tuplas de valores a partir da 2ª linha) para um DataFrame (dtype object)
+    com as chaves, o número da linha e `colunas`.
+
+    As chaves seguem a regra antiga do key_row_map: linhas sem SC ou sem WBS ficam de fora e,
+    se a mesma chave aparecer mais de uma vez, vale a última linha. O SC da célula vira inteiro
+    (`chaves.normalizar_sc`), seja ele texto ou número, então '130000000', 130000000 e
+    130000000.0 são a mesma SC.
+    """
+    posicoes = {nome: col_map[nome] - 1 for nome in colunas if nome in col_map}
+    indice_sc = col_map['SC'] - 1; indice_wbs = col_map['WBS'] - 1
+    dados = {'_sc': [], '_wbs': [], '_linha': []}
+    dados.update({PREFIXO_ANTERIOR + nome: [] for nome in posicoes})
+    for numero_linha, valores in enumerate(linhas_valores, start=2):
+        valor_sc = valores[indice_sc] if indice_sc < len(valores) else None
+        valor_wbs = valores[indice_wbs] if indice_wbs < len(valores) else None
+        dados['_sc'].append(valor_sc)
+        dados['_wbs'].append(str(valor_wbs or '').strip())
+        dados['_linha'].append(numero_linha)
+        for nome, posicao in posicoes.items():
+            dados[PREFIXO_ANTERIOR + nome].append(valores[posicao] if posicao < len(valores) else None)
+
+    df_existente = pd.DataFrame(dados, dtype=object)
+    df_existente['_sc'] = normalizar_sc(df_existente['_sc'])
+    df_existente = df_existente[df_existente['_sc'].notna() & (df_existente['_wbs'] != '')]
+    df_existente['_sc'] = df_existente['_sc'].astype('int64')
+    return df_existente.drop_duplicates(subset=['_sc', '_wbs'], keep='last')
+
+
+def calcular_atualizacao(linhas_valores, headers, df_atualizacao, colunas_gerenciadas):
+    """Compara os dados novos com as linhas da aba sem escrever nada.
+
+    `df_atualizacao['SC']` traz as chaves inteiras (`chaves.normalizar_sc`); o texto só é
+    montado para as células que serão escritas.
+
+    Retorna o `RelatorioAtualizacao` (ainda sem os números das linhas inseridas) e a lista
+    de linhas novas, já na ordem do cabeçalho.
+    """
+    col_map = {name: i+1 for i, name in enumerate(headers)}
+    if not col_map.get('SC') or not col_map.get('WBS'): raise ValueError("Colunas 'SC' e 'WBS' devem existir.")
+    relatorio = RelatorioAtualizacao()
+    if df_atualizacao.empty:
+        return relatorio, []
+
+    colunas_escritas = [nome for nome in colunas_gerenciadas if nome in col_map and nome in df_atualizacao.columns]
+    df_existente = ler_linhas_existentes(linhas_valores, col_map, colunas_escritas)
+
+    df_novo = df_atualizacao.astype(object).reset_index(drop=True)
+    # dtype object explícito: o pandas inferiria 'str', que não pode ser comparado com SCs numéricas lidas das células
+    df_novo['SC'] = pd.Series(sc_como_texto(df_atualizacao['SC']).to_numpy(), index=df_novo.index, dtype=object)
+    df_novo['_sc'] = df_atualizacao['SC'].to_numpy(dtype='int64')
+    df_novo['_wbs'] = df_atualizacao['WBS'].astype(str).to_numpy()
+    df_cruzado = df_novo.merge(df_existente, on=['_sc', '_wbs'], how='left')
+    existe = df_cruzado['_linha'].notna()
+
+    # Linhas já presentes: compara coluna a coluna e guarda apenas as células diferentes
+    df_existentes = df_cruzado[existe]
+    linhas = df_existentes['_linha'].astype(int).to_numpy()
+    linhas_alteradas = set()
+    for nome in colunas_escritas:
+        novo = df_existentes[nome]; anterior = df_existentes[PREFIXO_ANTERIOR + nome]
+        iguais = novo.eq(anterior) | (novo.isna() & anterior.isna())
+        for posicao in (~iguais).to_numpy().nonzero()[0]:
+            linha = int(linhas[posicao]); valor = novo.iat[posicao]
+            if _mesmo_numero(valor, anterior.iat[posicao]):
+                continue
+            relatorio.celulas_alteradas.append((linha, nome, anterior.iat[posicao], valor))
+            linhas_alteradas.add(linha)
+    relatorio.linhas_atualizadas = sorted(linhas_alteradas)
+    relatorio.atualizadas = len(relatorio.linhas_atualizadas)
+    relatorio.inalteradas = len(set(linhas.tolist()) - linhas_alteradas)
+
+    # SCs novas: monta todas as linhas de uma vez, na ordem do cabeçalho
+    df_novas = df_cruzado[~existe]
+    valores_por_coluna = [df_novas[nome].tolist() if nome in df_atualizacao.columns else [None] * len(df_novas) for nome in headers]
+    linhas_novas = [list(valores) for valores in zip(*valores_por_coluna, strict=True)]
+    relatorio.inseridas = len(linhas_novas)
+    return relatorio, linhas_novas
+
+
+def aplicar_atualizacao(sheet, df_atualizacao, colunas_gerenciadas):
+    """Atualiza (SC, WBS) já existentes e acrescenta as novas, escrevendo só o que mudou.
+
+    Retorna um `RelatorioAtualizacao`.
+    """
+    headers, col_map = mapear_colunas(sheet)
+    linhas_valores = sheet.iter_rows(min_row=2, max_row=sheet.max_row, values_only=True)
+    relatorio, linhas_novas = calcular_atualizacao(linhas_valores, headers, df_atualizacao, colunas_gerenciadas)
+
+    for linha, nome, _, valor in relatorio.celulas_alteradas:
+        sheet.cell(row=linha, column=col_map[nome]).value = valor
+    for valores in linhas_novas:
+        sheet.append(valores)
+    if linhas_novas:
+        relatorio.linhas_inseridas = list(range(sheet.max_row - len(linhas_novas) + 1, sheet.max_row + 1))
+    return relatorio
+
+
+# --- FORMATAÇÃO ---
+COLUNAS_COM_QUEBRA = ['DESCRIÇÃO', 'CONTEÚDO']
+COLUNAS_DATA = ['DATA CRIAÇÃO', 'RECEBIDA EM']
+COLUNA_MOEDA = 'VALOR'
+FORMATO_MOEDA = 'R$ #,##0.00'
+FORMATO_DATA = 'DD/MM/YYYY'
+LARGURAS = {'SC': 15, 'WBS': 25, 'PROJETO': 45, 'DESCRIÇÃO': 45, 'CONTEÚDO': 50, 'VALOR': 18, 'DATA CRIAÇÃO': 18, 'REQUISITANTE': 25, 'RECEBIDA EM': 18, 'PENDENTE COM': 25, 'STATUS': 15, 'OK': 10, 'COMENTARIO': 50, 'Complemento dos materiais': 50}
+
+ESTILO_CABECALHO = 'FollowUP Cabeçalho'
+ESTILO_TEXTO = 'FollowUP Texto'
+ESTILO_TEXTO_COM_QUEBRA = 'FollowUP Texto com quebra'
+ESTILO_MOEDA = 'FollowUP Moeda'
+ESTILO_DATA = 'FollowUP Data'
+
+
+# Objetos compartilhados: o openpyxl guarda cada combinação uma vez só no workbook
+FONTE_CABECALHO = Font(bold=True, color="FFFFFF")
+PREENCHIMENTO_CABECALHO = PatternFill(start_color="002D62", end_color="002D62", fill_type="solid")
+BORDA_FINA = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+ALINHAMENTO_SEM_QUEBRA = Alignment(horizontal='center', vertical='center')
+ALINHAMENTO_COM_QUEBRA = Alignment(horizontal='center', vertical='center', wrap_text=True)
+
+
+def _criar_estilos():
+    return [
+        NamedStyle(name=ESTILO_CABECALHO, font=FONTE_CABECALHO, fill=PREENCHIMENTO_CABECALHO, border=BORDA_FINA, alignment=ALINHAMENTO_SEM_QUEBRA),
+        NamedStyle(name=ESTILO_TEXTO, border=BORDA_FINA, alignment=ALINHAMENTO_SEM_QUEBRA),
+        NamedStyle(name=ESTILO_TEXTO_COM_QUEBRA, border=BORDA_FINA, alignment=ALINHAMENTO_COM_QUEBRA),
+        NamedStyle(name=ESTILO_MOEDA, border=BORDA_FINA, alignment=ALINHAMENTO_SEM_QUEBRA, number_format=FORMATO_MOEDA),
+        NamedStyle(name=ESTILO_DATA, border=BORDA_FINA, alignment=ALINHAMENTO_SEM_QUEBRA, number_format=FORMATO_DATA),
+    ]
+
+
+def registrar_estilos(workbook):
+    """Registra os estilos nomeados no workbook (uma vez só; planilhas já formatadas reaproveitam os que existem)."""
+    existentes = set(workbook.named_styles)
+    for estilo in _criar_estilos():
+        if estilo.name not in existentes:
+            workbook.add_named_style(estilo)
+
+
+def _estilo_da_celula(header, valor):
+    if header in COLUNAS_COM_QUEBRA:
+        return ESTILO_TEXTO_COM_QUEBRA
+    if header == COLUNA_MOEDA and isinstance(valor, (int, float)):
+        return ESTILO_MOEDA
+    if header in COLUNAS_DATA and valor:
+        return ESTILO_DATA
+    return ESTILO_TEXTO
+
+
+def _ajustar_cabecalho(cell):
+    cell.font = FONTE_CABECALHO; cell.fill = PREENCHIMENTO_CABECALHO; cell.border = BORDA_FINA; cell.alignment = ALINHAMENTO_SEM_QUEBRA
+
+
+def _ajustar_celula(header, cell):
+    """Borda, alinhamento e, em VALOR e nas datas, o formato do número; o resto do estilo da célula fica como está."""
+    cell.border = BORDA_FINA
+    cell.alignment = ALINHAMENTO_COM_QUEBRA if header in COLUNAS_COM_QUEBRA else ALINHAMENTO_SEM_QUEBRA
+    if header == COLUNA_MOEDA and isinstance(cell.value, (int, float)):
+        cell.number_format = FORMATO_MOEDA
+    elif header in COLUNAS_DATA and cell.value:
+        cell.number_format = FORMATO_DATA
+
+
+def formatar_planilha(workbook, sheet, linhas=(), linhas_novas=()):
+    """Formata o cabeçalho, as larguras e as `linhas` de dados informadas (normalmente as alteradas
+    e as inseridas pela atualização; para reformatar a aba inteira, passe todas).
+
+    As `linhas_novas` (acrescentadas pela atualização) recebem os estilos nomeados; as demais só
+    têm borda, alinhamento e formatos de VALOR/data ajustados (`_ajustar_celula`).
+    """
+    registrar_estilos(workbook)
+    headers, col_map = mapear_colunas(sheet)
+
+    sheet.row_dimensions[1].height = 25
+    for coluna in range(1, len(headers) + 1):
+        _ajustar_cabecalho(sheet.cell(row=1, column=coluna))
+
+    linhas_novas = set(linhas_novas)
+    for numero_linha in sorted(set(linhas) | linhas_novas):
+        # sheet.cell em vez de sheet[linha]: este recalcula max_column (varrendo todas as células) a cada linha
+        for coluna, header in enumerate(headers, start=1):
+            cell = sheet.cell(row=numero_linha, column=coluna)
+            if numero_linha in linhas_novas:
+                cell.style = _estilo_da_celula(header, cell.value)
+            else:
+                _ajustar_celula(header, cell)
+
+    for col_name, width in LARGURAS.items():
+        if col_name in col_map:
+            sheet.column_dimensions[get_column_letter(col_map[col_name])].width = width
+
+
+# --- EXPORTAÇÃO EM STREAMING ---
+
+NS_PLANILHA = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_RELACOES = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PACOTE = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+@dataclass
+class LayoutAba:
+    """O que o modo read-only do openpyxl não expõe e a exportação copia: larguras, filtro e painéis congelados."""
+    larguras: dict = field(default_factory=dict)
+    filtro: str = None
+    paineis: str = None
+
+
+def _relacoes(pacote, caminho_parte):
+    """Id -> caminho no zip das partes ligadas a `caminho_parte` ('' para o próprio pacote), pelo arquivo _rels dela."""
+    pasta, nome = posixpath.split(caminho_parte)
+    raiz = ElementTree.fromstring(pacote.read(posixpath.join(pasta, '_rels', f'{nome}.rels')))
+    relacoes = {}
+    for relacao in raiz.iter(NS_PACOTE + 'Relationship'):
+        alvo = relacao.get('Target')
+        # Alvos com '/' no começo são relativos à raiz do pacote; os outros, à pasta da parte
+        relacoes[relacao.get('Id')] = (relacao.get('Type'), posixpath.normpath(alvo[1:] if alvo.startswith('/') else posixpath.join(pasta, alvo)))
+    return relacoes
+
+
+def _ler_layouts(arquivo):
+    """`LayoutAba` de cada aba (pelo nome), lido direto do pacote xlsx.
+
+    O modo read-only do openpyxl não tem API pública para esses dados, então o xlsx é aberto
+    como zip e o XML de cada aba é localizado pelo workbook.xml e pelas relações dele.
+    """
+    with zipfile.ZipFile(arquivo) as pacote:
+        caminho_workbook = next(alvo for tipo, alvo in _relacoes(pacote, '').values() if tipo.endswith('/officeDocument'))
+        relacoes = _relacoes(pacote, caminho_workbook)
+        layouts = {}
+        for aba in ElementTree.fromstring(pacote.read(caminho_workbook)).iter(NS_PLANILHA + 'sheet'):
+            with pacote.open(relacoes[aba.get(NS_RELACOES + 'id')][1]) as fonte:
+                layouts[aba.get('name')] = _ler_layout(fonte)
+    return layouts
+
+
+def _ler_layout(fonte):
+    """Lê as larguras das colunas, o autofiltro e os painéis congelados do XML de uma aba, em streaming."""
+    layout = LayoutAba()
+    dados = None
+    # Cada linha é descartada assim que termina: a memória não cresce com o tamanho da aba
+    for evento, elemento in ElementTree.iterparse(fonte, events=('start', 'end')):
+        if evento == 'end':
+            if elemento.tag == NS_PLANILHA + 'row' and dados is not None:
+                dados.clear()
+            continue
+        if elemento.tag == NS_PLANILHA + 'sheetData':
+            dados = elemento
+        elif elemento.tag == NS_PLANILHA + 'pane' and layout.paineis is None and elemento.get('state') in ('frozen', 'frozenSplit'):
+            layout.paineis = elemento.get('topLeftCell')
+        elif elemento.tag == NS_PLANILHA + 'col' and elemento.get('width') is not None:
+            for coluna in range(int(elemento.get('min')), int(elemento.get('max')) + 1):
+                layout.larguras[get_column_letter(coluna)] = float(elemento.get('width'))
+        elif elemento.tag == NS_PLANILHA + 'autoFilter':
+            layout.filtro = elemento.get('ref')
+    return layout
+
+
+def _aplicar_layout(nova, layout):
+    for letra, largura in layout.larguras.items():
+        nova.column_dimensions[letra].width = largura
+    if layout.filtro:
+        nova.auto_filter.ref = layout.filtro
+    if layout.paineis:
+        nova.freeze_panes = layout.paineis
+
+
+def _copiar_celula(sheet, origem, valor):
+    """Célula write-only com `valor` e o estilo da célula lida (fonte, preenchimento, borda, alinhamento, formato e proteção)."""
+    cell = WriteOnlyCell(sheet, value=valor)
+    if getattr(origem, 'has_style', False):
+        cell.font = origem.font; cell.fill = origem.fill; cell.border = origem.border
+        cell.alignment = origem.alignment; cell.number_format = origem.number_format; cell.protection = origem.protection
+    return cell
+
+
+def _copiar_linha(sheet, celulas, tamanho=0, alteracoes=None):
+    """Células lidas copiadas com o estilo, completadas com vazias até `tamanho` e com os valores de `alteracoes` (índice -> valor)."""
+    alteracoes = alteracoes or {}
+    tamanho = max(tamanho, len(celulas), max(alteracoes, default=-1) + 1)
+    linha = []
+    for indice in range(tamanho):
+        origem = celulas[indice] if indice < len(celulas) else None
+        linha.append(_copiar_celula(sheet, origem, alteracoes.get(indice, getattr(origem, 'value', None))))
+    return linha
+
+
+def _linha_existente(sheet, headers, celulas, alteracoes):
+    """Linha já presente na aba: estilo original, com borda, alinhamento e formatos de VALOR/data ajustados como em `formatar_planilha`."""
+    linha = _copiar_linha(sheet, celulas, len(headers), alteracoes)
+    for header, cell in zip(headers, linha, strict=False):  # a linha pode ter células além do cabeçalho
+        _ajustar_celula(header, cell)
+    return linha
+
+
+def _linha_formatada(sheet, headers, valores):
+    valores = list(valores) + [None] * (len(headers) - len(valores))
+    celulas = []
+    for header, valor in zip(headers + [None] * (len(valores) - len(headers)), valores, strict=True):
+        cell = WriteOnlyCell(sheet, value=valor)
+        cell.style = _estilo_da_celula(header, valor)
+        celulas.append(cell)
+    return celulas
+
+
+def exportar_streaming(arquivo_resumo, df_atualizacao, colunas_gerenciadas, destino):
+    """Aplica a atualização reconstruindo o workbook em modo write-only e grava em `destino` (caminho ou arquivo binário).
+
+    O resultado é o mesmo da atualização em memória com todas as linhas formatadas: valores,
+    fórmulas e estilos das células de todas as abas são copiados (inclusive as colunas preenchidas
+    pelos usuários e os formatos de data fora de DATA CRIAÇÃO/RECEBIDA EM), assim como as larguras
+    das colunas, o autofiltro e os painéis congelados. Na aba ativa, o cabeçalho e as linhas
+    existentes recebem borda, alinhamento e os formatos de VALOR/data, e as linhas novas os
+    estilos nomeados. Células mescladas, validações, formatação condicional e alturas de linha
+    não são copiadas. Retorna o `RelatorioAtualizacao`.
+    """
+    if hasattr(arquivo_resumo, 'seek'):
+        arquivo_resumo.seek(0)
+    layouts = _ler_layouts(arquivo_resumo)
+    if hasattr(arquivo_resumo, 'seek'):
+        arquivo_resumo.seek(0)
+    entrada = load_workbook(arquivo_resumo, read_only=True)
+    try:
+        sheet = entrada.active
+        sheet.reset_dimensions()
+        headers, col_map = mapear_colunas(sheet)
+        relatorio, linhas_novas = calcular_atualizacao(sheet.iter_rows(min_row=2, values_only=True), headers, df_atualizacao, colunas_gerenciadas)
+        alteracoes = {}
+        for linha, nome, _, valor in relatorio.celulas_alteradas:
+            alteracoes.setdefault(linha, {})[col_map[nome] - 1] = valor
+
+        saida = Workbook(write_only=True)
+        registrar_estilos(saida)
+        for aba in entrada.worksheets:
+            nova = saida.create_sheet(aba.title)
+            _aplicar_layout(nova, layouts.get(aba.title, LayoutAba()))
+            aba.reset_dimensions()
+            if aba is not sheet:
+                for celulas in aba.iter_rows():
+                    nova.append(_copiar_linha(nova, celulas))
+                continue
+
+            for col_name, width in LARGURAS.items():
+                if col_name in col_map:
+                    nova.column_dimensions[get_column_letter(col_map[col_name])].width = width
+            nova.row_dimensions[1].height = 25
+            linhas = sheet.iter_rows()
+            cabecalho = _copiar_linha(nova, next(linhas, ()), len(headers))
+            for cell in cabecalho[:len(headers)]:
+                _ajustar_cabecalho(cell)
+            nova.append(cabecalho)
+
+            ultima_linha = 1
+            for ultima_linha, celulas in enumerate(linhas, start=2):
+                nova.append(_linha_existente(nova, headers, celulas, alteracoes.get(ultima_linha, {})))
+            for valores in linhas_novas:
+                nova.append(_linha_formatada(nova, headers, valores))
+            relatorio.linhas_inseridas = list(range(ultima_linha + 1, ultima_linha + 1 + len(linhas_novas)))
+
+        saida.active = entrada.worksheets.index(sheet)
+        saida.save(destino)
+    finally:
+        entrada.close()
+    return relatorio
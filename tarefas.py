@@ -0,0 +1,153 @@
+"""Fila de execuções em segundo plano para o botão de automação do app.
+
+O clique em "Gerar Relatório" só envia a execução para esta fila e recebe o
+ID da tarefa; o processamento roda numa thread do servidor, fora do script da
+página. A página consulta a situação da tarefa a cada rerun (fase atual,
+progresso e as mensagens do motor) e pega o resultado quando ela termina,
+mesmo que o navegador tenha sido recarregado no meio, porque a tarefa vive no
+servidor e o ID fica na URL.
+
+Envios com a mesma chave (o hash dos arquivos e das opções) enquanto uma
+tarefa igual ainda está na fila ou rodando são anexados a ela em vez de
+processar tudo de novo. Tarefas terminadas ficam guardadas por um tempo para
+que o resultado possa ser baixado e depois são descartadas.
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from instrumentacao import Instrumentacao
+
+
+# Execuções simultâneas (de usuários diferentes); as demais esperam na fila
+TRABALHADORES_TAREFAS = int(os.environ.get('FOLLOWUP_TAREFAS', 2))
+# Tarefas terminadas guardadas para download (quantidade e tempo em segundos)
+LIMITE_TAREFAS = 20
+VALIDADE_TAREFAS = 2 * 60 * 60
+
+NA_FILA, EXECUTANDO, CONCLUIDA, ERRO = 'na fila', 'executando', 'concluída', 'erro'
+
+
+def chave_tarefa(*partes):
+    """Chave que identifica envios iguais (ex.: hashes dos arquivos e as opções marcadas)."""
+    return hashlib.sha256('|'.join(map(str, partes)).encode('utf-8')).hexdigest()
+
+
+class ArquivoCopiado(io.BytesIO):
+    """Cópia em memória de um arquivo enviado, que continua válida depois que a página é recarregada.
+
+    Mantém `name` e `file_id` do original, então o hash memorizado pelo `CacheEntradas` continua valendo.
+    """
+
+    def __init__(self, arquivo):
+        super().__init__(arquivo.getvalue())
+        self.name = getattr(arquivo, 'name', None)
+        self.file_id = getattr(arquivo, 'file_id', None)
+
+
+@dataclass
+class Tarefa:
+    id: str
+    chave: str
+    medicoes: Instrumentacao
+    fases_previstas: int = None
+    situacao: str = NA_FILA
+    mensagens: list = field(default_factory=list)
+    resultado: object = None
+    erro: str = None
+    criada_em: float = field(default_factory=time.time)
+    terminada_em: float = None
+    # Arquivos apagados quando a tarefa é descartada (ex.: a saída do modo streaming)
+    arquivos_temporarios: list = field(default_factory=list)
+
+    def notificar(self, nivel, mensagem):
+        """Mesma assinatura do `notificar` do motor; as mensagens são reexibidas pela página."""
+        self.mensagens.append((nivel, mensagem))
+
+    @property
+    def terminada(self):
+        return self.situacao in (CONCLUIDA, ERRO)
+
+    @property
+    def fase_atual(self):
+        """Fase em andamento, com as fases que a contêm (ex.: 'Etapa 1 › Leitura Cji5')."""
+        return ' › '.join(self.medicoes.fases_abertas)
+
+    @property
+    def progresso(self):
+        """Fração de 0 a 1 pelas fases já iniciadas; só chega a 1 quando a tarefa termina."""
+        if self.terminada:
+            return 1.0
+        if not self.fases_previstas:
+            return 0.0
+        return min(len(self.medicoes.medicoes) / self.fases_previstas, 0.99)
+
+    def descartar(self):
+        for caminho in self.arquivos_temporarios:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+        self.arquivos_temporarios.clear()
+        self.resultado = None
+
+
+class FilaTarefas:
+    """Fila de tarefas de um servidor (uma instância compartilhada entre as sessões)."""
+
+    def __init__(self, trabalhadores=TRABALHADORES_TAREFAS, limite=LIMITE_TAREFAS, validade=VALIDADE_TAREFAS):
+        self.limite = limite
+        self.validade = validade
+        self._executor = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix='tarefa')
+        self._tarefas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def enviar(self, chave, funcao, *argumentos, processo='tarefa', fases_previstas=None):
+        """Põe `funcao(tarefa, *argumentos)` na fila; o retorno dela vira `tarefa.resultado`.
+
+        Retorna (tarefa, nova): se já há uma tarefa com a mesma `chave` na fila ou rodando, ela
+        é devolvida com `nova=False` e nada é enviado.
+        """
+        with self._lock:
+            self._descartar_antigas()
+            for tarefa in self._tarefas.values():
+                if tarefa.chave == chave and not tarefa.terminada:
+                    return tarefa, False
+            tarefa = Tarefa(uuid.uuid4().hex[:12], chave, Instrumentacao(processo), fases_previstas)
+            self._tarefas[tarefa.id] = tarefa
+        self._executor.submit(self._executar, tarefa, funcao, argumentos)
+        return tarefa, True
+
+    def obter(self, id_tarefa):
+        """Tarefa com este ID, ou None se ela não existe (ou já foi descartada)."""
+        with self._lock:
+            return self._tarefas.get(id_tarefa)
+
+    def _executar(self, tarefa, funcao, argumentos):
+        tarefa.situacao = EXECUTANDO
+        # terminada_em é preenchida antes da situação: quem vê a tarefa terminada já encontra o horário
+        try:
+            tarefa.resultado = funcao(tarefa, *argumentos)
+            tarefa.terminada_em = time.time()
+            tarefa.situacao = CONCLUIDA
+        except Exception as erro:
+            traceback.print_exc()
+            tarefa.erro = f"{type(erro).__name__}: {erro}"
+            tarefa.terminada_em = time.time()
+            tarefa.situacao = ERRO
+
+    def _descartar_antigas(self):
+        agora = time.time()
+        terminadas = [tarefa for tarefa in self._tarefas.values() if tarefa.terminada and tarefa.terminada_em is not None]
+        vencidas = [tarefa for tarefa in terminadas if agora - tarefa.terminada_em > self.validade]
+        excedentes = terminadas[:max(len(terminadas) - self.limite, 0)]
+        for tarefa in {tarefa.id: tarefa for tarefa in vencidas + excedentes}.values():
+            tarefa.descartar()
+            del self._tarefas[tarefa.id]
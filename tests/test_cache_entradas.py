@@ -0,0 +1,61 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from cache_entradas import CacheEntradas
+
+
+def _df():
+    return pd.DataFrame({'SC': [100, 200, 300], 'WBS': ['LCP-A', 'LCP-B', 'LCP-C']})
+
+
+def test_carregar_le_uma_vez_e_conta_acertos_e_faltas(tmp_path):
+    cache = CacheEntradas(tmp_path)
+    leituras = []
+    ler = lambda: leituras.append(1) or _df()
+
+    primeiro = cache.carregar('chave', ler)
+    segundo = cache.carregar('chave', ler)
+
+    assert len(leituras) == 1
+    pd.testing.assert_frame_equal(primeiro, segundo)
+    assert (cache.acertos, cache.faltas) == (1, 1)
+    assert cache.obter('outra') is None
+    assert (cache.acertos, cache.faltas) == (1, 2)
+
+
+def test_tipos_misturados_vao_para_pickle(tmp_path):
+    cache = CacheEntradas(tmp_path)
+    df = pd.DataFrame({'Created On': ['01/01/2024', pd.Timestamp('2024-01-02')]}, dtype=object)
+
+    cache.gravar('misturada', df)
+
+    assert (tmp_path / 'misturada.pkl').exists() and not (tmp_path / 'misturada.parquet').exists()
+    pd.testing.assert_frame_equal(cache.obter('misturada'), df)
+
+
+def test_arquivo_apagado_por_outra_limpeza_conta_como_falta(tmp_path):
+    cache = CacheEntradas(tmp_path)
+    cache.gravar('chave', _df())
+    (tmp_path / 'chave.parquet').unlink()
+
+    assert cache.obter('chave') is None
+    assert (cache.acertos, cache.faltas) == (0, 1)
+
+
+def test_limite_de_tamanho_apaga_o_menos_usado(tmp_path):
+    cache = CacheEntradas(tmp_path)
+    cache.gravar('a', _df())
+    cache.gravar('b', _df())
+    os.utime(tmp_path / 'a.parquet', (1000, 1000))
+    os.utime(tmp_path / 'b.parquet', (2000, 2000))
+    cache.limite_bytes = 2 * (tmp_path / 'a.parquet').stat().st_size
+
+    # Ler 'a' o torna o mais recente; ao gravar 'c' quem sai é 'b'
+    assert cache.obter('a') is not None
+    cache.gravar('c', _df())
+
+    assert sorted(caminho.name for caminho in tmp_path.glob('*.parquet')) == ['a.parquet', 'c.parquet']
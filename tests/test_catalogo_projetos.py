@@ -0,0 +1,107 @@
+import gc
+import io
+import os
+
+import pytest
+from openpyxl import Workbook
+
+import catalogo_projetos
+from catalogo_projetos import CatalogoProjetos, descartar_catalogos, obter_catalogo
+
+
+def _lcp(projetos, destino=None):
+    """BUSCAR_LCP com os `projetos` (WBS, PROJECT NAME) na aba Capex e a aba AME vazia, cabeçalho na 4ª linha."""
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for nome, linhas in (('Capex', projetos), ('AME - Quarterly', [])):
+        sheet = workbook.create_sheet(nome)
+        for _ in range(3):
+            sheet.append(['título'])
+        sheet.append(['WBS', 'PROJECT NAME'])
+        for projeto in linhas:
+            sheet.append(list(projeto))
+    destino = destino or io.BytesIO()
+    workbook.save(destino)
+    return destino
+
+
+@pytest.fixture(autouse=True)
+def _sem_catalogos():
+    descartar_catalogos()
+    yield
+    descartar_catalogos()
+
+
+def _catalogo(projetos):
+    catalogo = CatalogoProjetos(None, 'hash')
+    catalogo._projetos = sorted(projetos)
+    return catalogo
+
+
+def test_busca_traz_primeiro_os_que_comecam_com_o_termo():
+    catalogo = _catalogo(['LCP-100 - Subestação Norte', 'LCP-200 - Linha Sul', 'LCP-300 - Reforma da Subestação', 'LCP-400 - Pátio'])
+
+    assert catalogo.buscar('subestação') == ['LCP-100 - Subestação Norte', 'LCP-300 - Reforma da Subestação']
+    assert catalogo.buscar('lcp-2') == ['LCP-200 - Linha Sul']
+    # Prefixo antes de trecho, mesmo quando o trecho vem antes na ordem alfabética
+    catalogo = _catalogo(['LCP-1 - Usina Sul', 'Sul - Expansão'])
+    assert catalogo.buscar('SUL') == ['Sul - Expansão', 'LCP-1 - Usina Sul']
+
+
+def test_busca_respeita_o_limite_e_termo_vazio_lista_tudo():
+    catalogo = _catalogo([f'LCP-{numero} - Projeto {numero}' for numero in range(10)])
+
+    assert catalogo.buscar('projeto', limite=3) == ['LCP-0 - Projeto 0', 'LCP-1 - Projeto 1', 'LCP-2 - Projeto 2']
+    assert catalogo.buscar('LCP-', limite=2) == ['LCP-0 - Projeto 0', 'LCP-1 - Projeto 1']
+    assert catalogo.buscar('  ', limite=4) == catalogo.projetos_lcp[:4]
+    assert catalogo.buscar('inexistente') == []
+
+
+def test_caminho_so_e_relido_quando_o_conteudo_muda(tmp_path):
+    caminho = tmp_path / 'BUSCAR_LCP.xlsx'
+    _lcp([('LCP-1', 'Projeto 1')], caminho)
+    primeiro = obter_catalogo(caminho)
+    assert primeiro.projetos_lcp == ['LCP-1 - Projeto 1']
+    assert obter_catalogo(caminho) is primeiro
+
+    # Mesmo conteúdo com outra data: o hash confirma que nada mudou
+    os.utime(caminho, ns=(1_000_000_000, 1_000_000_000))
+    assert obter_catalogo(caminho) is primeiro
+
+    # Outro conteúdo (data e tamanho mudam): catálogo novo
+    _lcp([('LCP-1', 'Projeto 1'), ('LCP-2', 'Projeto 2')], caminho)
+    segundo = obter_catalogo(caminho)
+    assert segundo is not primeiro
+    assert segundo.projetos_lcp == ['LCP-1 - Projeto 1', 'LCP-2 - Projeto 2']
+
+
+def test_conteudo_novo_com_o_mesmo_tamanho_e_percebido_pela_data(tmp_path):
+    caminho = tmp_path / 'BUSCAR_LCP.xlsx'
+    _lcp([('LCP-1', 'Projeto A')], caminho)
+    primeiro = obter_catalogo(caminho)
+    assert primeiro.projetos_lcp == ['LCP-1 - Projeto A']
+    estado = caminho.stat()
+
+    _lcp([('LCP-1', 'Projeto B')], caminho)
+    os.utime(caminho, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1))
+    segundo = obter_catalogo(caminho)
+    assert segundo is not primeiro
+    assert segundo.projetos_lcp == ['LCP-1 - Projeto B']
+
+
+def test_upload_e_identificado_pelo_hash_e_nao_fica_guardado():
+    upload = _lcp([('LCP-1', 'Projeto 1')])
+    catalogo = obter_catalogo(upload)
+    assert catalogo.projetos_lcp == ['LCP-1 - Projeto 1']
+
+    # Outro upload com os mesmos bytes reaproveita o catálogo e passa a ser o arquivo dele
+    copia = io.BytesIO(upload.getvalue())
+    assert obter_catalogo(copia) is catalogo
+    assert catalogo.arquivo is copia
+
+    del upload, copia
+    gc.collect()
+    registros = list(catalogo_projetos._catalogos.values())
+    assert len(registros) == 1
+    with pytest.raises(RuntimeError):
+        registros[0][1].arquivo
@@ -0,0 +1,58 @@
+import pandas as pd
+from openpyxl import Workbook
+
+from delta_sc import AVISO_PLANILHA_ALTERADA, assinatura_planilha, caminho_snapshot, carregar_snapshot, criar_snapshot, gravar_snapshot
+from motor_sc import COLUNAS_GERENCIADAS
+
+
+def _gestao(caminho, valor=10.5, status='Em aberto'):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['SC', 'WBS', 'DESCRIÇÃO', 'VALOR', 'STATUS'])
+    sheet.append(['100', 'LCP-A', 'Cabos', valor, status])
+    sheet.append(['200', 'LCP-B', 'Tubos', 3, None])
+    workbook.save(caminho)
+    return caminho
+
+
+def _snapshot_gravado(tmp_path):
+    gerada = _gestao(tmp_path / 'gerada.xlsx')
+    df = pd.DataFrame({'SC': [100, 200], 'WBS': ['LCP-A', 'LCP-B'], 'DESCRIÇÃO': ['Cabos', 'Tubos'], 'VALOR': [10.5, 3.0]})
+    caminho = tmp_path / 'gerada.snapshot.json.gz'
+    gravar_snapshot(criar_snapshot(df, COLUNAS_GERENCIADAS), caminho, assinatura_planilha(gerada, COLUNAS_GERENCIADAS))
+    return caminho
+
+
+def test_editar_colunas_fora_do_processo_mantem_o_snapshot(tmp_path):
+    caminho = _snapshot_gravado(tmp_path)
+    editada = _gestao(tmp_path / 'editada.xlsx', status='Cancelada')
+    avisos = []
+
+    snapshot = carregar_snapshot(caminho, editada, COLUNAS_GERENCIADAS, lambda *aviso: avisos.append(aviso))
+
+    assert snapshot is not None
+    assert snapshot.chaves['SC'].tolist() == [100, 200]
+    assert avisos == []
+
+
+def test_editar_coluna_gerenciada_desativa_o_delta_com_aviso(tmp_path):
+    caminho = _snapshot_gravado(tmp_path)
+    editada = _gestao(tmp_path / 'editada.xlsx', valor=99)
+    avisos = []
+
+    assert carregar_snapshot(caminho, editada, COLUNAS_GERENCIADAS, lambda *aviso: avisos.append(aviso)) is None
+    assert avisos == [('aviso', AVISO_PLANILHA_ALTERADA)]
+
+
+def test_snapshot_e_o_mesmo_para_a_planilha_e_as_geradas_dela(tmp_path):
+    esperado = tmp_path / 'Gestão.xlsx.snapshot.json.gz'
+    assert caminho_snapshot(tmp_path / 'Gestão.xlsx') == esperado
+    assert caminho_snapshot(tmp_path / 'Gestão_ATUALIZADA.xlsx') == esperado
+    assert caminho_snapshot(tmp_path / 'Gestão_ATUALIZADA_ATUALIZADA.xlsx') == esperado
+
+
+def test_hash_nao_depende_do_tipo_das_colunas():
+    numeros = pd.DataFrame({'SC': [300, 400], 'WBS': ['LCP-A', 'LCP-B'], 'DESCRIÇÃO': ['Cabos', 'Tubos'], 'VALOR': [3, 4]})
+    texto = pd.DataFrame({'SC': ['300', ' 400 '], 'WBS': pd.Series(['LCP-A ', 'LCP-B'], dtype='category'), 'DESCRIÇÃO': ['Cabos', 'Tubos'], 'VALOR': [3.0, 4.0]})
+
+    assert criar_snapshot(numeros, COLUNAS_GERENCIADAS).chaves.equals(criar_snapshot(texto, COLUNAS_GERENCIADAS).chaves)
@@ -0,0 +1,96 @@
+import io
+import zipfile
+from datetime import datetime
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from catalogo_projetos import descartar_catalogos
+from distribuicao import PlanilhaEquipe, compactar_resultados, executar_distribuicao, nome_saida
+from motor_sc import COLUNAS_GERENCIADAS
+
+
+def _xlsx(abas):
+    """Planilha em memória: {aba: linhas}."""
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for nome, linhas in abas.items():
+        sheet = workbook.create_sheet(nome)
+        for linha in linhas:
+            sheet.append(linha)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture
+def entradas():
+    """Cji5, SRM e LCP com quatro SCs: a 100 atende às duas regras, a 400 a nenhuma."""
+    descartar_catalogos()
+    cji5 = _xlsx({'Sheet1': [
+        ['Definição do projeto', 'Nº doc.de referência', 'Material', 'Denominação', 'Quantidade total', 'Valor/moed.transação'],
+        ['LCP-ELE-01', 'S100', 'M1', 'Cabo', 2, 10.0],
+        ['LCP-ELE-02', 'S200', 'M2', 'Disjuntor', 1, 20.0],
+        ['LCP-MEC-01', 'S300', 'M3', 'Bomba', 1, 30.0],
+        ['LCP-CIV-01', 'S400', 'M4', 'Cimento', 9, 40.0],
+    ]})
+    srm = _xlsx({'Sheet1': [
+        ['SC ID', 'Created On', 'SC Name', 'Next Approver', 'SC Approval status', 'Received on', 'Requester'],
+        [100, datetime(2024, 1, 2), 'Cabos', 'Gestor', 'Awaiting', None, 'Ana Souza'],
+        [200, datetime(2024, 1, 3), 'Disjuntores', 'Gestor', 'Awaiting', None, 'Bruno Lima'],
+        [300, datetime(2024, 1, 4), 'Bombas', 'Gestor', 'Awaiting', None, ' ana souza '],
+        [400, datetime(2024, 1, 5), 'Cimento', 'Gestor', 'Awaiting', None, 'Carla Dias'],
+    ]})
+    titulo = [['BUSCAR LCP']] * 3
+    lcp = _xlsx({
+        'Capex': titulo + [['WBS', 'PROJECT NAME'], ['LCP-ELE-01', 'Subestação'], ['LCP-MEC-01', 'Bombeamento']],
+        'AME - Quarterly': titulo + [['WBS', 'PROJECT NAME']],
+    })
+    return cji5, srm, lcp
+
+
+def _gestao():
+    return _xlsx({'Gestão': [COLUNAS_GERENCIADAS + ['STATUS']]})
+
+
+def _scs(dados):
+    sheet = load_workbook(io.BytesIO(dados)).active
+    coluna = [celula.value for celula in sheet[1]].index('SC')
+    return sorted(linha[coluna] for linha in sheet.iter_rows(min_row=2, values_only=True))
+
+
+def test_cada_planilha_recebe_as_scs_da_sua_regra(entradas):
+    planilhas = [
+        PlanilhaEquipe('Gestão Elétrica.xlsx', _gestao(), prefixos_wbs=['LCP-ELE']),
+        PlanilhaEquipe('Gestão Ana.xlsx', _gestao(), requisitantes=['ANA SOUZA']),
+        PlanilhaEquipe('Gestão Elétrica da Ana.xlsx', _gestao(), prefixos_wbs=[' LCP-ELE '], requisitantes=['ana souza']),
+    ]
+    mensagens = []
+
+    resultados = executar_distribuicao(*entradas, planilhas, lambda nivel, mensagem: mensagens.append((nivel, mensagem)))
+
+    assert [resultado.planilha for resultado in resultados] == planilhas
+    # Prefixo de WBS; requisitante sem diferenciar maiúsculas e espaços; as duas regras juntas
+    assert _scs(resultados[0].dados) == ['100', '200']
+    assert _scs(resultados[1].dados) == ['100', '300']
+    assert _scs(resultados[2].dados) == ['100']
+    assert ('aviso', "⚠️ 1 SC(s) não atendem à regra de nenhuma planilha e não foram lançadas.") in mensagens
+    assert [nome_saida(planilha) for planilha in planilhas] == ['Gestão Elétrica_ATUALIZADA.xlsx', 'Gestão Ana_ATUALIZADA.xlsx', 'Gestão Elétrica da Ana_ATUALIZADA.xlsx']
+
+
+def test_sem_regra_a_planilha_recebe_todas_e_o_zip_separa_nomes_repetidos(entradas):
+    planilhas = [
+        PlanilhaEquipe('Gestão.xlsx', _gestao(), prefixos_wbs=['LCP-MEC']),
+        PlanilhaEquipe('Gestão.xlsx', _gestao()),
+    ]
+    mensagens = []
+
+    resultados = executar_distribuicao(*entradas, planilhas, lambda nivel, mensagem: mensagens.append((nivel, mensagem)))
+
+    with zipfile.ZipFile(io.BytesIO(compactar_resultados(resultados))) as arquivo_zip:
+        assert arquivo_zip.namelist() == ['Gestão_ATUALIZADA.xlsx', 'Gestão_ATUALIZADA (2).xlsx']
+        assert _scs(arquivo_zip.read('Gestão_ATUALIZADA.xlsx')) == ['300']
+        assert _scs(arquivo_zip.read('Gestão_ATUALIZADA (2).xlsx')) == ['100', '200', '300', '400']
+    # Com uma planilha sem regra nenhuma SC fica sem destino
+    assert not [mensagem for nivel, mensagem in mensagens if nivel == 'aviso']
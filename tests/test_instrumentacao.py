@@ -0,0 +1,44 @@
+import json
+import tracemalloc
+
+import pytest
+
+import instrumentacao
+from instrumentacao import Instrumentacao
+
+
+@pytest.mark.skipif(instrumentacao.resource is None, reason="ru_maxrss só existe com o módulo resource")
+def test_pico_rss_e_medido_sempre():
+    medicoes = Instrumentacao('teste')
+    with medicoes.etapa("Fase"):
+        pass
+    assert medicoes.medicoes[0].pico_rss_mb > 0
+    assert list(medicoes.tabela().columns) == ['Fase', 'Tempo (s)', 'Linhas', 'Pico RSS do processo (MB)']
+
+
+def test_memoria_da_fase_so_e_medida_quando_pedida():
+    medicoes = Instrumentacao('teste')
+    with medicoes.etapa("Fase") as medicao:
+        assert not tracemalloc.is_tracing()
+        medicao.linhas = 3
+    assert medicoes.medicoes[0].pico_memoria_mb is None
+    assert 'Pico de memória (MB)' not in medicoes.tabela().columns
+
+    medicoes = Instrumentacao('teste', medir_memoria=True)
+    with medicoes.etapa("Fase"):
+        dados = list(range(100000))
+    assert medicoes.medicoes[0].pico_memoria_mb > 0
+    assert 'Pico de memória (MB)' in medicoes.tabela().columns
+    assert not tracemalloc.is_tracing() and dados
+
+
+def test_log_e_rotacionado_ao_passar_do_limite(tmp_path):
+    arquivo = tmp_path / 'desempenho.jsonl'
+    for execucao in range(3):
+        medicoes = Instrumentacao('teste')
+        with medicoes.etapa("Fase"):
+            pass
+        assert medicoes.gravar_log(arquivo, limite_bytes=1, execucao_teste=execucao)
+
+    assert [json.loads(linha)['execucao_teste'] for linha in arquivo.read_text(encoding='utf-8').splitlines()] == [2]
+    assert [json.loads(linha)['execucao_teste'] for linha in (tmp_path / 'desempenho.jsonl.1').read_text(encoding='utf-8').splitlines()] == [1]
@@ -0,0 +1,53 @@
+import importlib.util
+import io
+
+import pytest
+from openpyxl import Workbook
+
+from catalogo_projetos import CatalogoProjetos
+from leitura import ler_lcp
+
+
+MOTORES = ['openpyxl'] + (['calamine'] if importlib.util.find_spec('python_calamine') else [])
+
+
+def _lcp(abas):
+    """BUSCAR_LCP em memória: {aba: (cabeçalho, linhas)}, com o cabeçalho na 4ª linha."""
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for nome, (cabecalho, linhas) in abas.items():
+        sheet = workbook.create_sheet(nome)
+        for _ in range(3):
+            sheet.append(['título'])
+        sheet.append(cabecalho)
+        for linha in linhas:
+            sheet.append(linha)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('motor', MOTORES)
+def test_aba_sem_as_colunas_lidas_vira_dataframe_vazio(motor):
+    dados = _lcp({'AME - Quarterly': (['OUTRA', 'COLUNA'], [[1, 2], [3, 4]])})
+    df = ler_lcp(io.BytesIO(dados), 'AME - Quarterly', motor)
+    assert df.empty and list(df.columns) == []
+    assert df.columns.dtype == object
+
+
+@pytest.mark.parametrize('motor', MOTORES)
+def test_catalogo_ignora_aba_sem_wbs(motor):
+    dados = _lcp({
+        'Capex': ([' WBS ', 'PROJECT NAME'], [['LCP-1', 'Projeto 1'], ['OUTRO-2', 'Projeto 2']]),
+        'AME - Quarterly': (['OUTRA', 'COLUNA'], [[1, 2]]),
+    })
+    catalogo = CatalogoProjetos(io.BytesIO(dados), 'hash', motor)
+    assert catalogo.projetos_lcp == ['LCP-1 - Projeto 1']
+
+
+@pytest.mark.parametrize('motor', MOTORES)
+def test_cabecalho_com_espacos_recebe_o_dtype_da_coluna(motor):
+    dados = _lcp({'Capex': ([' WBS ', 'PROJECT NAME '], [[123, 'Projeto 1'], ['LCP-2', 'Projeto 2']])})
+    df = ler_lcp(io.BytesIO(dados), 'Capex', motor)
+    assert list(df.columns) == ['WBS', 'PROJECT NAME']
+    assert df['WBS'].tolist() == ['123', 'LCP-2']
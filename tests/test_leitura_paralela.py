@@ -0,0 +1,103 @@
+import io
+import os
+
+import pytest
+from openpyxl import Workbook
+
+from catalogo_projetos import descartar_catalogos
+from leitura import ler_cji5, ler_lcp, ler_srm
+from leitura_paralela import SEM_LEITURAS, LeiturasParalelas, criar_executor, executor_quebrado
+from motor_sc import agendar_leituras
+
+
+def _xlsx(caminho, linhas, abas=None):
+    """Planilha com `linhas` na primeira aba (ou {aba: linhas} em `abas`)."""
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for nome, conteudo in (abas or {'Sheet1': linhas}).items():
+        sheet = workbook.create_sheet(nome)
+        for linha in conteudo:
+            sheet.append(linha)
+    workbook.save(caminho)
+    return caminho
+
+
+@pytest.fixture
+def entradas(tmp_path):
+    descartar_catalogos()
+    cji5 = _xlsx(tmp_path / 'cji5.xlsx', [
+        ['Definição do projeto', 'Nº doc.de referência', 'Material', 'Denominação', 'Quantidade total', 'Valor/moed.transação'],
+        ['LCP-A', 'S100', 'M1', 'Cabo', 2, 10.5],
+        ['LCP-A', '4500', 'M2', 'Pedido', 1, 3.0],
+        ['LCP-B', 'S200', 'M3', 'Tubo', 5, 7.25],
+    ])
+    srm = _xlsx(tmp_path / 'srm.xlsx', [
+        ['SC ID', 'Created On', 'SC Name', 'Next Approver', 'SC Approval status', 'Received on', 'Requester'],
+        [100, '2024-01-02', 'Cabos', 'Ana', 'Approved', '2024-01-03', 'Bruno'],
+        [200, '2024-02-02', 'Tubos', None, 'Awaiting', None, 'Carla'],
+    ])
+    lcp = _xlsx(tmp_path / 'lcp.xlsx', None, {
+        'Capex': [['título']] * 3 + [['WBS', 'PROJECT NAME'], ['LCP-A', 'Projeto A'], ['LCP-B', 'Projeto B']],
+        'AME - Quarterly': [['título']] * 3 + [['WBS', 'PROJECT NAME']],
+    })
+    return cji5, srm, lcp
+
+
+def _sequenciais(cji5, srm, lcp):
+    return {'cji5': ler_cji5(cji5), 'srm': ler_srm(srm), 'lcp': ler_lcp(lcp, 'Capex')}
+
+
+def _nao_ler():
+    raise AssertionError("a leitura agendada deveria ter sido usada")
+
+
+@pytest.mark.parametrize('como_upload', [False, True])
+def test_leituras_agendadas_sao_iguais_as_sequenciais(entradas, como_upload):
+    esperado = _sequenciais(*entradas)
+    arquivos = [io.BytesIO(caminho.read_bytes()) for caminho in entradas] if como_upload else entradas
+    executor = criar_executor(2)
+    try:
+        with LeiturasParalelas(executor) as leituras:
+            agendar_leituras(leituras, *arquivos, None)
+            assert all(leituras.agendado(nome) for nome in esperado)
+            for nome, df in esperado.items():
+                assert leituras.obter(nome, _nao_ler).equals(df)
+            assert not leituras.quebrado
+    finally:
+        executor.shutdown()
+
+
+def test_sem_leituras_le_na_hora(entradas):
+    cji5, srm, lcp = entradas
+    agendar_leituras(SEM_LEITURAS, cji5, srm, lcp, None)
+
+    assert not SEM_LEITURAS.agendado('cji5')
+    assert SEM_LEITURAS.obter('cji5', lambda: ler_cji5(cji5)).equals(ler_cji5(cji5))
+    assert SEM_LEITURAS.obter('srm', lambda: 'lido na hora') == 'lido na hora'
+
+
+def _morrer(arquivo):
+    os._exit(1)
+
+
+def test_pool_quebrado_volta_a_ler_no_processo_principal(entradas):
+    cji5, srm, lcp = entradas
+    executor = criar_executor(2)
+    try:
+        with LeiturasParalelas(executor) as leituras:
+            # Um processo do pool que morre quebra o pool inteiro: a leitura agendada é refeita aqui
+            leituras.agendar('cji5', _morrer, cji5)
+            assert leituras.obter('cji5', lambda: ler_cji5(cji5)).equals(ler_cji5(cji5))
+            assert leituras.quebrado and executor_quebrado(executor)
+
+            leituras.agendar('srm', ler_srm, srm)
+            assert not leituras.agendado('srm')
+            assert leituras.obter('srm', lambda: ler_srm(srm)).equals(ler_srm(srm))
+    finally:
+        executor.shutdown()
+
+    novo = criar_executor(2)
+    try:
+        assert not executor_quebrado(novo)
+    finally:
+        novo.shutdown()
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from motor_sc import _agrupar_lancamento, cruzar_cji5_srm
+
+
+def _sem_notificacao(nivel, mensagem):
+    pass
+
+
+def _cji5():
+    # SC 100: três linhas com material e denominação repetidos; SC 200: denominações vazias; SC 300: uma linha só
+    return pd.DataFrame({
+        'Definição do projeto': ['LCP-A', 'LCP-A', 'LCP-A', 'LCP-B', 'LCP-B', 'LCP-C', 'LCP-C'],
+        'Nº doc.de referência': ['S100', 'S100', 'S100', 'S200', 'S200', 'S300', 'OUTRO'],
+        'Material': ['M1', 'M2', 'M1', 'M3', 'M3', 'M4', 'M9'],
+        'Denominação': ['Cabo', 'Tubo', 'Cabo', '', '', 'Painel', 'Ignorada'],
+        'Quantidade total': [1, 2.5, 1, 3, 3, 7, 9],
+        'Valor/moed.transação': [10.0, 20.0, 30.0, 4.0, 5.0, 6.0, 7.0],
+    })
+
+
+def _srm():
+    return pd.DataFrame({'SC ID': ['100', '200', '300'], 'Created On': ['01/01/2024', '02/01/2024', '03/01/2024'], 'Requester': ['ANA', 'BRUNO', 'CARLA']})
+
+
+def test_etapa1_vetorizada_gera_o_mesmo_texto_das_lambdas():
+    vetorizado = cruzar_cji5_srm(_cji5(), _srm(), _sem_notificacao, 'vetorizado')
+    legado = cruzar_cji5_srm(_cji5(), _srm(), _sem_notificacao, 'legado')
+
+    colunas = ['SC ID', 'Material', 'Denominação', 'Quantidade total', 'Valor Total']
+    pd.testing.assert_frame_equal(vetorizado[colunas], legado[colunas])
+    assert vetorizado['Material'].tolist() == ['M1;\nM2', 'M3', 'M4']
+    assert vetorizado['Quantidade total'].tolist() == ['1.0;\n2.5;\n1.0', '3.0;\n3.0', '7.0']
+
+
+def test_etapa2_vetorizada_gera_o_mesmo_texto_das_lambdas():
+    df_lancamento = pd.DataFrame({
+        'SC ID': pd.array([100, 100, 100, 200, 200, 300], dtype='int64'),
+        'atuação do projeto': pd.Categorical(['LCP-A', 'LCP-A', 'LCP-A', 'LCP-B', 'LCP-B', 'LCP-C']),
+        'Denominação': ['Cabo', np.nan, 'Cabo;\nTubo', np.nan, np.nan, 'Painel'],
+        'SC Name': ['Compra A', 'Compra A', 'Compra A', 'Compra B', 'Compra B', 'Compra C'],
+        'Created On': ['01/01/2024'] * 6,
+        'Requester': ['ANA', 'ANA', 'ANA', 'BRUNO', 'BRUNO', 'CARLA'],
+        'Valor Total': [60.0, 60.0, 60.0, 9.0, 9.0, 6.0],
+        'Next Approver': ['X', 'X', 'X', 'Y', 'Y', 'Z'],
+        'Received on': ['02/01/2024'] * 6,
+        'PROJECT NAME': ['Projeto A', 'Projeto A', 'Projeto A', np.nan, np.nan, 'Projeto C'],
+    })
+
+    vetorizado, _ = _agrupar_lancamento(df_lancamento.copy(), 'vetorizado')
+    legado, _ = _agrupar_lancamento(df_lancamento.copy(), 'legado')
+
+    colunas = ['SC', 'WBS', 'CONTEÚDO', 'DESCRIÇÃO', 'VALOR', 'PROJETO']
+    pd.testing.assert_frame_equal(vetorizado[colunas], legado[colunas])
+    # Grupo só com denominações vazias fica com texto vazio, como no join original
+    assert vetorizado['CONTEÚDO'].tolist() == ['Cabo\nCabo;\nTubo', '', 'Painel']
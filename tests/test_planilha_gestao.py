@@ -0,0 +1,149 @@
+import io
+import zipfile
+from datetime import datetime
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font, PatternFill
+
+from planilha_gestao import ESTILO_MOEDA, FORMATO_MOEDA, _ler_layouts, aplicar_atualizacao, exportar_streaming, formatar_planilha
+
+
+CABECALHO = ['SC', 'WBS', 'DESCRIÇÃO', 'VALOR', 'STATUS']
+COLUNAS_GERENCIADAS = ['SC', 'WBS', 'DESCRIÇÃO', 'VALOR']
+
+
+def _planilha():
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(CABECALHO)
+    sheet.append(['100', 'LCP-A', 'Cabos', 10.0, 'Em cotação'])     # linha 2: VALOR muda
+    sheet.append(['200', 'LCP-B', 'Parafusos', 5.5, 'OK'])           # linha 3: sem mudança
+    sheet.append(['300', 'LCP-C', 'Antiga', 1.0, 'Duplicada 1'])     # linha 4: chave repetida...
+    sheet.append([300, 'LCP-C', 'Antiga', 1.0, 'Duplicada 2'])       # linha 5: ...vale a última (SC numérico na célula)
+    return sheet
+
+
+def _atualizacao():
+    return pd.DataFrame({
+        'SC': pd.array([100, 200, 300, 400], dtype='int64'),
+        'WBS': ['LCP-A', 'LCP-B', 'LCP-C', 'LCP-D'],
+        'DESCRIÇÃO': ['Cabos', 'Parafusos', 'Nova descrição', 'Tubos'],
+        'VALOR': [12.5, 5.5, 1.0, 7.0],
+    })
+
+
+def test_insere_atualiza_e_preserva_o_resto():
+    sheet = _planilha()
+    relatorio = aplicar_atualizacao(sheet, _atualizacao(), COLUNAS_GERENCIADAS)
+
+    assert (relatorio.inseridas, relatorio.atualizadas, relatorio.inalteradas) == (1, 2, 1)
+    assert relatorio.linhas_atualizadas == [2, 5]
+    assert relatorio.linhas_inseridas == [6]
+    assert sorted((linha, nome) for linha, nome, _, _ in relatorio.celulas_alteradas) == [(2, 'VALOR'), (5, 'DESCRIÇÃO'), (5, 'SC')]
+
+    linhas = [list(valores) for valores in sheet.iter_rows(min_row=2, values_only=True)]
+    assert linhas[0] == ['100', 'LCP-A', 'Cabos', 12.5, 'Em cotação']
+    assert linhas[1] == ['200', 'LCP-B', 'Parafusos', 5.5, 'OK']
+    # Só a última ocorrência da chave repetida é atualizada (com o SC regravado como texto);
+    # a coluna STATUS, preenchida pelos usuários, não é tocada
+    assert linhas[2] == ['300', 'LCP-C', 'Antiga', 1.0, 'Duplicada 1']
+    assert linhas[3] == ['300', 'LCP-C', 'Nova descrição', 1.0, 'Duplicada 2']
+    # SC nova escrita como texto, sem '.0', e sem valor nas colunas que o processo não preenche
+    assert linhas[4] == ['400', 'LCP-D', 'Tubos', 7.0, None]
+
+
+def test_segunda_execucao_nao_muda_nada():
+    sheet = _planilha()
+    aplicar_atualizacao(sheet, _atualizacao(), COLUNAS_GERENCIADAS)
+    antes = [list(valores) for valores in sheet.iter_rows(values_only=True)]
+
+    relatorio = aplicar_atualizacao(sheet, _atualizacao(), COLUNAS_GERENCIADAS)
+
+    assert (relatorio.inseridas, relatorio.atualizadas, relatorio.celulas_alteradas) == (0, 0, [])
+    assert relatorio.inalteradas == 4
+    assert [list(valores) for valores in sheet.iter_rows(values_only=True)] == antes
+
+
+def test_formatacao_preserva_o_estilo_manual_das_linhas_existentes():
+    sheet = _planilha()
+    amarelo = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
+    sheet['A2'].fill = amarelo
+    sheet['E2'].number_format = '#,##0.00_ ;\\-#,##0.00\\ '
+    relatorio = aplicar_atualizacao(sheet, _atualizacao(), COLUNAS_GERENCIADAS)
+
+    formatar_planilha(sheet.parent, sheet, relatorio.linhas_atualizadas, relatorio.linhas_inseridas)
+
+    # Linha alterada: ganha borda e o formato de moeda, mas mantém o preenchimento e o formato aplicados à mão
+    assert sheet['A2'].fill == amarelo
+    assert sheet['E2'].number_format == '#,##0.00_ ;\\-#,##0.00\\ '
+    assert sheet['A2'].border.left.style == 'thin'
+    assert sheet['D2'].number_format == FORMATO_MOEDA
+    # Linha nova: estilo nomeado
+    assert sheet['D6'].style == ESTILO_MOEDA
+
+
+def _gestao_completa():
+    """Planilha com o que o modo read-only não expõe: datas fora das colunas de data, fórmula, filtro, painéis e outra aba formatada."""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = 'Compras'
+    sheet.append(CABECALHO + ['PRAZO', 'DIAS'])
+    sheet.append(['100', 'LCP-A', 'Cabos', 10.0, 'Em cotação', datetime(2024, 3, 1), '=F2-DATE(2024,1,1)'])
+    sheet.append(['200', 'LCP-B', 'Parafusos', 5.5, 'OK', datetime(2024, 4, 1), None])
+    sheet['F2'].number_format = sheet['F3'].number_format = 'DD/MM/YYYY'
+    sheet['G2'].number_format = 'DD/MM/YYYY'
+    sheet['E2'].fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
+    sheet.auto_filter.ref = 'A1:G3'
+    sheet.freeze_panes = 'B2'
+    sheet.column_dimensions['G'].width = 33
+    deletadas = workbook.create_sheet('SC deletadas')
+    deletadas.append(['SC', 'MOTIVO'])
+    deletadas['A1'].font = Font(bold=True)
+    deletadas.freeze_panes = 'A2'
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def test_streaming_gera_a_mesma_planilha_que_a_atualizacao_em_memoria():
+    dados = _gestao_completa()
+    workbook = load_workbook(io.BytesIO(dados))
+    sheet = workbook.active
+    relatorio = aplicar_atualizacao(sheet, _atualizacao(), COLUNAS_GERENCIADAS)
+    formatar_planilha(workbook, sheet, range(2, sheet.max_row + 1), relatorio.linhas_inseridas)
+    em_memoria = io.BytesIO()
+    workbook.save(em_memoria)
+
+    streaming = io.BytesIO()
+    relatorio_streaming = exportar_streaming(io.BytesIO(dados), _atualizacao(), COLUNAS_GERENCIADAS, streaming)
+    assert relatorio_streaming.linhas_inseridas == relatorio.linhas_inseridas
+
+    esperado, obtido = load_workbook(em_memoria), load_workbook(streaming)
+    assert obtido.sheetnames == esperado.sheetnames
+    for aba_esperada, aba_obtida in zip(esperado.worksheets, obtido.worksheets, strict=True):
+        celulas = lambda aba: [[(cell.value, cell.number_format, cell.fill.fgColor.rgb, cell.font.b, cell.border.left.style) for cell in linha] for linha in aba.iter_rows()]
+        assert celulas(aba_obtida) == celulas(aba_esperada)
+        assert aba_obtida.auto_filter.ref == aba_esperada.auto_filter.ref
+        assert aba_obtida.freeze_panes == aba_esperada.freeze_panes
+    assert obtido.active.title == 'Compras'
+    assert obtido.active['F2'].number_format == 'DD/MM/YYYY' and obtido.active['G2'].number_format == 'DD/MM/YYYY'
+    assert [obtido.active.column_dimensions[letra].width for letra in 'ABCDEFG'] == [esperado.active.column_dimensions[letra].width for letra in 'ABCDEFG']
+    assert obtido.active.column_dimensions['G'].width == 33
+
+
+def test_layout_das_abas_com_alvos_relativos_como_os_do_excel():
+    # O openpyxl grava '/xl/worksheets/sheet1.xml'; o Excel grava 'worksheets/sheet1.xml'
+    original = zipfile.ZipFile(io.BytesIO(_gestao_completa()))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as copia:
+        for item in original.infolist():
+            dados = original.read(item)
+            if item.filename == 'xl/_rels/workbook.xml.rels':
+                dados = dados.replace(b'Target="/xl/', b'Target="')
+            copia.writestr(item, dados)
+
+    layouts = _ler_layouts(buffer)
+
+    assert (layouts['Compras'].filtro, layouts['Compras'].paineis, layouts['Compras'].larguras['G']) == ('A1:G3', 'B2', 33)
+    assert (layouts['SC deletadas'].filtro, layouts['SC deletadas'].paineis) == (None, 'A2')
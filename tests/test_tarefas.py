@@ -0,0 +1,87 @@
+import threading
+import time
+
+from tarefas import CONCLUIDA, ERRO, EXECUTANDO, FilaTarefas, chave_tarefa
+
+
+def _esperar(tarefa, limite=5):
+    fim = time.monotonic() + limite
+    while not tarefa.terminada and time.monotonic() < fim:
+        time.sleep(0.01)
+    assert tarefa.terminada
+
+
+def test_tarefa_roda_ate_concluida_com_horario_de_termino():
+    fila = FilaTarefas(trabalhadores=1)
+    tarefa, nova = fila.enviar('a', lambda tarefa, valor: valor * 2, 21)
+    _esperar(tarefa)
+
+    assert nova
+    assert tarefa.situacao == CONCLUIDA and tarefa.resultado == 42
+    assert tarefa.terminada_em is not None and tarefa.progresso == 1.0
+    assert fila.obter(tarefa.id) is tarefa
+
+
+def test_excecao_termina_em_erro_com_a_mensagem():
+    def falhar(tarefa):
+        raise ValueError("planilha sem a coluna SC")
+
+    fila = FilaTarefas(trabalhadores=1)
+    tarefa, _ = fila.enviar('a', falhar)
+    _esperar(tarefa)
+
+    assert tarefa.situacao == ERRO
+    assert tarefa.erro == "ValueError: planilha sem a coluna SC"
+    assert tarefa.terminada_em is not None and tarefa.resultado is None
+
+
+def test_mesma_chave_em_andamento_devolve_a_mesma_tarefa():
+    fila = FilaTarefas(trabalhadores=1)
+    liberar = threading.Event()
+    chave = chave_tarefa('hash-cji5', 'hash-srm', True)
+    tarefa, nova = fila.enviar(chave, lambda tarefa: liberar.wait(5))
+    repetida, repetida_nova = fila.enviar(chave_tarefa('hash-cji5', 'hash-srm', True), lambda tarefa: None)
+    liberar.set()
+    _esperar(tarefa)
+    depois, depois_nova = fila.enviar(chave, lambda tarefa: None)
+    _esperar(depois)
+
+    assert nova and not repetida_nova and repetida is tarefa
+    # Terminada a tarefa, o mesmo envio processa de novo
+    assert depois_nova and depois is not tarefa
+
+
+def test_descarta_terminadas_antigas_e_mantem_as_em_andamento(tmp_path):
+    fila = FilaTarefas(trabalhadores=2, limite=1)
+    liberar = threading.Event()
+    rodando, _ = fila.enviar('rodando', lambda tarefa: liberar.wait(5))
+    temporario = tmp_path / 'saida.xlsx'
+    temporario.write_bytes(b'xlsx')
+
+    def com_arquivo(tarefa):
+        tarefa.arquivos_temporarios.append(temporario)
+        return 'primeira'
+
+    primeira, _ = fila.enviar('primeira', com_arquivo)
+    _esperar(primeira)
+    segunda, _ = fila.enviar('segunda', lambda tarefa: 'segunda')
+    _esperar(segunda)
+    # Cada envio descarta as terminadas além do limite (as mais antigas primeiro)
+    fila.enviar('terceira', lambda tarefa: None)
+
+    assert fila.obter(primeira.id) is None
+    assert primeira.resultado is None and not temporario.exists()
+    assert fila.obter(segunda.id) is segunda
+    assert fila.obter(rodando.id) is rodando and rodando.situacao == EXECUTANDO
+    liberar.set()
+    _esperar(rodando)
+
+
+def test_descarta_terminadas_vencidas():
+    fila = FilaTarefas(trabalhadores=1, validade=0.05)
+    tarefa, _ = fila.enviar('a', lambda tarefa: 'ok')
+    _esperar(tarefa)
+    time.sleep(0.1)
+    fila.enviar('b', lambda tarefa: None)
+
+    assert fila.obter(tarefa.id) is None
@@ -0,0 +1,151 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import votos_db
+
+
+RESPOSTAS = [('Qualidade', 'Q1', 'Acabamento', '5'), ('Qualidade', 'Q2', 'Prazo', 'N/A'), ('Custo', 'C1', 'Preço', '3')]
+
+
+def _rastrear_comandos(monkeypatch):
+    """Lista que recebe os comandos SQL de todas as conexões abertas pelo módulo."""
+    comandos = []
+    conectar = sqlite3.connect
+
+    def conectar_rastreado(*argumentos, **opcoes):
+        con = conectar(*argumentos, **opcoes)
+        con.set_trace_callback(comandos.append)
+        return con
+
+    monkeypatch.setattr(votos_db.sqlite3, 'connect', conectar_rastreado)
+    return comandos
+
+
+def test_leituras_so_consultam_a_versao(tmp_path, monkeypatch):
+    caminho = tmp_path / 'votos.db'
+    repositorio = votos_db.RepositorioVotos(caminho)
+    assert votos_db.registrar_avaliacao(caminho, 'ana', 'LCP-1', 'Fornecedor A', RESPOSTAS)
+    assert len(repositorio.obter()) == 3
+
+    comandos = _rastrear_comandos(monkeypatch)
+    repositorio.obter()
+    repositorio.obter_agregados()
+
+    assert comandos
+    assert all(comando.lstrip().upper().startswith('SELECT') for comando in comandos), comandos
+
+
+def test_agregados_vem_com_as_dimensoes_da_mesma_leitura(tmp_path):
+    caminho = tmp_path / 'votos.db'
+    repositorio = votos_db.RepositorioVotos(caminho)
+    assert votos_db.registrar_avaliacao(caminho, 'ana', 'LCP-1', 'Emp A', [('QUALITY', '2.1', 'Prazo', '4')])
+    repositorio.obter()
+    dimensoes_antigas = repositorio.dimensoes()
+    # Outra sessão grava uma avaliação com projeto, empresa e categoria novos entre as duas leituras
+    assert votos_db.registrar_avaliacao(caminho, 'bob', 'LCP-2', 'Emp B', [('PEOPLE', '3.1', 'Equipe', '2')])
+
+    agregados, dimensoes = repositorio.obter_agregados()
+
+    media = votos_db.medias_por_categoria(agregados, dimensoes)
+    assert media.astype({'empresa': str, 'categoria': str}).values.tolist() == [['Emp A', 'QUALITY', 4.0], ['Emp B', 'PEOPLE', 2.0]]
+    id_projeto = dimensoes.projetos.index[dimensoes.projetos == 'LCP-2'][0]
+    assert votos_db.medias_por_categoria(agregados, dimensoes, id_projeto)['empresa'].astype(str).tolist() == ['Emp B']
+    # Com as dimensões lidas antes, o erro é explícito em vez de rótulos trocados
+    with pytest.raises(KeyError):
+        votos_db.medias_por_categoria(agregados, dimensoes_antigas)
+
+
+def test_id_fora_da_dimensao_levanta_erro_em_vez_de_usar_outro_rotulo(tmp_path):
+    caminho = tmp_path / 'votos.db'
+    assert votos_db.registrar_avaliacao(caminho, 'ana', 'LCP-1', 'Emp A', RESPOSTAS)
+    repositorio = votos_db.RepositorioVotos(caminho)
+    votos = repositorio.obter()
+    dimensoes = repositorio.dimensoes()
+
+    with pytest.raises(KeyError, match=r'\[99\]'):
+        votos_db.rotular(votos.assign(empresa=99), dimensoes)
+
+
+ESQUEMA_ANTIGO = """
+CREATE TABLE avaliacoes (
+    id INTEGER PRIMARY KEY, user_name TEXT NOT NULL, projeto TEXT NOT NULL, empresa TEXT NOT NULL,
+    criado_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP, apagado_em TEXT
+);
+CREATE UNIQUE INDEX ux_avaliacoes_ativas ON avaliacoes (user_name, empresa, projeto) WHERE apagado_em IS NULL;
+CREATE TABLE votos (
+    id INTEGER PRIMARY KEY, avaliacao_id INTEGER NOT NULL REFERENCES avaliacoes (id),
+    categoria TEXT NOT NULL, pergunta_id TEXT NOT NULL, pergunta_texto TEXT, voto TEXT NOT NULL
+);
+CREATE INDEX ix_votos_avaliacao ON votos (avaliacao_id);
+CREATE TABLE meta (chave TEXT PRIMARY KEY, valor TEXT);
+CREATE TABLE agregados_votos (
+    projeto TEXT NOT NULL, empresa TEXT NOT NULL, categoria TEXT NOT NULL, pergunta_id TEXT NOT NULL,
+    soma REAL NOT NULL, contagem INTEGER NOT NULL, linhas INTEGER NOT NULL,
+    PRIMARY KEY (projeto, empresa, categoria, pergunta_id)
+);
+INSERT INTO meta VALUES ('versao', '4'), ('versao_exclusoes', '1'), ('agregados_prontos', '1');
+INSERT INTO avaliacoes (id, user_name, projeto, empresa, apagado_em) VALUES
+    (1, 'ana', 'LCP-1', 'Fornecedor A', NULL),
+    (2, 'bruno', 'LCP-1', 'Fornecedor A', NULL),
+    (3, 'ana', 'LCP-2', 'Fornecedor B', NULL),
+    (4, 'ana', 'LCP-1', 'Fornecedor A', '2024-01-01 00:00:00');
+INSERT INTO votos (id, avaliacao_id, categoria, pergunta_id, pergunta_texto, voto) VALUES
+    (1, 1, 'Qualidade', 'Q1', 'Acabamento', '5'),
+    (2, 1, 'Qualidade', 'Q2', 'Prazo', 'N/A'),
+    (3, 1, 'Custo', 'C1', NULL, '3'),
+    (4, 2, 'Qualidade', 'Q1', 'Acabamento', '2'),
+    (5, 2, 'Qualidade', 'Q2', 'Prazo', '4'),
+    (6, 3, 'Custo', 'C1', NULL, '1'),
+    (7, 4, 'Qualidade', 'Q1', 'Acabamento', '1');
+INSERT INTO agregados_votos VALUES
+    ('LCP-1', 'Fornecedor A', 'Qualidade', 'Q1', 7, 2, 2),
+    ('LCP-1', 'Fornecedor A', 'Qualidade', 'Q2', 4, 1, 2),
+    ('LCP-1', 'Fornecedor A', 'Custo', 'C1', 3, 1, 1),
+    ('LCP-2', 'Fornecedor B', 'Custo', 'C1', 1, 1, 1);
+"""
+
+CONSULTA_ANTIGA = """SELECT v.id, a.user_name, a.projeto, a.empresa, v.categoria, v.pergunta_id, COALESCE(v.pergunta_texto, '') AS pergunta_texto,
+    CASE WHEN v.voto GLOB '[0-9]*' THEN CAST(v.voto AS INTEGER) END AS voto
+    FROM votos v JOIN avaliacoes a ON a.id = v.avaliacao_id WHERE a.apagado_em IS NULL ORDER BY v.id"""
+
+CHAVE_AGREGADOS = ['projeto', 'empresa', 'categoria', 'pergunta_id']
+
+
+def test_migracao_do_esquema_antigo_preserva_votos_e_agregados(tmp_path):
+    caminho = tmp_path / 'votos.db'
+    con = sqlite3.connect(caminho)
+    con.executescript(ESQUEMA_ANTIGO)
+    antes = pd.read_sql_query(CONSULTA_ANTIGA, con)
+    agregados_antes = pd.read_sql_query("SELECT * FROM agregados_votos", con).sort_values(CHAVE_AGREGADOS, ignore_index=True)
+    con.close()
+
+    with votos_db.abrir_banco(caminho) as con:
+        assert not votos_db._esquema_antigo(con)
+        assert con.execute("SELECT COUNT(*) FROM avaliacoes").fetchone()[0] == 4
+        assert con.execute("SELECT COUNT(*) FROM votos").fetchone()[0] == 7
+        # A migração conta como exclusão: quem tinha os votos em memória recarrega tudo
+        assert votos_db.ler_versao(con) == (5, 2)
+
+    repositorio = votos_db.RepositorioVotos(caminho)
+    dimensoes = repositorio.dimensoes()
+    depois = votos_db.rotular(repositorio.obter(), dimensoes)
+    esperado = antes.drop(columns='id')
+    pd.testing.assert_frame_equal(
+        depois.astype(object).assign(voto=depois['voto'].astype('Int64')),
+        esperado.astype(object).assign(voto=esperado['voto'].astype('Int64')),
+    )
+
+    agregados, dimensoes = repositorio.obter_agregados()
+    perguntas = dimensoes.perguntas.loc[agregados['pergunta']]
+    agregados_depois = pd.DataFrame({
+        'projeto': dimensoes.projetos.loc[agregados['projeto']].to_numpy(),
+        'empresa': dimensoes.empresas.loc[agregados['empresa']].to_numpy(),
+        'categoria': perguntas['categoria'].to_numpy(),
+        'pergunta_id': perguntas['pergunta_id'].to_numpy(),
+        'soma': agregados['soma'].to_numpy(),
+        'contagem': agregados['contagem'].to_numpy(),
+        'linhas': agregados['linhas'].to_numpy(),
+    }).sort_values(CHAVE_AGREGADOS, ignore_index=True)
+    pd.testing.assert_frame_equal(agregados_depois.astype(object), agregados_antes.astype(object), check_dtype=False)
@@ -0,0 +1,458 @@
+"""Armazenamento dos votos da Avaliação de Fornecedores em SQLite.
+
+Substitui a regravação do votos.csv inteiro a cada avaliação: cada avaliação é
+inserida numa transação (modo WAL, então sessões simultâneas não sobrescrevem
+os votos umas das outras) e exclusões só marcam a avaliação como apagada.
+A regra "um usuário avalia uma empresa uma vez por projeto" é garantida por um
+índice único sobre as avaliações ativas.
+
+Os textos ficam uma vez só em tabelas de dimensão (`usuarios`, `projetos`,
+`empresas` e `perguntas`, com categoria, código e texto da pergunta); as
+avaliações e os votos guardam apenas os IDs inteiros e a nota (NULL para
+'N/A'). Em memória é igual: os votos são um DataFrame de IDs, e os nomes só são
+juntados na hora de exibir (`rotular`). Bancos do formato antigo, com os
+textos repetidos em cada voto, são convertidos ao abrir (`_migrar_esquema_antigo`).
+
+A preparação do banco (modo WAL, migração, criação das tabelas e dos
+agregados) roda uma vez por processo e arquivo (`preparar_banco`); as
+conexões abertas depois, inclusive as de cada rerun, só consultam.
+
+Toda gravação incrementa um contador de versão na tabela `meta`; o
+`RepositorioVotos` usa esse contador para manter os votos em memória e só
+reler o que mudou.
+
+A tabela `agregados_votos` guarda soma e quantidade de notas por (projeto,
+empresa, pergunta) e é atualizada na mesma transação em que uma avaliação é
+gravada ou apagada, para o relatório de médias não precisar percorrer os votos.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import pandas as pd
+
+
+COLUNAS_VOTOS = ['user_name', 'projeto', 'empresa', 'categoria', 'pergunta_id', 'pergunta_texto', 'voto']
+# Votos em memória: IDs das dimensões e a nota
+COLUNAS_FATOS = ['usuario', 'projeto', 'empresa', 'pergunta', 'voto']
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (id INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS projetos (id INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS empresas (id INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS perguntas (
+    id INTEGER PRIMARY KEY,
+    categoria TEXT NOT NULL,
+    codigo TEXT NOT NULL,
+    texto TEXT NOT NULL DEFAULT '',
+    UNIQUE (categoria, codigo, texto)
+);
+CREATE TABLE IF NOT EXISTS avaliacoes (
+    id INTEGER PRIMARY KEY,
+    usuario_id INTEGER NOT NULL REFERENCES usuarios (id),
+    projeto_id INTEGER NOT NULL REFERENCES projetos (id),
+    empresa_id INTEGER NOT NULL REFERENCES empresas (id),
+    criado_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    apagado_em TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_avaliacoes_ativas ON avaliacoes (usuario_id, empresa_id, projeto_id) WHERE apagado_em IS NULL;
+CREATE TABLE IF NOT EXISTS votos (
+    id INTEGER PRIMARY KEY,
+    avaliacao_id INTEGER NOT NULL REFERENCES avaliacoes (id),
+    pergunta_id INTEGER NOT NULL REFERENCES perguntas (id),
+    voto INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_votos_avaliacao ON votos (avaliacao_id);
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor TEXT
+);
+CREATE TABLE IF NOT EXISTS agregados_votos (
+    projeto_id INTEGER NOT NULL,
+    empresa_id INTEGER NOT NULL,
+    pergunta_id INTEGER NOT NULL,
+    soma REAL NOT NULL,
+    contagem INTEGER NOT NULL,
+    linhas INTEGER NOT NULL,
+    PRIMARY KEY (projeto_id, empresa_id, pergunta_id)
+) WITHOUT ROWID;
+"""
+
+# soma/contagem consideram só as notas ('N/A' é NULL e fica de fora da média); linhas conta todos os votos
+ATUALIZACAO_AGREGADOS = """INSERT INTO agregados_votos (projeto_id, empresa_id, pergunta_id, soma, contagem, linhas)
+    SELECT a.projeto_id, a.empresa_id, v.pergunta_id, {sinal} * COALESCE(SUM(v.voto), 0), {sinal} * COUNT(v.voto), {sinal} * COUNT(*)
+    FROM votos v JOIN avaliacoes a ON a.id = v.avaliacao_id
+    WHERE {filtro}
+    GROUP BY a.projeto_id, a.empresa_id, v.pergunta_id
+    ON CONFLICT (projeto_id, empresa_id, pergunta_id) DO UPDATE SET
+        soma = soma + excluded.soma, contagem = contagem + excluded.contagem, linhas = linhas + excluded.linhas"""
+
+# Conversão do formato antigo: as tabelas são renomeadas, as dimensões saem dos textos distintos
+# e avaliações e votos são copiados com os mesmos IDs
+MIGRACAO_ESQUEMA_ANTIGO = [
+    "DROP INDEX IF EXISTS ux_avaliacoes_ativas",
+    "DROP INDEX IF EXISTS ix_votos_avaliacao",
+    "ALTER TABLE avaliacoes RENAME TO avaliacoes_antigas",
+    "ALTER TABLE votos RENAME TO votos_antigos",
+    "DROP TABLE IF EXISTS agregados_votos",
+    "DELETE FROM meta WHERE chave = 'agregados_prontos'",
+    *[comando.strip() for comando in ESQUEMA.split(';') if comando.strip()],
+    "INSERT INTO usuarios (nome) SELECT DISTINCT user_name FROM avaliacoes_antigas ORDER BY user_name",
+    "INSERT INTO projetos (nome) SELECT DISTINCT projeto FROM avaliacoes_antigas ORDER BY projeto",
+    "INSERT INTO empresas (nome) SELECT DISTINCT empresa FROM avaliacoes_antigas ORDER BY empresa",
+    """INSERT INTO perguntas (categoria, codigo, texto)
+        SELECT DISTINCT categoria, pergunta_id, COALESCE(pergunta_texto, '') FROM votos_antigos ORDER BY categoria, pergunta_id""",
+    """INSERT INTO avaliacoes (id, usuario_id, projeto_id, empresa_id, criado_em, apagado_em)
+        SELECT a.id, u.id, p.id, e.id, a.criado_em, a.apagado_em FROM avaliacoes_antigas a
+        JOIN usuarios u ON u.nome = a.user_name JOIN projetos p ON p.nome = a.projeto JOIN empresas e ON e.nome = a.empresa""",
+    """INSERT INTO votos (id, avaliacao_id, pergunta_id, voto)
+        SELECT v.id, v.avaliacao_id, q.id, CASE WHEN v.voto GLOB '[0-9]*' THEN CAST(v.voto AS INTEGER) END FROM votos_antigos v
+        JOIN perguntas q ON q.categoria = v.categoria AND q.codigo = v.pergunta_id AND q.texto = COALESCE(v.pergunta_texto, '')""",
+    "DROP TABLE votos_antigos",
+    "DROP TABLE avaliacoes_antigas",
+]
+
+
+# Arquivos já preparados neste processo (caminhos absolutos)
+_bancos_preparados = set()
+_trava_preparacao = threading.Lock()
+
+
+def preparar_banco(caminho_banco):
+    """Modo WAL, migração do formato antigo, esquema e agregados; só na primeira chamada do processo para cada arquivo."""
+    chave = os.path.abspath(caminho_banco)
+    with _trava_preparacao:
+        if chave in _bancos_preparados:
+            return
+        con = sqlite3.connect(caminho_banco, timeout=30)
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            _migrar_esquema_antigo(con)
+            con.executescript(ESQUEMA)
+            if not con.execute("SELECT 1 FROM meta WHERE chave = 'agregados_prontos'").fetchone():
+                reconstruir_agregados(con)
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        finally:
+            con.close()
+        _bancos_preparados.add(chave)
+
+
+@contextmanager
+def abrir_banco(caminho_banco, leitura=False):
+    """Conexão com o banco preparado; faz commit ao sair sem erro (rollback se houver) e fecha.
+
+    Com `leitura=True` a conexão só é aberta, sem ajustes de gravação (as consultas de cada rerun).
+    """
+    preparar_banco(caminho_banco)
+    con = sqlite3.connect(caminho_banco, timeout=30)
+    try:
+        if not leitura:
+            con.execute("PRAGMA synchronous=NORMAL")
+        yield con
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    finally:
+        con.close()
+
+
+def _esquema_antigo(con):
+    return 'categoria' in {coluna[1] for coluna in con.execute("PRAGMA table_info(votos)")}
+
+
+def _migrar_esquema_antigo(con):
+    """Converte, numa única transação, um banco com os textos repetidos em cada voto para as tabelas de dimensão."""
+    if not _esquema_antigo(con):
+        return
+    # A trava de escrita vem antes da nova verificação: outro processo pode ter acabado de migrar
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        if _esquema_antigo(con):
+            for comando in MIGRACAO_ESQUEMA_ANTIGO:
+                con.execute(comando)
+            reconstruir_agregados(con)
+            _incrementar_versao(con, exclusao=True)
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    # Devolve ao disco o espaço dos textos que deixaram de ser repetidos
+    con.execute("VACUUM")
+
+
+def _incrementar_versao(con, exclusao=False):
+    """Marca que os dados mudaram; `exclusao` indica que linhas saíram (exige recarga completa)."""
+    chaves = ['versao', 'versao_exclusoes'] if exclusao else ['versao']
+    for chave in chaves:
+        con.execute("INSERT INTO meta (chave, valor) VALUES (?, '1') ON CONFLICT(chave) DO UPDATE SET valor = CAST(valor AS INTEGER) + 1", (chave,))
+
+
+def _somar_agregados(con, filtro, parametros=(), sinal=1):
+    """Soma (sinal=1) ou subtrai (sinal=-1) dos agregados os votos das avaliações que atendem a `filtro`."""
+    con.execute(ATUALIZACAO_AGREGADOS.format(sinal=sinal, filtro=filtro), parametros)
+    con.execute("DELETE FROM agregados_votos WHERE linhas <= 0")
+
+
+def reconstruir_agregados(con):
+    """Recalcula os agregados do zero a partir dos votos ativos (bancos criados antes dessa tabela)."""
+    con.execute("DELETE FROM agregados_votos")
+    _somar_agregados(con, "a.apagado_em IS NULL")
+    con.execute("INSERT INTO meta (chave, valor) VALUES ('agregados_prontos', '1') ON CONFLICT(chave) DO NOTHING")
+
+
+def ler_versao(con):
+    """(versão geral, versão das exclusões) do banco."""
+    valores = dict(con.execute("SELECT chave, CAST(valor AS INTEGER) FROM meta WHERE chave IN ('versao', 'versao_exclusoes')").fetchall())
+    return valores.get('versao', 0), valores.get('versao_exclusoes', 0)
+
+
+# --- DIMENSÕES ---
+
+def _id_nome(con, tabela, nome):
+    """ID de `nome` na dimensão `tabela` (usuarios, projetos ou empresas), criando a linha se preciso."""
+    con.execute(f"INSERT INTO {tabela} (nome) VALUES (?) ON CONFLICT (nome) DO NOTHING", (nome,))
+    return con.execute(f"SELECT id FROM {tabela} WHERE nome = ?", (nome,)).fetchone()[0]
+
+
+def _id_pergunta(con, categoria, codigo, texto):
+    texto = texto or ''
+    con.execute("INSERT INTO perguntas (categoria, codigo, texto) VALUES (?, ?, ?) ON CONFLICT DO NOTHING", (categoria, codigo, texto))
+    return con.execute("SELECT id FROM perguntas WHERE categoria = ? AND codigo = ? AND texto = ?", (categoria, codigo, texto)).fetchone()[0]
+
+
+def _nota(voto):
+    """'1'..'5' -> inteiro; 'N/A' (ou qualquer outro texto) -> None."""
+    voto = str(voto).strip()
+    return int(voto) if voto.isdigit() else None
+
+
+def _inserir_avaliacao(con, user_name, projeto, empresa, respostas, ids_perguntas):
+    """Insere a avaliação e seus votos; `ids_perguntas` memoriza os IDs das perguntas entre chamadas."""
+    cursor = con.execute("INSERT INTO avaliacoes (usuario_id, projeto_id, empresa_id) VALUES (?, ?, ?)",
+                         (_id_nome(con, 'usuarios', user_name), _id_nome(con, 'projetos', projeto), _id_nome(con, 'empresas', empresa)))
+    linhas = []
+    for categoria, pergunta_id, pergunta_texto, voto in respostas:
+        chave = (categoria, pergunta_id, pergunta_texto or '')
+        if chave not in ids_perguntas:
+            ids_perguntas[chave] = _id_pergunta(con, *chave)
+        linhas.append((cursor.lastrowid, ids_perguntas[chave], _nota(voto)))
+    con.executemany("INSERT INTO votos (avaliacao_id, pergunta_id, voto) VALUES (?, ?, ?)", linhas)
+    return cursor.lastrowid
+
+
+@dataclass
+class Dimensoes:
+    """Nomes por ID: `usuarios`, `projetos` e `empresas` são Series; `perguntas` tem categoria, pergunta_id e pergunta_texto."""
+    usuarios: pd.Series
+    projetos: pd.Series
+    empresas: pd.Series
+    perguntas: pd.DataFrame
+
+
+def ler_dimensoes(con):
+    nomes = {tabela: pd.read_sql_query(f"SELECT id, nome FROM {tabela} ORDER BY id", con, index_col='id')['nome'] for tabela in ['usuarios', 'projetos', 'empresas']}
+    perguntas = pd.read_sql_query("SELECT id, categoria, codigo AS pergunta_id, texto AS pergunta_texto FROM perguntas ORDER BY id", con, index_col='id')
+    return Dimensoes(perguntas=perguntas, **nomes)
+
+
+def _rotulos(ids, rotulos):
+    """IDs como categoria com os rótulos da dimensão (cada texto fica uma vez só na memória).
+
+    Levanta KeyError se algum ID não está na dimensão (dimensões lidas antes dos dados).
+    """
+    rotulos = rotulos.astype('category')
+    posicoes = rotulos.index.get_indexer(ids)
+    if (posicoes == -1).any():
+        # Sem a verificação, o -1 pegaria o último rótulo da dimensão
+        raise KeyError(f"IDs sem rótulo na dimensão: {sorted(set(pd.Index(ids)[posicoes == -1].tolist()))}")
+    codigos = rotulos.cat.codes.to_numpy()[posicoes]
+    return pd.Categorical.from_codes(codigos, dtype=rotulos.dtype)
+
+
+def rotular(df, dimensoes):
+    """Votos com os nomes no lugar dos IDs (as colunas do antigo votos.csv), para exibição."""
+    perguntas = dimensoes.perguntas
+    return pd.DataFrame({
+        'user_name': _rotulos(df['usuario'], dimensoes.usuarios),
+        'projeto': _rotulos(df['projeto'], dimensoes.projetos),
+        'empresa': _rotulos(df['empresa'], dimensoes.empresas),
+        'categoria': _rotulos(df['pergunta'], perguntas['categoria']),
+        'pergunta_id': _rotulos(df['pergunta'], perguntas['pergunta_id']),
+        'pergunta_texto': _rotulos(df['pergunta'], perguntas['pergunta_texto']),
+        'voto': df['voto'].array,
+    }, index=df.index)
+
+
+# --- GRAVAÇÃO E LEITURA ---
+
+def registrar_avaliacao(caminho_banco, user_name, projeto, empresa, respostas):
+    """Insere uma avaliação e seus votos numa única transação.
+
+    `respostas` é uma lista de tuplas (categoria, pergunta_id, pergunta_texto, voto).
+    Retorna False, sem gravar nada, se o usuário já avaliou essa empresa nesse projeto.
+    """
+    with abrir_banco(caminho_banco) as con:
+        try:
+            id_avaliacao = _inserir_avaliacao(con, user_name, projeto, empresa, respostas, {})
+        except sqlite3.IntegrityError:
+            return False
+        _somar_agregados(con, "a.id = ?", (id_avaliacao,))
+        _incrementar_versao(con)
+    return True
+
+
+CONSULTA_VOTOS = """SELECT v.id, a.usuario_id AS usuario, a.projeto_id AS projeto, a.empresa_id AS empresa, v.pergunta_id AS pergunta, v.voto
+    FROM votos v JOIN avaliacoes a ON a.id = v.avaliacao_id
+    WHERE a.apagado_em IS NULL AND v.id > ?
+    ORDER BY v.id"""
+
+
+def _ler_votos(con, a_partir_do_id=0):
+    return pd.read_sql_query(CONSULTA_VOTOS, con, params=(a_partir_do_id,))
+
+
+def _compactar_ids(df, colunas):
+    """IDs no menor inteiro sem sinal que os comporta (uint8 enquanto as dimensões têm até 255 linhas)."""
+    for coluna in colunas:
+        df[coluna] = pd.to_numeric(df[coluna].astype('int64'), downcast='unsigned')
+    return df
+
+
+def tipar_votos(df):
+    """IDs compactos e o voto como Int8 (N/A fica nulo e fora das médias)."""
+    return _compactar_ids(df.astype({'id': 'int64', 'voto': 'Int8'}), ['usuario', 'projeto', 'empresa', 'pergunta'])
+
+
+def carregar_votos(caminho_banco):
+    """Votos das avaliações ativas, com as mesmas colunas do antigo votos.csv (rotulados por `rotular`)."""
+    with abrir_banco(caminho_banco, leitura=True) as con:
+        return rotular(tipar_votos(_ler_votos(con)), ler_dimensoes(con))
+
+
+class RepositorioVotos:
+    """Mantém os votos ativos em memória e só consulta o banco de novo quando a versão muda.
+
+    Se só houve inserções desde a última leitura, lê apenas os votos novos; se houve exclusões,
+    recarrega tudo. As dimensões são relidas logo depois dos votos (ou dos agregados): como elas
+    só ganham linhas, cobrem todos os IDs lidos antes, mesmo que outra sessão grave no meio.
+    É seguro para uso compartilhado entre as sessões do Streamlit.
+    """
+
+    def __init__(self, caminho_banco):
+        self.caminho_banco = caminho_banco
+        # Migração e esquema aqui, uma vez; as leituras seguintes só conferem a versão
+        preparar_banco(caminho_banco)
+        self._trava = threading.Lock()
+        self._df = None
+        self._versao = None
+        self._ultimo_id = 0
+        self._agregados = None
+        self._versao_agregados = None
+        self._dimensoes = None
+
+    def obter(self):
+        """DataFrame dos votos ativos com as colunas `COLUNAS_FATOS` (não modifique: ele é compartilhado)."""
+        with self._trava, abrir_banco(self.caminho_banco, leitura=True) as con:
+            versao = ler_versao(con)
+            if self._df is not None and versao == self._versao:
+                return self._df
+            recarregar = self._df is None or versao[1] != self._versao[1]
+            novos = tipar_votos(_ler_votos(con, 0 if recarregar else self._ultimo_id))
+            if not novos.empty:
+                self._ultimo_id = int(novos['id'].max())
+            novos = novos.drop(columns='id')
+            self._df = novos if recarregar else pd.concat([self._df, novos], ignore_index=True)
+            self._versao = versao
+            self._dimensoes = ler_dimensoes(con)
+            return self._df
+
+    def obter_agregados(self):
+        """(agregados, dimensões): a tabela `agregados_votos` (soma, contagem e linhas por IDs de projeto,
+        empresa e pergunta) e as `Dimensoes` lidas logo depois dela, que cobrem todos os IDs dela.
+
+        Use sempre o par: dimensões lidas antes (ex.: por `dimensoes()`) podem não ter os IDs de uma
+        avaliação gravada por outra sessão entre as duas leituras. Não modifique: é compartilhado.
+        """
+        with self._trava, abrir_banco(self.caminho_banco, leitura=True) as con:
+            versao = ler_versao(con)
+            if self._agregados is None or versao != self._versao_agregados:
+                df = pd.read_sql_query("SELECT projeto_id AS projeto, empresa_id AS empresa, pergunta_id AS pergunta, soma, contagem, linhas FROM agregados_votos", con)
+                self._agregados = (_compactar_ids(df, ['projeto', 'empresa', 'pergunta']), ler_dimensoes(con))
+                self._versao_agregados = versao
+            return self._agregados
+
+    def dimensoes(self):
+        """`Dimensoes` lidas junto com o último `obter` (cobrem todos os IDs dele); para os agregados, use o par de `obter_agregados`."""
+        with self._trava:
+            if self._dimensoes is None:
+                with abrir_banco(self.caminho_banco, leitura=True) as con:
+                    self._dimensoes = ler_dimensoes(con)
+            return self._dimensoes
+
+
+FILTRO_NOMES = """a.usuario_id = (SELECT id FROM usuarios WHERE nome = ?) AND a.projeto_id = (SELECT id FROM projetos WHERE nome = ?)
+    AND a.empresa_id = (SELECT id FROM empresas WHERE nome = ?) AND a.apagado_em IS NULL"""
+
+
+def apagar_avaliacao(caminho_banco, user_name, projeto, empresa):
+    """Marca a avaliação como apagada (os votos continuam no banco, fora dos relatórios)."""
+    with abrir_banco(caminho_banco) as con:
+        _somar_agregados(con, FILTRO_NOMES, (user_name, projeto, empresa), sinal=-1)
+        con.execute(f"UPDATE avaliacoes AS a SET apagado_em = CURRENT_TIMESTAMP WHERE {FILTRO_NOMES}", (user_name, projeto, empresa))
+        _incrementar_versao(con, exclusao=True)
+
+
+def apagar_todas(caminho_banco):
+    """Marca todas as avaliações ativas como apagadas."""
+    with abrir_banco(caminho_banco) as con:
+        con.execute("UPDATE avaliacoes SET apagado_em = CURRENT_TIMESTAMP WHERE apagado_em IS NULL")
+        con.execute("DELETE FROM agregados_votos")
+        _incrementar_versao(con, exclusao=True)
+
+
+def importar_csv(caminho_banco, caminho_csv):
+    """Importa uma única vez o votos.csv antigo para o banco.
+
+    Cada combinação (usuário, projeto, empresa) vira uma avaliação. A importação fica registrada
+    na tabela `meta`, então chamadas seguintes não fazem nada. Retorna quantos votos foram importados.
+    """
+    if not os.path.exists(caminho_csv):
+        return 0
+    with abrir_banco(caminho_banco) as con:
+        if con.execute("SELECT 1 FROM meta WHERE chave = 'csv_importado'").fetchone():
+            return 0
+        df = pd.read_csv(caminho_csv, dtype=str, keep_default_na=False)
+        for coluna in COLUNAS_VOTOS:
+            if coluna not in df.columns:
+                df[coluna] = ''
+        ids_perguntas = {}
+        for (user_name, projeto, empresa), df_avaliacao in df.groupby(['user_name', 'projeto', 'empresa'], sort=False):
+            respostas = df_avaliacao[['categoria', 'pergunta_id', 'pergunta_texto', 'voto']].itertuples(index=False, name=None)
+            _inserir_avaliacao(con, user_name, projeto, empresa, respostas, ids_perguntas)
+        con.execute("INSERT INTO meta (chave, valor) VALUES ('csv_importado', ?)", (os.path.abspath(caminho_csv),))
+        reconstruir_agregados(con)
+        _incrementar_versao(con)
+    return len(df)
+
+
+def medias_por_categoria(df_agregados, dimensoes, projeto=None):
+    """Média das notas por (empresa, categoria) a partir dos agregados, opcionalmente só de um projeto (ID).
+
+    Equivale à média dos votos individuais: soma das notas dividida pela quantidade de notas.
+    O agrupamento usa os IDs; os nomes das empresas só entram no resultado. `dimensoes` deve ser a
+    do mesmo par de `RepositorioVotos.obter_agregados` (KeyError se faltar algum ID).
+    """
+    if projeto is not None:
+        df_agregados = df_agregados[df_agregados['projeto'] == projeto]
+    categorias = _rotulos(df_agregados['pergunta'], dimensoes.perguntas['categoria'])
+    totais = df_agregados.groupby([df_agregados['empresa'], pd.Series(categorias, index=df_agregados.index, name='categoria')], observed=True)[['soma', 'contagem']].sum()
+    totais = totais[totais['contagem'] > 0]
+    media = (totais['soma'] / totais['contagem']).rename('media_avaliacao').reset_index()
+    media['empresa'] = _rotulos(media['empresa'], dimensoes.empresas)
+    return media.sort_values(['empresa', 'categoria'], ignore_index=True)